@@ -5,17 +5,19 @@ Provides AI opponents for single-player gameplay
 
 import random
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable
 from models import GameDatabase, Empire, BattleSystem, UNIT_COSTS
+import metrics
 import threading
 
 class AIPlayer:
     """AI player that makes strategic decisions"""
     
-    def __init__(self, empire_id: str, difficulty: str = "normal"):
+    def __init__(self, empire_id: str, difficulty: str = "normal", clock: Callable[[], float] = time.time):
         self.empire_id = empire_id
         self.difficulty = difficulty
-        self.last_action_time = time.time()
+        self.clock = clock
+        self.last_action_time = self.clock()
         self.strategy = self._determine_strategy()
     
     def _determine_strategy(self) -> str:
@@ -33,7 +35,7 @@ class AIPlayer:
     
     def should_take_action(self) -> bool:
         """Determine if AI should take an action based on time and strategy"""
-        current_time = time.time()
+        current_time = self.clock()
         time_since_last = current_time - self.last_action_time
         
         # Action frequency based on difficulty
@@ -45,8 +47,8 @@ class AIPlayer:
         
         return time_since_last >= min_interval
     
-    def make_decision(self, db: GameDatabase, all_empires: List[Empire]) -> Optional[Dict]:
-        """Make a strategic decision for the AI"""
+    def make_decision(self, db: GameDatabase, all_empires: List[Empire], diplomacy=None) -> Optional[Dict]:
+        """Make a strategic decision for the AI; ``diplomacy`` (an AllianceDatabase) filters attack targets"""
         if not self.should_take_action():
             return None
         
@@ -54,11 +56,11 @@ class AIPlayer:
         if not empire:
             return None
         
-        self.last_action_time = time.time()
+        self.last_action_time = self.clock()
         
         # Decide action based on strategy
         if self.strategy == "aggressive":
-            return self._consider_attack(empire, all_empires, db)
+            return self._consider_attack(empire, all_empires, db, diplomacy)
         elif self.strategy == "defensive":
             return self._consider_defense(empire, db)
         elif self.strategy == "economic":
@@ -66,21 +68,28 @@ class AIPlayer:
         else:  # balanced
             # Randomly choose between actions
             actions = [
-                lambda: self._consider_attack(empire, all_empires, db),
+                lambda: self._consider_attack(empire, all_empires, db, diplomacy),
                 lambda: self._consider_defense(empire, db),
                 lambda: self._consider_economy(empire, db)
             ]
             return random.choice(actions)()
     
-    def _consider_attack(self, empire: Empire, all_empires: List[Empire], db: GameDatabase) -> Optional[Dict]:
+    def _consider_attack(self, empire: Empire, all_empires: List[Empire], db: GameDatabase,
+                         diplomacy=None) -> Optional[Dict]:
         """Consider attacking another empire"""
         # Find potential targets (non-AI empires or weaker AI empires)
         targets = []
+        # One read of the alliance caches per decision, not one per candidate
+        protected, hostile = diplomacy.get_attack_stances(empire.id) if diplomacy else (set(), set())
         
         for target in all_empires:
             if target.id == empire.id:
                 continue
             
+            # Respect alliances and non-aggression pacts
+            if target.id in protected:
+                continue
+            
             # Calculate relative strength
             my_power = self._calculate_military_power(empire.military)
             target_power = self._calculate_military_power(target.military)
@@ -93,8 +102,8 @@ class AIPlayer:
         if not targets:
             return None
         
-        # Choose target (prefer weaker, closer targets)
-        targets.sort(key=lambda x: (x[1], x[2]))  # Sort by power, then distance
+        # Choose target (prefer empires at war with us, then weaker, closer targets)
+        targets.sort(key=lambda x: (x[0].id not in hostile, x[1], x[2]))
         target_empire = targets[0][0]
         
         # Decide attack force (use 30-70% of military)
@@ -199,14 +208,17 @@ class AIPlayer:
 class AIManager:
     """Manages all AI players in the game"""
     
-    def __init__(self):
+    def __init__(self, clock: Callable[[], float] = time.time, diplomacy=None):
         self.ai_players: Dict[str, AIPlayer] = {}
         self.running = False
         self.thread = None
+        self.clock = clock
+        self.diplomacy = diplomacy  # Optional AllianceDatabase for relation checks
+        self.should_run: Callable[[], bool] = lambda: True  # Leader gate for multi-worker deployments
     
     def add_ai_player(self, empire_id: str, difficulty: str = "normal"):
         """Add an AI player"""
-        self.ai_players[empire_id] = AIPlayer(empire_id, difficulty)
+        self.ai_players[empire_id] = AIPlayer(empire_id, difficulty, clock=self.clock)
     
     def remove_ai_player(self, empire_id: str):
         """Remove an AI player"""
@@ -217,7 +229,7 @@ class AIManager:
         """Start the AI management thread"""
         if not self.running:
             self.running = True
-            self.thread = threading.Thread(target=self._ai_loop, daemon=True)
+            self.thread = threading.Thread(target=self._ai_loop, daemon=True, name='ai-manager')
             self.thread.start()
     
     def stop(self):
@@ -228,27 +240,42 @@ class AIManager:
     
     def _ai_loop(self):
         """Main AI loop that runs in background"""
-        db = GameDatabase()
+        db = metrics.instrument_database(GameDatabase(), 'sqlite')
         
         while self.running:
             try:
-                # Get all empires
-                all_empires = db.get_all_empires()
-                
-                # Process each AI player
-                for empire_id, ai_player in self.ai_players.items():
-                    decision = ai_player.make_decision(db, all_empires)
-                    
-                    if decision:
-                        self._execute_ai_decision(empire_id, decision, db)
+                if self.should_run():
+                    self.run_cycle(db)
                 
                 # Sleep for a short time before next iteration
                 time.sleep(30)  # Check every 30 seconds
                 
             except Exception as e:
+                metrics.BACKGROUND_ERRORS.inc(job='ai')
                 print(f"AI Manager error: {e}")
                 time.sleep(60)  # Wait longer on error
     
+    def run_cycle(self, db: GameDatabase) -> List[Dict]:
+        """Let every AI player decide and act once; returns executed decisions"""
+        started = time.perf_counter()
+        
+        # Get all empires
+        all_empires = db.get_all_empires()
+        decisions = []
+        
+        # Process each AI player
+        for empire_id, ai_player in self.ai_players.items():
+            decision = ai_player.make_decision(db, all_empires, self.diplomacy)
+            
+            if decision:
+                self._execute_ai_decision(empire_id, decision, db)
+                decisions.append(decision)
+                metrics.AI_DECISIONS.inc(action=decision["action"])
+        
+        metrics.AI_DECISIONS_PER_CYCLE.observe(len(decisions))
+        metrics.AI_CYCLE_DURATION.observe(time.perf_counter() - started)
+        return decisions
+    
     def _execute_ai_decision(self, empire_id: str, decision: Dict, db: GameDatabase):
         """Execute an AI decision"""
         try:
@@ -304,7 +331,8 @@ class AIManager:
                 
                 if valid_attack:
                     # Calculate battle
-                    result = BattleSystem.calculate_battle(empire, target, attacking_units)
+                    with metrics.BATTLE_DURATION.time(source='ai'):
+                        result = BattleSystem.calculate_battle(empire, target, attacking_units)
                     
                     # Update empires
                     db.update_empire(empire)
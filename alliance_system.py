@@ -4,11 +4,16 @@ Handles alliance creation, management, diplomacy, and cooperative gameplay
 """
 
 import sqlite3
+import threading
+import time
 import uuid
+from collections import deque
 from datetime import datetime, timedelta
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple, Callable
 from enum import Enum
+from models import UNIT_STATS
+from metrics import CACHE_REQUESTS
 
 class AllianceRole(Enum):
     LEADER = "leader"
@@ -27,6 +32,30 @@ class AllianceRelationType(Enum):
     WAR = "war"
     NAP = "nap"  # Non-Aggression Pact
 
+CHAT_BUFFER_SIZE = 50  # Latest messages kept in memory per alliance
+INVITE_EXPIRY_BATCH = 500  # Invites expired per transaction by the background job
+
+# Change counters for the in-memory caches, bumped by triggers so every worker's writes count
+CACHE_STAMP_TABLES = {
+    'membership': {'alliance_members': ('INSERT', 'DELETE', 'UPDATE OF alliance_id, role'),
+                   'alliances': ('DELETE', 'UPDATE OF tag, alliance_color')},
+    'relations': {'alliance_relations': ('INSERT', 'DELETE', 'UPDATE')},
+}
+TREASURY_RESOURCES = ['gold', 'food', 'iron', 'oil']
+TREASURY_CHECKPOINT_EVERY = 1000  # Ledger entries between treasury balance checkpoints
+
+def military_power_sql(column: str) -> str:
+    """SQL expression for an empire's military power from its JSON military column"""
+    return ' + '.join(
+        f"COALESCE(json_extract({column}, '$.{unit_type}'), 0) * {(stats['attack'] + stats['defense']) / 2}"
+        for unit_type, stats in UNIT_STATS.items()
+    )
+
+# Explicit order so migrated and freshly created tables map the same way
+ALLIANCE_COLUMNS = """id, name, tag, description, leader_id, created_at, is_recruiting,
+    min_power_requirement, alliance_color, treasury_gold, treasury_food,
+    treasury_iron, treasury_oil, member_count, total_power"""
+
 @dataclass
 class Alliance:
     id: str
@@ -79,7 +108,56 @@ class AllianceRelation:
 
 class AllianceDatabase:
     def __init__(self):
-        self.init_alliance_db()
+        # empire_id -> {'alliance_id', 'tag', 'color'}; None until first lookup
+        self._membership: Optional[Dict[str, Dict[str, str]]] = None
+        self._membership_lock = threading.Lock()
+        # alliance_id -> {other_alliance_id: (relation_type, expires_at)}; None until first lookup
+        self._relations: Optional[Dict[str, Dict[str, Tuple[AllianceRelationType, Optional[datetime]]]]] = None
+        self._relations_lock = threading.Lock()
+        # Cache stamp each map was loaded at; another worker's write moves the stamp on
+        self._membership_stamp = self._relations_stamp = None
+        self._stamp_local = threading.local()
+        # alliance_id -> latest messages, oldest first; filled on first read
+        self._chat_buffers: Dict[str, deque] = {}
+        self._chat_lock = threading.Lock()
+        self._expiry_thread = None
+        # Tables are created on first use or in the post-bind warm-up, not at import
+        # Game database holding the authoritative empire record (app.py sets it). When it is
+        # remote (Supabase), treasury transfers move empire resources through its update path
+        self.game_db = None
+        self._schema_ready = False
+        # The military trigger needs the empires table, which the game database creates
+        self._power_trigger_ready = False
+        self._schema_lock = threading.Lock()
+    
+    def ensure_schema(self):
+        """Create the alliance tables once, and the empires trigger as soon as it can exist"""
+        with self._schema_lock:
+            if not self._schema_ready:
+                self.init_alliance_db()
+                self._schema_ready = True
+            if not self._power_trigger_ready:
+                self._ensure_power_trigger()
+    
+    def _ensure_power_trigger(self):
+        conn = sqlite3.connect('empire_game.db')
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'empires'")
+            if cursor.fetchone() is None:
+                return  # Checked again on the next call
+            if self._create_aggregate_triggers(cursor):
+                self._refresh_aggregates(cursor)  # Military changes made before the trigger existed were missed
+            conn.commit()
+            self._power_trigger_ready = True
+        finally:
+            conn.close()
+    
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        """Open the game database, creating the alliance tables on first use"""
+        if not (self._schema_ready and self._power_trigger_ready):
+            self.ensure_schema()
+        return sqlite3.connect('empire_game.db', **kwargs)
     
     def init_alliance_db(self):
         """Initialize alliance database tables"""
@@ -102,10 +180,23 @@ class AllianceDatabase:
                 treasury_food INTEGER DEFAULT 0,
                 treasury_iron INTEGER DEFAULT 0,
                 treasury_oil INTEGER DEFAULT 0,
+                member_count INTEGER DEFAULT 0,
+                total_power REAL DEFAULT 0,
                 FOREIGN KEY (leader_id) REFERENCES empires (id)
             )
         ''')
         
+        # Stored aggregates (migration for existing databases)
+        needs_backfill = False
+        for column, definition in (('member_count', 'INTEGER DEFAULT 0'), ('total_power', 'REAL DEFAULT 0')):
+            try:
+                cursor.execute(f'ALTER TABLE alliances ADD COLUMN {column} {definition}')
+                needs_backfill = True
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+        
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alliances_total_power ON alliances(total_power DESC)')
+        
         # Alliance members table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS alliance_members (
@@ -124,6 +215,11 @@ class AllianceDatabase:
             )
         ''')
         
+        if self._create_aggregate_triggers(cursor):
+            needs_backfill = True  # Military changes made before the trigger existed were missed
+        if needs_backfill:
+            self._refresh_aggregates(cursor)
+        
         # Alliance invites table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS alliance_invites (
@@ -141,6 +237,30 @@ class AllianceDatabase:
             )
         ''')
         
+        # Invite listing and the expiry job
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_alliance_invites_empire_pending
+            ON alliance_invites(empire_id, status, expires_at)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_alliance_invites_status_expires
+            ON alliance_invites(status, expires_at)
+        ''')
+        
+        # At most one pending invite per alliance/empire pair; retire older duplicates first
+        cursor.execute('''
+            UPDATE alliance_invites SET status = 'expired'
+            WHERE status = 'pending' AND rowid NOT IN (
+                SELECT MAX(rowid) FROM alliance_invites
+                WHERE status = 'pending'
+                GROUP BY alliance_id, empire_id
+            )
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_alliance_invites_pending_unique
+            ON alliance_invites(alliance_id, empire_id) WHERE status = 'pending'
+        ''')
+        
         # Alliance relations table (for diplomacy between alliances)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS alliance_relations (
@@ -171,13 +291,175 @@ class AllianceDatabase:
             )
         ''')
         
+        # Treasury ledger: two rows per resource moved, one per side, summing to zero
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alliance_treasury_ledger (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transfer_id TEXT NOT NULL,
+                alliance_id TEXT NOT NULL,
+                account TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                resource TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                FOREIGN KEY (alliance_id) REFERENCES alliances (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_treasury_ledger_alliance
+            ON alliance_treasury_ledger(alliance_id, account, id)
+        ''')
+        
+        # Treasury balance as of a ledger entry, so balances only sum the tail
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alliance_treasury_checkpoints (
+                alliance_id TEXT NOT NULL,
+                resource TEXT NOT NULL,
+                balance INTEGER NOT NULL,
+                ledger_id INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (alliance_id, resource),
+                FOREIGN KEY (alliance_id) REFERENCES alliances (id)
+            )
+        ''')
+        
+        # Opening balances for treasuries funded before the ledger existed
+        for resource in TREASURY_RESOURCES:
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO alliance_treasury_checkpoints (alliance_id, resource, balance, ledger_id, created_at)
+                SELECT id, ?, treasury_{resource},
+                       (SELECT COALESCE(MAX(id), 0) FROM alliance_treasury_ledger), ?
+                FROM alliances
+            ''', (resource, datetime.now().isoformat()))
+        
+        # Keyset pagination for chat history walks this index backwards
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_alliance_messages_alliance_created
+            ON alliance_messages(alliance_id, created_at, id)
+        ''')
+        
+        self._create_cache_stamp_triggers(cursor)
+        
         conn.commit()
         conn.close()
     
+    def _create_cache_stamp_triggers(self, cursor):
+        """Count changes to the tables behind the membership and relations caches"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alliance_cache_stamps (
+                cache TEXT PRIMARY KEY,
+                stamp INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        for cache, tables in CACHE_STAMP_TABLES.items():
+            cursor.execute('INSERT OR IGNORE INTO alliance_cache_stamps (cache, stamp) VALUES (?, 0)', (cache,))
+            for table, events in tables.items():
+                for event in events:
+                    name = f"trg_cache_{cache}_{table}_{event.split()[0].lower()}"
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {name}')  # Picks up narrowed column lists
+                    cursor.execute(f'''
+                        CREATE TRIGGER {name}
+                        AFTER {event} ON {table}
+                        BEGIN
+                            UPDATE alliance_cache_stamps SET stamp = stamp + 1 WHERE cache = '{cache}';
+                        END
+                    ''')
+    
+    def _stamp_connection(self) -> sqlite3.Connection:
+        """Per-thread connection for the cheap freshness checks made before each cache hit"""
+        conn = getattr(self._stamp_local, 'conn', None)
+        if conn is None:
+            conn = self._stamp_local.conn = self._connect()
+        return conn
+    
+    def _cache_stamp(self, cache: str) -> Optional[int]:
+        """Change counter of a cache's tables as stored in the database"""
+        row = self._stamp_connection().execute(
+            'SELECT stamp FROM alliance_cache_stamps WHERE cache = ?', (cache,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def _create_aggregate_triggers(self, cursor) -> bool:
+        """Keep alliances.member_count and alliances.total_power in step with their inputs.
+        Returns True when the empires trigger was newly created."""
+        member_power = f'(SELECT {military_power_sql("military")} FROM empires WHERE id = {{row}}.empire_id)'
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_alliance_member_joined
+            AFTER INSERT ON alliance_members
+            BEGIN
+                UPDATE alliances SET
+                    member_count = member_count + 1,
+                    total_power = total_power + COALESCE({member_power.format(row='NEW')}, 0)
+                WHERE id = NEW.alliance_id;
+            END
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_alliance_member_left
+            AFTER DELETE ON alliance_members
+            BEGIN
+                UPDATE alliances SET
+                    member_count = member_count - 1,
+                    total_power = total_power - COALESCE({member_power.format(row='OLD')}, 0)
+                WHERE id = OLD.alliance_id;
+            END
+        ''')
+        
+        # Military changes go through GameDatabase.update_empire, which owns the empires table
+        cursor.execute('''
+            SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_alliance_power_military_changed'
+        ''')
+        if cursor.fetchone():
+            return False
+        
+        try:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_alliance_power_military_changed
+                AFTER UPDATE OF military ON empires
+                WHEN NEW.military IS NOT OLD.military
+                BEGIN
+                    UPDATE alliances SET
+                        total_power = total_power + ({military_power_sql("NEW.military")})
+                                                  - ({military_power_sql("OLD.military")})
+                    WHERE id = (SELECT alliance_id FROM alliance_members WHERE empire_id = NEW.id);
+                END
+            ''')
+            return True
+        except sqlite3.OperationalError:
+            print("⚠️ Empires table not created yet, alliance power trigger will be added once it exists")
+            return False
+    
+    def _refresh_aggregates(self, cursor):
+        """Recompute stored alliance aggregates from members and empires"""
+        cursor.execute(f'''
+            UPDATE alliances SET
+                member_count = (
+                    SELECT COUNT(*) FROM alliance_members am WHERE am.alliance_id = alliances.id
+                ),
+                total_power = (
+                    SELECT COALESCE(SUM({military_power_sql("e.military")}), 0)
+                    FROM alliance_members am
+                    JOIN empires e ON am.empire_id = e.id
+                    WHERE am.alliance_id = alliances.id
+                )
+        ''')
+    
+    def refresh_alliance_aggregates(self):
+        """Rebuild member counts and total power for every alliance"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        try:
+            self._refresh_aggregates(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+    
     def create_alliance(self, name: str, tag: str, description: str, leader_id: str, 
                        color: str = "#007bff") -> Optional[str]:
         """Create a new alliance"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -206,6 +488,7 @@ class AllianceDatabase:
             
             conn.commit()
             conn.close()
+            self.invalidate_membership_cache()
             return alliance_id
             
         except sqlite3.IntegrityError:
@@ -214,17 +497,11 @@ class AllianceDatabase:
     
     def get_alliance(self, alliance_id: str) -> Optional[Alliance]:
         """Get alliance by ID"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT a.*, COUNT(am.empire_id) as member_count,
-                   COALESCE(SUM(e.military_power), 0) as total_power
-            FROM alliances a
-            LEFT JOIN alliance_members am ON a.id = am.alliance_id
-            LEFT JOIN empires e ON am.empire_id = e.id
-            WHERE a.id = ?
-            GROUP BY a.id
+        cursor.execute(f'''
+            SELECT {ALLIANCE_COLUMNS} FROM alliances WHERE id = ?
         ''', (alliance_id,))
         
         row = cursor.fetchone()
@@ -237,13 +514,13 @@ class AllianceDatabase:
                 min_power_requirement=row[7], alliance_color=row[8],
                 treasury_gold=row[9], treasury_food=row[10],
                 treasury_iron=row[11], treasury_oil=row[12],
-                member_count=row[13], total_power=row[14]
+                member_count=row[13], total_power=int(row[14] or 0)
             )
         return None
     
     def get_alliance_by_name(self, name: str) -> Optional[Alliance]:
         """Get alliance by name"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT id FROM alliances WHERE name = ?', (name,))
@@ -256,7 +533,7 @@ class AllianceDatabase:
     
     def get_alliance_by_tag(self, tag: str) -> Optional[Alliance]:
         """Get alliance by tag"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT id FROM alliances WHERE tag = ?', (tag,))
@@ -269,27 +546,195 @@ class AllianceDatabase:
     
     def get_empire_alliance(self, empire_id: str) -> Optional[Alliance]:
         """Get the alliance that an empire belongs to"""
-        conn = sqlite3.connect('empire_game.db')
+        membership = self._get_membership_map().get(empire_id)
+        if membership:
+            return self.get_alliance(membership['alliance_id'])
+        return None
+    
+    def get_empire_alliance_tags(self, empire_ids: List[str]) -> Dict[str, Dict[str, str]]:
+        """Map empire ids to {'alliance_id', 'tag', 'color'}; empires without an alliance are omitted"""
+        membership = self._get_membership_map()
+        return {empire_id: membership[empire_id] for empire_id in empire_ids if empire_id in membership}
+    
+    def _get_membership_map(self) -> Dict[str, Dict[str, str]]:
+        """Load every empire's alliance affiliation in one query, cached until membership changes
+        in any worker"""
+        stamp = self._cache_stamp('membership')
+        membership = self._membership
+        if membership is not None and self._membership_stamp == stamp:
+            CACHE_REQUESTS.inc(cache='alliance_membership', result='hit')
+            return membership
+        
+        with self._membership_lock:
+            if self._membership is None or self._membership_stamp != stamp:
+                CACHE_REQUESTS.inc(cache='alliance_membership', result='miss')
+                conn = self._connect()
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT am.empire_id, a.id, a.tag, a.alliance_color
+                    FROM alliance_members am
+                    JOIN alliances a ON am.alliance_id = a.id
+                ''')
+                self._membership = {
+                    row[0]: {'alliance_id': row[1], 'tag': row[2], 'color': row[3]}
+                    for row in cursor.fetchall()
+                }
+                self._membership_stamp = stamp
+                conn.close()
+            return self._membership
+    
+    def invalidate_membership_cache(self):
+        """Drop the cached membership map; the next lookup reloads it"""
+        with self._membership_lock:
+            self._membership = None
+    
+    def set_alliance_relation(self, alliance1_id: str, alliance2_id: str, relation_type: AllianceRelationType,
+                              created_by: str, duration_hours: Optional[int] = None) -> bool:
+        """Set the diplomatic relation between two alliances (NEUTRAL clears it)"""
+        if alliance1_id == alliance2_id:
+            return False
+        
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT alliance_id FROM alliance_members WHERE empire_id = ?
-        ''', (empire_id,))
+        try:
+            # Relations are symmetric; drop either stored direction before writing
+            cursor.execute('''
+                DELETE FROM alliance_relations
+                WHERE (alliance1_id = ? AND alliance2_id = ?) OR (alliance1_id = ? AND alliance2_id = ?)
+            ''', (alliance1_id, alliance2_id, alliance2_id, alliance1_id))
+            
+            if relation_type != AllianceRelationType.NEUTRAL:
+                expires_at = None
+                if duration_hours:
+                    expires_at = (datetime.now() + timedelta(hours=duration_hours)).isoformat()
+                
+                cursor.execute('''
+                    INSERT INTO alliance_relations (alliance1_id, alliance2_id, relation_type,
+                                                    created_at, created_by, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (alliance1_id, alliance2_id, relation_type.value,
+                      datetime.now().isoformat(), created_by, expires_at))
+            
+            conn.commit()
+            conn.close()
+            self.invalidate_relations_cache()
+            return True
+            
+        except sqlite3.Error:
+            conn.close()
+            return False
+    
+    def get_alliance_relation(self, alliance1_id: str, alliance2_id: str) -> AllianceRelationType:
+        """Current relation between two alliances; expired relations read as NEUTRAL"""
+        if alliance1_id == alliance2_id:
+            return AllianceRelationType.ALLIED
         
-        row = cursor.fetchone()
-        conn.close()
+        edge = self._get_relation_graph().get(alliance1_id, {}).get(alliance2_id)
+        if not edge:
+            return AllianceRelationType.NEUTRAL
         
-        if row:
-            return self.get_alliance(row[0])
-        return None
+        relation_type, expires_at = edge
+        if expires_at and datetime.now() >= expires_at:
+            return AllianceRelationType.NEUTRAL
+        return relation_type
+    
+    def get_empire_relation(self, empire1_id: str, empire2_id: str) -> AllianceRelationType:
+        """Relation between two empires through their alliances"""
+        membership = self._get_membership_map()
+        alliance1 = membership.get(empire1_id)
+        alliance2 = membership.get(empire2_id)
+        if not alliance1 or not alliance2:
+            return AllianceRelationType.NEUTRAL
+        return self.get_alliance_relation(alliance1['alliance_id'], alliance2['alliance_id'])
+    
+    def can_attack(self, attacker_id: str, defender_id: str) -> bool:
+        """Alliance mates and NAP partners may not attack each other"""
+        return self.get_empire_relation(attacker_id, defender_id) not in (
+            AllianceRelationType.ALLIED, AllianceRelationType.NAP
+        )
+    
+    def get_hostile_empires(self, empire_id: str) -> Set[str]:
+        """All empires whose alliance is at war with this empire's alliance"""
+        return self.get_attack_stances(empire_id)[1]
+    
+    def get_attack_stances(self, empire_id: str) -> Tuple[Set[str], Set[str]]:
+        """(protected, hostile) empires for one attacker, from a single read of each cache.
+        
+        Protected empires are the ones can_attack refuses (alliance mates, allied and NAP
+        alliances); hostile ones are at war with the attacker's alliance. Callers that check
+        many targets use this instead of calling can_attack per target.
+        """
+        membership = self._get_membership_map()
+        own = membership.get(empire_id)
+        if not own:
+            return set(), set()
+        
+        now = datetime.now()
+        protected_alliances = {own['alliance_id']}
+        enemies = set()
+        for other_id, (relation_type, expires_at) in self._get_relation_graph().get(own['alliance_id'], {}).items():
+            if expires_at and now >= expires_at:
+                continue
+            if relation_type in (AllianceRelationType.ALLIED, AllianceRelationType.NAP):
+                protected_alliances.add(other_id)
+            elif relation_type == AllianceRelationType.WAR:
+                enemies.add(other_id)
+        
+        protected, hostile = set(), set()
+        for other_empire, info in membership.items():
+            if info['alliance_id'] in protected_alliances:
+                protected.add(other_empire)
+            elif info['alliance_id'] in enemies:
+                hostile.add(other_empire)
+        return protected, hostile
+    
+    def _get_relation_graph(self) -> Dict[str, Dict[str, Tuple[AllianceRelationType, Optional[datetime]]]]:
+        """Load alliance_relations into an adjacency map, cached until a relation changes in any worker"""
+        stamp = self._cache_stamp('relations')
+        relations = self._relations
+        if relations is not None and self._relations_stamp == stamp:
+            CACHE_REQUESTS.inc(cache='alliance_relations', result='hit')
+            return relations
+        
+        with self._relations_lock:
+            if self._relations is None or self._relations_stamp != stamp:
+                CACHE_REQUESTS.inc(cache='alliance_relations', result='miss')
+                conn = self._connect()
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT alliance1_id, alliance2_id, relation_type, expires_at
+                    FROM alliance_relations
+                    WHERE expires_at IS NULL OR expires_at > ?
+                ''', (datetime.now().isoformat(),))
+                
+                graph: Dict[str, Dict[str, Tuple[AllianceRelationType, Optional[datetime]]]] = {}
+                for alliance1_id, alliance2_id, relation_type, expires_at in cursor.fetchall():
+                    try:
+                        edge = (AllianceRelationType(relation_type),
+                                datetime.fromisoformat(expires_at) if expires_at else None)
+                    except ValueError:
+                        continue  # Unknown relation type or bad timestamp
+                    graph.setdefault(alliance1_id, {})[alliance2_id] = edge
+                    graph.setdefault(alliance2_id, {})[alliance1_id] = edge
+                
+                conn.close()
+                self._relations = graph
+                self._relations_stamp = stamp
+            return self._relations
+    
+    def invalidate_relations_cache(self):
+        """Drop the cached diplomacy graph; the next lookup reloads it"""
+        with self._relations_lock:
+            self._relations = None
     
     def get_alliance_members(self, alliance_id: str) -> List[Dict[str, Any]]:
         """Get all members of an alliance with their empire info"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT am.*, e.name, e.ruler, e.military_power, e.land_area
+        cursor.execute(f'''
+            SELECT am.*, e.name, e.ruler, {military_power_sql("e.military")}, e.land
             FROM alliance_members am
             JOIN empires e ON am.empire_id = e.id
             WHERE am.alliance_id = ?
@@ -316,7 +761,7 @@ class AllianceDatabase:
                 'last_active': row[8],
                 'empire_name': row[9],
                 'ruler_name': row[10],
-                'military_power': row[11],
+                'military_power': int(row[11] or 0),
                 'land_area': row[12]
             })
         
@@ -325,17 +770,12 @@ class AllianceDatabase:
     
     def get_all_alliances(self) -> List[Alliance]:
         """Get all alliances"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT a.*, COUNT(am.empire_id) as member_count,
-                   COALESCE(SUM(e.military_power), 0) as total_power
-            FROM alliances a
-            LEFT JOIN alliance_members am ON a.id = am.alliance_id
-            LEFT JOIN empires e ON am.empire_id = e.id
-            GROUP BY a.id
-            ORDER BY total_power DESC
+        # Served by idx_alliances_total_power
+        cursor.execute(f'''
+            SELECT {ALLIANCE_COLUMNS} FROM alliances ORDER BY total_power DESC
         ''')
         
         alliances = []
@@ -346,7 +786,7 @@ class AllianceDatabase:
                 min_power_requirement=row[7], alliance_color=row[8],
                 treasury_gold=row[9], treasury_food=row[10],
                 treasury_iron=row[11], treasury_oil=row[12],
-                member_count=row[13], total_power=row[14]
+                member_count=row[13], total_power=int(row[14] or 0)
             ))
         
         conn.close()
@@ -355,7 +795,7 @@ class AllianceDatabase:
     def invite_to_alliance(self, alliance_id: str, empire_id: str, invited_by: str, 
                           message: str = "") -> Optional[str]:
         """Send an alliance invitation"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -365,16 +805,15 @@ class AllianceDatabase:
                 conn.close()
                 return None  # Empire already in alliance
             
-            # Check if there's already a pending invite
+            now = datetime.now().isoformat()
+            
+            # A lapsed invite must not block a fresh one
             cursor.execute('''
-                SELECT id FROM alliance_invites 
-                WHERE alliance_id = ? AND empire_id = ? AND status = 'pending'
-            ''', (alliance_id, empire_id))
-            if cursor.fetchone():
-                conn.close()
-                return None  # Invite already exists
+                UPDATE alliance_invites SET status = 'expired'
+                WHERE alliance_id = ? AND empire_id = ? AND status = 'pending' AND expires_at <= ?
+            ''', (alliance_id, empire_id, now))
             
-            # Create invite
+            # Create invite; idx_alliance_invites_pending_unique rejects a duplicate pending invite
             invite_id = str(uuid.uuid4())
             expires_at = (datetime.now() + timedelta(days=7)).isoformat()
             
@@ -384,7 +823,7 @@ class AllianceDatabase:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 invite_id, alliance_id, empire_id, invited_by,
-                AllianceInviteStatus.PENDING.value, datetime.now().isoformat(),
+                AllianceInviteStatus.PENDING.value, now,
                 expires_at, message
             ))
             
@@ -398,7 +837,7 @@ class AllianceDatabase:
     
     def respond_to_invite(self, invite_id: str, accept: bool) -> bool:
         """Accept or decline an alliance invitation"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -443,6 +882,8 @@ class AllianceDatabase:
             
             conn.commit()
             conn.close()
+            if accept:
+                self.invalidate_membership_cache()
             return True
             
         except sqlite3.IntegrityError:
@@ -451,7 +892,7 @@ class AllianceDatabase:
     
     def leave_alliance(self, empire_id: str) -> bool:
         """Leave current alliance"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -471,6 +912,7 @@ class AllianceDatabase:
             
             conn.commit()
             conn.close()
+            self.invalidate_membership_cache()
             return True
             
         except sqlite3.Error:
@@ -479,7 +921,7 @@ class AllianceDatabase:
     
     def kick_member(self, alliance_id: str, empire_id: str, kicked_by: str) -> bool:
         """Kick a member from alliance"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -523,6 +965,7 @@ class AllianceDatabase:
             
             conn.commit()
             conn.close()
+            self.invalidate_membership_cache()
             return True
             
         except sqlite3.Error:
@@ -532,7 +975,7 @@ class AllianceDatabase:
     def promote_member(self, alliance_id: str, empire_id: str, promoted_by: str, 
                       new_role: AllianceRole) -> bool:
         """Promote/demote a member"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -563,42 +1006,419 @@ class AllianceDatabase:
     
     def contribute_to_treasury(self, alliance_id: str, empire_id: str, 
                              gold: int = 0, food: int = 0, iron: int = 0, oil: int = 0) -> bool:
-        """Contribute resources to alliance treasury"""
-        conn = sqlite3.connect('empire_game.db')
+        """Move resources from a member empire into the alliance treasury"""
+        amounts = {'gold': gold, 'food': food, 'iron': iron, 'oil': oil}
+        return self._treasury_transfer(alliance_id, empire_id, amounts, to_alliance=True)
+    
+    def withdraw_from_treasury(self, alliance_id: str, empire_id: str, withdrawn_by: str,
+                               gold: int = 0, food: int = 0, iron: int = 0, oil: int = 0) -> bool:
+        """Leader pays resources out of the treasury to a member empire"""
+        amounts = {'gold': gold, 'food': food, 'iron': iron, 'oil': oil}
+        return self._treasury_transfer(alliance_id, empire_id, amounts, to_alliance=False,
+                                       withdrawn_by=withdrawn_by)
+    
+    def _treasury_transfer(self, alliance_id: str, empire_id: str, amounts: Dict[str, int],
+                           to_alliance: bool, withdrawn_by: Optional[str] = None) -> bool:
+        """Move resources between a member empire and the treasury, recording both legs"""
+        amounts = {resource: int(amount) for resource, amount in amounts.items() if amount}
+        if not amounts or any(amount < 0 for amount in amounts.values()):
+            return False
+        if any(resource not in TREASURY_RESOURCES for resource in amounts):
+            return False
+        
+        if not (self.game_db is not None and getattr(self.game_db, 'use_supabase', False)):
+            # SQLite holds the empire record too: both sides move in one transaction
+            return self._apply_treasury_transfer(alliance_id, empire_id, amounts, to_alliance, withdrawn_by)
+        
+        # The empire record lives in Supabase, and full-row empire updates would overwrite an
+        # SQL edit of the SQLite copy. Debit first, credit second, and undo the debit if the
+        # credit fails
+        if to_alliance:
+            if not self._adjust_empire_resources(empire_id, {r: -a for r, a in amounts.items()}):
+                return False
+            if self._apply_treasury_transfer(alliance_id, empire_id, amounts, True, None, update_empire_row=False):
+                return True
+            if not self._adjust_empire_resources(empire_id, amounts):
+                print(f"❌ Treasury deposit to {alliance_id} failed and could not refund empire {empire_id}: {amounts}")
+            return False
+        
+        if not self._apply_treasury_transfer(alliance_id, empire_id, amounts, False, withdrawn_by,
+                                             update_empire_row=False):
+            return False
+        if self._adjust_empire_resources(empire_id, amounts):
+            return True
+        if not self._apply_treasury_transfer(alliance_id, empire_id, amounts, True, None,
+                                             update_empire_row=False, count_contribution=False):
+            print(f"❌ Treasury withdrawal from {alliance_id} failed and could not be returned: {amounts}")
+        return False
+    
+    def _adjust_empire_resources(self, empire_id: str, deltas: Dict[str, int]) -> bool:
+        """Apply resource deltas through the game database; refuses to go below zero"""
+        empire = self.game_db.get_empire(empire_id)
+        if not empire:
+            return False
+        if any(empire.resources.get(resource, 0) + delta < 0 for resource, delta in deltas.items()):
+            return False
+        for resource, delta in deltas.items():
+            empire.resources[resource] = empire.resources.get(resource, 0) + delta
+        return bool(self.game_db.update_empire(empire))
+    
+    def _apply_treasury_transfer(self, alliance_id: str, empire_id: str, amounts: Dict[str, int],
+                                 to_alliance: bool, withdrawn_by: Optional[str],
+                                 update_empire_row: bool = True, count_contribution: bool = True) -> bool:
+        """Debit one side and credit the other in a single write transaction, recording both legs.
+        With update_empire_row False the caller moves the empire's resources itself."""
+        # Autocommit mode so BEGIN IMMEDIATE takes the write lock before any balance is checked
+        conn = self._connect(timeout=30, isolation_level=None)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            
+            if withdrawn_by is not None:
+                # Checked inside the transaction so a demotion can't commit in between
+                cursor.execute('''
+                    SELECT role FROM alliance_members WHERE alliance_id = ? AND empire_id = ?
+                ''', (alliance_id, withdrawn_by))
+                role = cursor.fetchone()
+                if not role or role[0] != 'leader':
+                    cursor.execute('ROLLBACK')
+                    return False
+            
+            cursor.execute('''
+                SELECT 1 FROM alliance_members WHERE alliance_id = ? AND empire_id = ?
+            ''', (alliance_id, empire_id))
+            if not cursor.fetchone():
+                cursor.execute('ROLLBACK')
+                return False
+            
+            empire_delta = -1 if to_alliance else 1
+            if update_empire_row and not self._adjust_empire_row(cursor, empire_id, amounts, empire_delta):
+                cursor.execute('ROLLBACK')
+                return False  # Empire missing or can't afford it
+            
+            # Alliance side: the treasury columns are the running balance
+            assignments = ', '.join(f'treasury_{resource} = treasury_{resource} + ?' for resource in amounts)
+            params = [-empire_delta * amount for amount in amounts.values()]
+            params.append(alliance_id)
+            guard = ''
+            if not to_alliance:
+                guard = ''.join(f' AND treasury_{resource} >= ?' for resource in amounts)
+                params.extend(amounts.values())
+            
+            cursor.execute(f'UPDATE alliances SET {assignments} WHERE id = ?{guard}', params)
+            if cursor.rowcount != 1:
+                cursor.execute('ROLLBACK')
+                return False  # Treasury can't cover the withdrawal
+            
+            if to_alliance and count_contribution:
+                assignments = ', '.join(f'contribution_{resource} = contribution_{resource} + ?' for resource in amounts)
+                cursor.execute(f'''
+                    UPDATE alliance_members SET {assignments}
+                    WHERE alliance_id = ? AND empire_id = ?
+                ''', [*amounts.values(), alliance_id, empire_id])
+            
+            # Double entry: every resource moves as a balanced empire/alliance pair
+            transfer_id = str(uuid.uuid4())
+            now = datetime.now().isoformat()
+            entries = []
+            for resource, amount in amounts.items():
+                entries.append((transfer_id, alliance_id, 'empire', empire_id, resource, empire_delta * amount, now))
+                entries.append((transfer_id, alliance_id, 'alliance', alliance_id, resource, -empire_delta * amount, now))
+            cursor.executemany('''
+                INSERT INTO alliance_treasury_ledger (transfer_id, alliance_id, account, account_id,
+                                                      resource, amount, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', entries)
+            
+            self._maybe_checkpoint_treasury(cursor, alliance_id)
+            
+            cursor.execute('COMMIT')
+            return True
+            
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"⚠️ Treasury transfer failed: {e}")
+            return False
+        finally:
+            conn.close()
+    
+    def _adjust_empire_row(self, cursor, empire_id: str, amounts: Dict[str, int], empire_delta: int) -> bool:
+        """Adjust the SQLite empire's resources JSON in SQL, guarded so it never goes negative"""
+        resources_expr = 'resources'
+        params = []
+        for resource, amount in amounts.items():
+            resources_expr = (f"json_set({resources_expr}, '$.{resource}', "
+                              f"COALESCE(json_extract(resources, '$.{resource}'), 0) + ?)")
+            params.append(empire_delta * amount)
+        guard = ''
+        if empire_delta < 0:
+            guard = ''.join(f" AND COALESCE(json_extract(resources, '$.{resource}'), 0) >= ?" for resource in amounts)
+        params.append(empire_id)
+        if empire_delta < 0:
+            params.extend(amounts.values())
+        
+        cursor.execute(f'UPDATE empires SET resources = {resources_expr} WHERE id = ?{guard}', params)
+        return cursor.rowcount == 1
+    
+    def _ledger_balance(self, cursor, alliance_id: str) -> Tuple[Dict[str, int], int]:
+        """Treasury balance from the last checkpoint plus later ledger entries, and the last entry id"""
+        cursor.execute('''
+            SELECT resource, balance, ledger_id FROM alliance_treasury_checkpoints WHERE alliance_id = ?
+        ''', (alliance_id,))
+        balances = {resource: 0 for resource in TREASURY_RESOURCES}
+        since_id = 0
+        for resource, balance, ledger_id in cursor.fetchall():
+            balances[resource] = balance
+            since_id = ledger_id  # All resources are checkpointed together
+        
+        cursor.execute('''
+            SELECT resource, SUM(amount), MAX(id) FROM alliance_treasury_ledger
+            WHERE alliance_id = ? AND account = 'alliance' AND id > ?
+            GROUP BY resource
+        ''', (alliance_id, since_id))
+        last_id = since_id
+        for resource, total, max_id in cursor.fetchall():
+            balances[resource] = balances.get(resource, 0) + total
+            last_id = max(last_id, max_id)
+        
+        return balances, last_id
+    
+    def _maybe_checkpoint_treasury(self, cursor, alliance_id: str):
+        """Checkpoint once enough ledger entries have piled up since the last one"""
+        cursor.execute('''
+            SELECT COALESCE(MAX(ledger_id), 0) FROM alliance_treasury_checkpoints WHERE alliance_id = ?
+        ''', (alliance_id,))
+        since_id = cursor.fetchone()[0]
+        
+        cursor.execute('''
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM alliance_treasury_ledger
+                WHERE alliance_id = ? AND account = 'alliance' AND id > ?
+                LIMIT ?
+            )
+        ''', (alliance_id, since_id, TREASURY_CHECKPOINT_EVERY))
+        if cursor.fetchone()[0] >= TREASURY_CHECKPOINT_EVERY:
+            self._write_treasury_checkpoint(cursor, alliance_id)
+    
+    def _write_treasury_checkpoint(self, cursor, alliance_id: str):
+        balances, last_id = self._ledger_balance(cursor, alliance_id)
+        now = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO alliance_treasury_checkpoints (alliance_id, resource, balance, ledger_id, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(alliance_id, resource, balance, last_id, now) for resource, balance in balances.items()])
+    
+    def get_treasury_balance(self, alliance_id: str) -> Dict[str, int]:
+        """Treasury balance reconstructed from the ledger (checkpoint + tail)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        balances, _ = self._ledger_balance(cursor, alliance_id)
+        conn.close()
+        return balances
+    
+    def verify_treasury(self, alliance_id: str) -> bool:
+        """True when the ledger balance matches the alliance's treasury columns"""
+        alliance = self.get_alliance(alliance_id)
+        if not alliance:
+            return False
+        balances = self.get_treasury_balance(alliance_id)
+        return all(balances[resource] == getattr(alliance, f'treasury_{resource}') for resource in TREASURY_RESOURCES)
+    
+    def post_message(self, alliance_id: str, sender_id: str, message: str,
+                     is_announcement: bool = False) -> Optional[Dict[str, Any]]:
+        """Post a chat message or announcement; returns the stored message"""
+        message = (message or "").strip()
+        if not message or len(message) > 1000:
+            return None
+        
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
-            # Update alliance treasury
             cursor.execute('''
-                UPDATE alliances SET 
-                    treasury_gold = treasury_gold + ?,
-                    treasury_food = treasury_food + ?,
-                    treasury_iron = treasury_iron + ?,
-                    treasury_oil = treasury_oil + ?
-                WHERE id = ?
-            ''', (gold, food, iron, oil, alliance_id))
-            
-            # Update member contributions
+                SELECT am.role, e.name FROM alliance_members am
+                JOIN empires e ON am.empire_id = e.id
+                WHERE am.alliance_id = ? AND am.empire_id = ?
+            ''', (alliance_id, sender_id))
+            
+            sender = cursor.fetchone()
+            if not sender:
+                conn.close()
+                return None  # Only members can post
+            
+            # Only leaders and officers make announcements
+            if is_announcement and sender[0] not in ['leader', 'officer']:
+                conn.close()
+                return None
+            
+            entry = {
+                'id': str(uuid.uuid4()),
+                'alliance_id': alliance_id,
+                'sender_id': sender_id,
+                'sender_name': sender[1],
+                'message': message,
+                'created_at': datetime.now().isoformat(),
+                'is_announcement': is_announcement
+            }
+            
             cursor.execute('''
-                UPDATE alliance_members SET
-                    contribution_gold = contribution_gold + ?,
-                    contribution_food = contribution_food + ?,
-                    contribution_iron = contribution_iron + ?,
-                    contribution_oil = contribution_oil + ?
-                WHERE alliance_id = ? AND empire_id = ?
-            ''', (gold, food, iron, oil, alliance_id, empire_id))
+                INSERT INTO alliance_messages (id, alliance_id, sender_id, message, created_at, is_announcement)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (entry['id'], alliance_id, sender_id, message, entry['created_at'], is_announcement))
             
             conn.commit()
             conn.close()
-            return True
+            
+            with self._chat_lock:
+                buffer = self._chat_buffers.get(alliance_id)
+                # A buffer loaded after our commit already holds this message
+                if buffer is not None and all(m['id'] != entry['id'] for m in buffer):
+                    buffer.append(entry)
+            return entry
             
         except sqlite3.Error:
             conn.close()
-            return False
+            return None
+    
+    def get_messages(self, alliance_id: str, before: Optional[str] = None,
+                     limit: int = 20) -> Dict[str, Any]:
+        """Newest-first page of alliance chat.
+        ``before`` is the ``next_cursor`` of the previous page; None starts at the newest message."""
+        limit = max(1, min(limit, 100))
+        
+        if before is None and limit <= CHAT_BUFFER_SIZE:
+            buffer = self._get_chat_buffer(alliance_id)
+            page = list(reversed(buffer))[:limit]
+            # A buffer that never filled holds the whole history
+            has_more = len(buffer) > limit or len(buffer) == CHAT_BUFFER_SIZE
+            return {
+                'messages': page,
+                'next_cursor': self._message_cursor(page[-1]) if has_more else None
+            }
+        
+        page = self._query_messages(alliance_id, before, limit + 1)
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            'messages': page,
+            'next_cursor': self._message_cursor(page[-1]) if has_more else None
+        }
+    
+    def _get_chat_buffer(self, alliance_id: str) -> deque:
+        """Ring buffer of an alliance's latest messages, loaded from the table on first use and
+        reloaded when another worker has posted since"""
+        latest = self._stamp_connection().execute('''
+            SELECT id FROM alliance_messages WHERE alliance_id = ?
+            ORDER BY created_at DESC, id DESC LIMIT 1
+        ''', (alliance_id,)).fetchone()
+        latest_id = latest[0] if latest else None
+        
+        with self._chat_lock:
+            buffer = self._chat_buffers.get(alliance_id)
+            if buffer is not None and (buffer[-1]['id'] if buffer else None) != latest_id:
+                buffer = None
+            CACHE_REQUESTS.inc(cache='alliance_chat', result='hit' if buffer is not None else 'miss')
+            if buffer is None:
+                latest = self._query_messages(alliance_id, None, CHAT_BUFFER_SIZE)
+                buffer = deque(reversed(latest), maxlen=CHAT_BUFFER_SIZE)
+                self._chat_buffers[alliance_id] = buffer
+            return buffer
+    
+    def _query_messages(self, alliance_id: str, before: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Keyset query on (alliance_id, created_at, id), newest first"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        if before:
+            before_created, _, before_id = before.partition('|')
+            cursor.execute('''
+                SELECT m.id, m.alliance_id, m.sender_id, e.name, m.message, m.created_at, m.is_announcement
+                FROM alliance_messages m
+                LEFT JOIN empires e ON m.sender_id = e.id
+                WHERE m.alliance_id = ? AND (m.created_at, m.id) < (?, ?)
+                ORDER BY m.created_at DESC, m.id DESC
+                LIMIT ?
+            ''', (alliance_id, before_created, before_id, limit))
+        else:
+            cursor.execute('''
+                SELECT m.id, m.alliance_id, m.sender_id, e.name, m.message, m.created_at, m.is_announcement
+                FROM alliance_messages m
+                LEFT JOIN empires e ON m.sender_id = e.id
+                WHERE m.alliance_id = ?
+                ORDER BY m.created_at DESC, m.id DESC
+                LIMIT ?
+            ''', (alliance_id, limit))
+        
+        messages = []
+        for row in cursor.fetchall():
+            messages.append({
+                'id': row[0],
+                'alliance_id': row[1],
+                'sender_id': row[2],
+                'sender_name': row[3],
+                'message': row[4],
+                'created_at': row[5],
+                'is_announcement': bool(row[6])
+            })
+        
+        conn.close()
+        return messages
+    
+    @staticmethod
+    def _message_cursor(message: Dict[str, Any]) -> str:
+        return f"{message['created_at']}|{message['id']}"
+    
+    def expire_invites(self, batch_size: int = INVITE_EXPIRY_BATCH) -> int:
+        """Mark lapsed pending invites as expired in short batches; returns how many were expired"""
+        now = datetime.now().isoformat()
+        total = 0
+        
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        try:
+            while True:
+                cursor.execute('''
+                    UPDATE alliance_invites SET status = 'expired'
+                    WHERE rowid IN (
+                        SELECT rowid FROM alliance_invites
+                        WHERE status = 'pending' AND expires_at <= ?
+                        LIMIT ?
+                    )
+                ''', (now, batch_size))
+                expired = cursor.rowcount
+                conn.commit()  # Release the write lock between batches
+                total += expired
+                if expired < batch_size:
+                    break
+        except sqlite3.Error as e:
+            print(f"⚠️ Invite expiry failed: {e}")
+        finally:
+            conn.close()
+        
+        return total
+    
+    def start_invite_expiry(self, interval_seconds: int = 300, should_run: Optional[Callable[[], bool]] = None):
+        """Expire lapsed invites periodically on a background thread, while ``should_run`` allows"""
+        if self._expiry_thread and self._expiry_thread.is_alive():
+            return
+        
+        def expiry_loop():
+            while True:
+                if should_run is None or should_run():
+                    expired = self.expire_invites()
+                    if expired:
+                        print(f"📨 Expired {expired} alliance invites")
+                time.sleep(interval_seconds)
+        
+        self._expiry_thread = threading.Thread(target=expiry_loop, daemon=True)
+        self._expiry_thread.start()
     
     def get_empire_invites(self, empire_id: str) -> List[Dict[str, Any]]:
         """Get pending invites for an empire"""
-        conn = sqlite3.connect('empire_game.db')
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -4,7 +4,7 @@ A comprehensive web-based empire building strategy game
 Version: 2.0.1 - Template fixes applied (all world_map references removed)
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, flash, send_from_directory
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
 import time
@@ -17,8 +17,23 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 
 # Import our models and game logic
-from models_supabase import supabase_db as GameDatabase, Empire, supabase_battle_system as BattleSystem, UNIT_COSTS, UNIT_STATS, BUILDING_TYPES
+from models_supabase import (
+    supabase_db as GameDatabase, Empire, supabase_battle_system as BattleSystem,
+    UNIT_COSTS, UNIT_STATS, BUILDING_TYPES, CITY_COSTS, CITY_STATS, LAND_COST_PER_ACRE
+)
+from models import apply_resource_tick, apply_unit_training, building_production
 from ai_system import ai_manager, create_ai_empires, initialize_ai_system
+from alliance_system import alliance_db, AllianceRelationType
+from socket_queue import socketio_queue_options
+from leader_election import LeaderElector, leader_lock_from_env
+import metrics
+from query_trace import query_tracer
+from profiler import profiler
+import http_cache
+from http_cache import StaticJSON, empire_etag, etag_matches, json_response, not_modified
+from wire_format import MSGPACK_AVAILABLE, packb
+import template_cache
+from readiness import readiness
 from auth_supabase import supabase_auth_db as auth_db, login_required, get_current_user, login_user, logout_user
 
 app = Flask(__name__)
@@ -30,16 +45,47 @@ import logging
 logging.basicConfig(level=logging.INFO)
 app.logger.setLevel(logging.INFO)
 
-socketio = SocketIO(app, cors_allowed_origins="*")
+# SOCKETIO_MESSAGE_QUEUE lets emits from one worker reach clients connected to the others
+socketio_options = socketio_queue_options()
+socketio = SocketIO(app, cors_allowed_origins="*", **socketio_options)
+# Exactly one worker runs the tick, AI and maintenance jobs (see leader_election.py)
+leader_elector = LeaderElector(leader_lock_from_env())
+_background_jobs_started = False
+_background_jobs_lock = threading.Lock()  # on_elected runs on its own thread
 
 # Global game state with Supabase
 db = GameDatabase
 battle_system = BattleSystem
 active_battles = {}  # battle_id -> battle_data
-
-# Initialize Supabase connection
-print("🔗 Initializing Supabase connection...")
-db.initialize()
+# Treasury transfers move empire resources through the game database's update path
+alliance_db.game_db = db
+
+# Time every database call (empire_db_call_duration_seconds)
+metrics.instrument_database(db, 'game')
+metrics.instrument_database(auth_db, 'auth')
+metrics.instrument_database(alliance_db, 'alliance')
+# Count each request's database calls and report routes over their query budget
+query_tracer.init_app(app)
+# Slow requests keep their stack samples while a profiler capture runs
+profiler.init_app(app)
+# Compress JSON and page responses above http_cache.COMPRESS_MIN_SIZE
+http_cache.init_app(app)
+
+# Backends connect on first use; the warm-up started by initialize_game() usually gets there first
+readiness.add('game_db', db.initialize)
+readiness.add('auth_db', auth_db.connect)
+readiness.add('alliance_db', alliance_db.ensure_schema)
+readiness.add('templates', lambda: [app.jinja_env.get_template(name) for name in app.jinja_env.list_templates()])
+
+# Storage health, read at scrape time
+SUPABASE_BREAKER_OPEN = metrics.registry.gauge('empire_supabase_breaker_open', 'Supabase circuit breaker is not closed')
+EVENT_SINK_QUEUED = metrics.registry.gauge('empire_event_sink_queued', 'Game log rows waiting to be written')
+EVENT_SINK_DROPPED = metrics.registry.gauge('empire_event_sink_dropped', 'Game log rows dropped under backpressure')
+if hasattr(db, 'breaker'):
+    SUPABASE_BREAKER_OPEN.set_function(lambda: db.breaker.state != db.breaker.CLOSED)
+if hasattr(db, 'event_sink'):
+    EVENT_SINK_QUEUED.set_function(lambda: db.event_sink._queue.qsize())
+    EVENT_SINK_DROPPED.set_function(lambda: db.event_sink.dropped)
 
 # Authentication Routes
 @app.route('/login', methods=['GET', 'POST'])
@@ -164,14 +210,7 @@ def dashboard():
     if not empire:
         return redirect(url_for('create_empire'))
     
-    # Get all empires for the map
-    all_empires = db.get_all_empires()
-    
-    return render_template('dashboard.html', 
-                         empire=asdict(empire), 
-                         all_empires=[asdict(e) for e in all_empires],
-                         unit_costs=UNIT_COSTS,
-                         unit_stats=UNIT_STATS)
+    return render_template('dashboard.html', empire=asdict(empire))
 
 @app.route('/create_empire', methods=['GET', 'POST'])
 @login_required
@@ -241,13 +280,8 @@ def military():
         return redirect(url_for('create_empire'))
     
     empire = db.get_empire(current_user.empire_id)
-    all_empires = db.get_all_empires()
     
-    return render_template('military.html', 
-                         empire=asdict(empire), 
-                         all_empires=[asdict(e) for e in all_empires],
-                         unit_costs=UNIT_COSTS,
-                         unit_stats=UNIT_STATS)
+    return render_template('military.html', empire=asdict(empire))
 
 @app.route('/cities')
 @login_required
@@ -265,34 +299,51 @@ def cities():
     
     empire = db.get_empire(current_user.empire_id)
     
-    # City costs and stats
-    CITY_COSTS = {
-        'small': 5000,
-        'medium': 15000,
-        'large': 40000
-    }
-    
-    CITY_STATS = {
-        'small': {'max_buildings': 15, 'defense_bonus': 0.1, 'production_bonus': 0.0},
-        'medium': {'max_buildings': 35, 'defense_bonus': 0.2, 'production_bonus': 0.1},
-        'large': {'max_buildings': 60, 'defense_bonus': 0.3, 'production_bonus': 0.2}
-    }
-    
-    LAND_COST_PER_ACRE = 100
-    
-    return render_template('cities.html', 
-                         empire=asdict(empire),
-                         city_costs=CITY_COSTS,
-                         city_stats=CITY_STATS,
-                         land_cost=LAND_COST_PER_ACRE,
-                         building_types=BUILDING_TYPES)
+    return render_template('cities.html', empire=asdict(empire))
+
+# Game rules catalog, built from the model constants and serialized and compressed once per process.
+# Pages load it from a URL carrying its content hash, so browsers cache it until the rules change.
+CATALOG = {
+    'unit_costs': UNIT_COSTS,
+    'unit_stats': UNIT_STATS,
+    'building_types': BUILDING_TYPES,
+    'city_costs': CITY_COSTS,
+    'city_stats': CITY_STATS,
+    'land_cost': LAND_COST_PER_ACRE
+}
+GAME_CATALOG = StaticJSON(CATALOG)
+
+# {% cache %} fragments are keyed by the catalog hash, so a rules change starts them fresh
+template_cache.init_app(app, GAME_CATALOG.etag)
+
+@app.context_processor
+def inject_catalog():
+    # Server-rendered fragments read the rules directly; page scripts fetch catalog_url
+    return dict(CATALOG, catalog_url=url_for('catalog_api', version=GAME_CATALOG.etag))
+
+@app.route('/api/catalog')
+@app.route('/api/config')
+def game_catalog_api():
+    return GAME_CATALOG.response()
+
+@app.route('/api/catalog/<version>')
+def catalog_api(version):
+    if version != GAME_CATALOG.etag:
+        # A page rendered before the rules changed; send it to the current catalog
+        return redirect(url_for('catalog_api', version=GAME_CATALOG.etag))
+    return GAME_CATALOG.response(immutable=True)
 
 @app.route('/api/empire/<empire_id>')
 def get_empire_api(empire_id):
     empire = db.get_empire(empire_id)
-    if empire:
-        return jsonify(asdict(empire))
-    return jsonify({'error': 'Empire not found'}), 404
+    if not empire:
+        return jsonify({'error': 'Empire not found'}), 404
+    
+    # Pollers revalidate with If-None-Match and get a bodiless 304 until the empire changes
+    etag = empire_etag(empire)
+    if etag_matches(etag):
+        return not_modified(etag)
+    return json_response(asdict(empire), etag=etag)
 
 @app.route('/api/train_units', methods=['POST'])
 @login_required
@@ -303,43 +354,44 @@ def train_units():
         return jsonify({'error': 'No empire found'}), 400
     
     empire = db.get_empire(current_user.empire_id)
-    data = request.json
+    before = empire_state(empire)
     
-    total_cost = {'gold': 0, 'iron': 0, 'oil': 0, 'food': 0}
+    if not apply_unit_training(empire, request.json):
+        return jsonify({'error': 'Insufficient resources'}), 400
     
-    # Calculate total cost
-    for unit_type, count in data.items():
-        if unit_type in UNIT_COSTS and count > 0:
-            for resource, cost in UNIT_COSTS[unit_type].items():
-                total_cost[resource] += cost * count
+    # Update military power (if method exists)
+    if hasattr(empire, 'update_military_power'):
+        empire.update_military_power()
     
-    # Check if empire has enough resources
-    if (empire.resources.get('gold', 0) >= total_cost['gold'] and 
-        empire.resources.get('iron', 0) >= total_cost['iron'] and 
-        empire.resources.get('oil', 0) >= total_cost['oil'] and 
-        empire.resources.get('food', 0) >= total_cost['food']):
-        
-        # Deduct resources
-        empire.resources['gold'] -= total_cost['gold']
-        empire.resources['iron'] -= total_cost['iron']
-        empire.resources['oil'] -= total_cost['oil']
-        empire.resources['food'] -= total_cost['food']
-        
-        # Add units
-        for unit_type, count in data.items():
-            if unit_type in UNIT_COSTS and count > 0:
-                empire.military[unit_type] = empire.military.get(unit_type, 0) + count
-        
-        # Update military power (if method exists)
-        if hasattr(empire, 'update_military_power'):
-            empire.update_military_power()
-        
-        # Save to database
-        db.update_empire(empire)
-        
-        return jsonify({'success': True, 'empire': asdict(empire)})
-    else:
-        return jsonify({'error': 'Insufficient resources'}), 400
+    # Save to database
+    db.update_empire(empire)
+    push_empire_delta(empire, before)
+    
+    return jsonify({'success': True, 'empire': asdict(empire)})
+
+def attack_error(attacker, defender, attacking_units: dict):
+    """Why ``attacker`` can't send ``attacking_units`` against ``defender``, or None if it can"""
+    if attacker.id == defender.id:
+        return 'Cannot attack yourself'
+    
+    relation = alliance_db.get_empire_relation(attacker.id, defender.id)
+    if relation == AllianceRelationType.ALLIED:
+        return 'Cannot attack an allied empire'
+    if relation == AllianceRelationType.NAP:
+        return 'Cannot attack an empire under a non-aggression pact'
+    
+    # Validate attacking units
+    total_attacking = sum(attacking_units.values())
+    if total_attacking == 0:
+        return 'Must send at least one unit'
+    
+    # Check if attacker has enough units
+    if (attacking_units.get('infantry', 0) > attacker.military.get('infantry', 0) or
+        attacking_units.get('tanks', 0) > attacker.military.get('tanks', 0) or
+        attacking_units.get('aircraft', 0) > attacker.military.get('aircraft', 0) or
+        attacking_units.get('ships', 0) > attacker.military.get('ships', 0)):
+        return 'Insufficient units'
+    return None
 
 @app.route('/api/attack', methods=['POST'])
 @login_required
@@ -362,28 +414,22 @@ def attack():
     if not defender:
         return jsonify({'error': 'Defender not found'}), 404
     
-    if attacker.id == defender.id:
-        return jsonify({'error': 'Cannot attack yourself'}), 400
+    error = attack_error(attacker, defender, attacking_units)
+    if error:
+        return jsonify({'error': error}), 400
     
-    # Validate attacking units
-    total_attacking = sum(attacking_units.values())
-    if total_attacking == 0:
-        return jsonify({'error': 'Must send at least one unit'}), 400
-    
-    # Check if attacker has enough units
-    if (attacking_units.get('infantry', 0) > attacker.military.get('infantry', 0) or
-        attacking_units.get('tanks', 0) > attacker.military.get('tanks', 0) or
-        attacking_units.get('aircraft', 0) > attacker.military.get('aircraft', 0) or
-        attacking_units.get('ships', 0) > attacker.military.get('ships', 0)):
-        return jsonify({'error': 'Insufficient units'}), 400
+    attacker_before = empire_state(attacker)
+    defender_before = empire_state(defender)
     
-    # Create battle system and execute battle
-    battle_system = BattleSystem()
-    result = battle_system.execute_battle(attacker, defender, attacking_units)
+    # BattleSystem is the shared supabase_battle_system instance, not a class
+    with metrics.BATTLE_DURATION.time(source='player'):
+        result = battle_system.execute_battle(attacker, defender, attacking_units)
     
     # Update empires in database
     db.update_empire(attacker)
     db.update_empire(defender)
+    push_empire_delta(attacker, attacker_before)
+    push_empire_delta(defender, defender_before)
     
     return jsonify(result)
 
@@ -404,7 +450,9 @@ def build_city():
     if not city_type or not city_name:
         return jsonify({'error': 'City type and name are required'}), 400
     
+    before = empire_state(empire)
     if db.build_city(empire, city_type, city_name):
+        push_empire_delta(empire, before)
         return jsonify({'success': True, 'empire': asdict(empire)})
     else:
         return jsonify({'error': 'Failed to build city (insufficient resources or land)'}), 400
@@ -426,7 +474,9 @@ def build_building():
     if not city_id or not building_type:
         return jsonify({'error': 'City ID and building type are required'}), 400
     
+    before = empire_state(empire)
     if db.build_building(empire, city_id, building_type):
+        push_empire_delta(empire, before)
         return jsonify({'success': True, 'empire': asdict(empire)})
     else:
         return jsonify({'error': 'Failed to build building (insufficient resources or space)'}), 400
@@ -447,11 +497,83 @@ def buy_land():
     if acres <= 0:
         return jsonify({'error': 'Invalid land amount'}), 400
     
+    before = empire_state(empire)
     if db.buy_land(empire, acres):
+        push_empire_delta(empire, before)
         return jsonify({'success': True, 'empire': asdict(empire)})
     else:
         return jsonify({'error': 'Insufficient gold'}), 400
 
+@app.route('/api/alliance/<alliance_id>/messages')
+@login_required
+def alliance_messages(alliance_id):
+    current_user = get_current_user()
+    membership = alliance_db.get_empire_alliance_tags([current_user.empire_id]).get(current_user.empire_id)
+    if not membership or membership['alliance_id'] != alliance_id:
+        return jsonify({'error': 'Not a member of this alliance'}), 403
+    
+    before = request.args.get('before')
+    limit = request.args.get('limit', 20, type=int)
+    return json_response(alliance_db.get_messages(alliance_id, before=before, limit=limit))
+
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: 503 until the post-bind warm-up has finished"""
+    status = readiness.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint; set METRICS_TOKEN to require a bearer token"""
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+def admin_authorized() -> bool:
+    """Admin endpoints are off unless ADMIN_TOKEN is set and sent as a bearer token"""
+    token = os.environ.get('ADMIN_TOKEN')
+    return bool(token) and request.headers.get('Authorization') == f'Bearer {token}'
+
+@app.route('/admin/profiler')
+def profiler_status():
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify(profiler.get_status())
+
+@app.route('/admin/profiler/start', methods=['POST'])
+def profiler_start():
+    """Start a capture; optional JSON {"duration": seconds, "interval": seconds}"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        duration = float(data['duration']) if data.get('duration') else None
+        interval = float(data['interval']) if data.get('interval') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'duration and interval must be numbers'}), 400
+    if interval is not None and interval < 0.001:
+        return jsonify({'error': 'interval must be at least 0.001 seconds'}), 400
+    return jsonify(profiler.start(duration=duration, interval=interval))
+
+@app.route('/admin/profiler/stop', methods=['POST'])
+def profiler_stop():
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify(profiler.stop())
+
+@app.route('/admin/profiler/captures/<path:filename>')
+def profiler_capture(filename):
+    """Download a collapsed-stack file for flamegraph.pl or speedscope"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    return send_from_directory(os.path.abspath(profiler.output_dir), filename, mimetype='text/plain')
+
 # Error handlers for JSON requests
 @app.errorhandler(500)
 def handle_internal_error(error):
@@ -471,89 +593,201 @@ def handle_bad_request(error):
         return jsonify({'error': 'Bad request'}), 400
     return render_template('error.html', error='Bad request'), 400
 
+# Live dashboard state: a snapshot on join, then only the fields that changed
+def empire_state(empire) -> dict:
+    """Fields the dashboard renders live"""
+    return {
+        'resources': dict(empire.resources),
+        'military': dict(empire.military),
+        'land': empire.land
+    }
+
+def push_empire_delta(empire, before: dict):
+    """Emit the fields that changed since ``before`` to the empire's room"""
+    after = empire_state(empire)
+    delta = {}
+    for key in ('resources', 'military'):
+        changed = {name: value for name, value in after[key].items() if before[key].get(name) != value}
+        if changed:
+            delta[key] = changed
+    if after['land'] != before['land']:
+        delta['land'] = after['land']
+    
+    if delta:
+        emit_to_room('empire_delta', delta, f'empire_{empire.id}')
+
+# Sockets that connected with ?format=msgpack get MessagePack payloads; they join a
+# parallel room per empire/alliance so JSON clients in the same room are unaffected
+MSGPACK_ROOM_SUFFIX = ':msgpack'
+_msgpack_clients = set()  # Socket ids on this worker
+
+def client_room(room: str) -> str:
+    """Room the current socket should join for ``room``, given its wire format"""
+    return room + MSGPACK_ROOM_SUFFIX if request.sid in _msgpack_clients else room
+
+# Server that room emits go to; asgi.py swaps in its async Socket.IO server
+room_emitter = socketio.emit
+# With a shared queue, MessagePack clients may be connected to another worker
+_msgpack_rooms_shared = bool(socketio_options) and MSGPACK_AVAILABLE
+
+def emit_to_room(event: str, data, room: str):
+    """Emit to both the JSON and the MessagePack members of a room.
+
+    Pushes are best effort: the action they report is already saved, so a failed emit
+    is logged instead of failing the request or the rest of the tick.
+    """
+    try:
+        room_emitter(event, data, room=room)
+        if _msgpack_clients or _msgpack_rooms_shared:
+            room_emitter(event, packb(data), room=room + MSGPACK_ROOM_SUFFIX)
+    except Exception as e:
+        metrics.BACKGROUND_ERRORS.inc(job='socket_emit')
+        print(f"⚠️  Emit {event} to {room} failed: {e}")
+
+def emit_to_client(event: str, data):
+    """Reply to the current socket in the format it asked for"""
+    emit(event, packb(data) if request.sid in _msgpack_clients else data)
+
 # Socket.IO events for real-time features
 @socketio.on('connect')
 def on_connect():
+    metrics.SOCKET_CONNECTIONS.inc()
+    if request.args.get('format') == 'msgpack' and MSGPACK_AVAILABLE:
+        _msgpack_clients.add(request.sid)
     print(f'Client connected: {request.sid}')
 
 @socketio.on('disconnect')
 def on_disconnect():
+    metrics.SOCKET_CONNECTIONS.dec()
+    _msgpack_clients.discard(request.sid)
     print(f'Client disconnected: {request.sid}')
 
 @socketio.on('join_empire')
 def on_join_empire(data):
     empire_id = data.get('empire_id')
     if empire_id:
-        join_room(f'empire_{empire_id}')
+        join_room(client_room(f'empire_{empire_id}'))
         print(f'Client {request.sid} joined empire room: {empire_id}')
+        
+        # Full state once; ticks and actions follow as deltas
+        empire = db.get_empire(empire_id)
+        if empire:
+            emit_to_client('empire_snapshot', empire_state(empire))
 
 @socketio.on('leave_empire')
 def on_leave_empire(data):
     empire_id = data.get('empire_id')
     if empire_id:
-        leave_room(f'empire_{empire_id}')
+        leave_room(client_room(f'empire_{empire_id}'))
         print(f'Client {request.sid} left empire room: {empire_id}')
 
+def _session_alliance_id():
+    """Alliance of the empire on this socket's session, from the in-memory membership map"""
+    empire_id = session.get('empire_id')
+    if not empire_id:
+        return None
+    membership = alliance_db.get_empire_alliance_tags([empire_id]).get(empire_id)
+    return membership['alliance_id'] if membership else None
+
+@socketio.on('join_alliance')
+def on_join_alliance(data):
+    alliance_id = _session_alliance_id()
+    if alliance_id and alliance_id == data.get('alliance_id'):
+        join_room(client_room(f'alliance_{alliance_id}'))
+        print(f'Client {request.sid} joined alliance room: {alliance_id}')
+
+@socketio.on('leave_alliance_room')
+def on_leave_alliance_room(data):
+    alliance_id = data.get('alliance_id')
+    if alliance_id:
+        leave_room(client_room(f'alliance_{alliance_id}'))
+
+@socketio.on('alliance_message')
+def on_alliance_message(data):
+    alliance_id = _session_alliance_id()
+    if not alliance_id:
+        emit('alliance_error', {'error': 'You are not in an alliance'})
+        return
+    
+    entry = alliance_db.post_message(alliance_id, session['empire_id'], data.get('message', ''),
+                                     is_announcement=bool(data.get('is_announcement')))
+    if entry:
+        emit_to_room('alliance_message', entry, f'alliance_{alliance_id}')
+    else:
+        emit('alliance_error', {'error': 'Message could not be sent'})
+
 def resource_generation_loop():
     """Background thread for resource generation"""
+    next_tick = time.monotonic()
     while True:
+        if not leader_elector.is_leader:
+            time.sleep(5)  # Lost the lease; wait to be re-elected
+            next_tick = time.monotonic()
+            continue
+        
+        # Ticks are scheduled every minute; lag is how late this one started
+        tick_started = time.monotonic()
+        lag = max(0.0, tick_started - next_tick)
+        metrics.TICK_LAG.set(lag)
+        if lag >= 60:
+            next_tick = tick_started  # Whole ticks were missed; restart the schedule rather than bunch them
+        
         try:
-            empires = db.get_all_empires()
+            with metrics.TICK_PHASE.time(phase='load'):
+                empires = db.get_all_empires()
+            metrics.TICK_EMPIRES.set(len(empires))
+            
+            compute_seconds = write_seconds = emit_seconds = 0.0
             for empire in empires:
-                # Store old resources for comparison (Supabase model uses resources dict)
-                old_resources = empire.resources.copy()
+                phase_started = time.perf_counter()
                 
-                # Base resource generation based on land and population
-                generation_rate = empire.land / 1000
-                empire.resources['gold'] += int(10 * generation_rate)
-                empire.resources['food'] += int(15 * generation_rate)
-                empire.resources['iron'] += int(5 * generation_rate)
-                empire.resources['oil'] += int(3 * generation_rate)
+                # Store old state for the delta push
+                before = empire_state(empire)
                 
-                # Building production bonus (if method exists)
-                try:
-                    building_production = db.calculate_building_production(empire)
-                    for resource, amount in building_production.items():
-                        empire.resources[resource] += amount
-                except AttributeError:
-                    # Fallback: basic building production
-                    for building_type, count in empire.buildings.items():
-                        if building_type in BUILDING_TYPES and count > 0:
-                            production = BUILDING_TYPES[building_type].get('production', {})
-                            for resource, amount in production.items():
-                                empire.resources[resource] += amount * count
+                # Land, building (with each city's production bonus) and population growth
+                apply_resource_tick(empire, building_production(empire))
+                compute_done = time.perf_counter()
+                compute_seconds += compute_done - phase_started
                 
-                # Population growth
-                growth_rate = 0.01
-                empire.resources['population'] += int(empire.resources['population'] * growth_rate)
+                # A tick that outlives the lease must not write alongside the new leader
+                if not leader_elector.is_leader:
+                    print("⚠️ Lost leadership mid-tick, leaving the rest to the new leader")
+                    break
                 
                 # Update empire in database
                 db.update_empire(empire)
+                write_done = time.perf_counter()
+                write_seconds += write_done - compute_done
                 
-                # Check if resources changed significantly
-                resource_changed = (
-                    abs(empire.resources['gold'] - old_resources['gold']) > 10 or
-                    abs(empire.resources['food'] - old_resources['food']) > 10 or
-                    abs(empire.resources['iron'] - old_resources['iron']) > 5 or
-                    abs(empire.resources['oil'] - old_resources['oil']) > 5 or
-                    abs(empire.resources['population'] - old_resources['population']) > 5
-                )
-                
-                if resource_changed:
-                    # Emit update to empire room
-                    socketio.emit('empire_update', asdict(empire), room=f'empire_{empire.id}')
+                # Push what this tick changed to the empire room
+                push_empire_delta(empire, before)
+                emit_seconds += time.perf_counter() - write_done
+            
+            metrics.TICK_PHASE.observe(compute_seconds, phase='compute')
+            metrics.TICK_PHASE.observe(write_seconds, phase='write')
+            metrics.TICK_PHASE.observe(emit_seconds, phase='emit')
             
             # Note: AI actions are handled by the AI manager's own background thread
             
         except Exception as e:
+            metrics.BACKGROUND_ERRORS.inc(job='resource_tick')
             print(f"Error in resource generation: {e}")
         
-        time.sleep(60)  # Run every minute
+        metrics.TICK_DURATION.observe(time.monotonic() - tick_started)
+        
+        # Run every minute on a fixed schedule
+        next_tick += 60
+        time.sleep(max(0.0, next_tick - time.monotonic()))
 
 # Initialize AI system and start background threads
-def initialize_game():
-    """Initialize the game systems"""
-    print("🎮 Initializing Empire Builder...")
+def start_background_jobs():
+    """Game tick, AI and maintenance jobs; only the elected worker runs these.
+    Threads start on first election and pause themselves whenever this worker is not leader."""
+    global _background_jobs_started
+    with _background_jobs_lock:
+        if _background_jobs_started:
+            return
+        _background_jobs_started = True
     
     # Create AI empires if none exist
     all_empires = db.get_all_empires()
@@ -563,12 +797,30 @@ def initialize_game():
         print("🤖 Creating AI empires...")
         create_ai_empires(db, count=5)
     
-    # Initialize AI system
+    # Initialize AI system (AI targeting respects alliances and NAPs)
+    ai_manager.diplomacy = alliance_db
+    ai_manager.should_run = lambda: leader_elector.is_leader
     initialize_ai_system()
     
+    # Retire lapsed alliance invites in the background
+    alliance_db.start_invite_expiry(should_run=lambda: leader_elector.is_leader)
+    
     # Start background resource generation
-    resource_thread = threading.Thread(target=resource_generation_loop, daemon=True)
+    resource_thread = threading.Thread(target=resource_generation_loop, daemon=True, name='resource-tick')
     resource_thread.start()
+
+def initialize_game():
+    """Initialize the game systems"""
+    print("🎮 Initializing Empire Builder...")
+    
+    if os.environ.get('PROFILER_AUTOSTART') == '1':
+        profiler.start()
+    
+    # Connect backends and compile templates off the request path; /readyz reports when done
+    readiness.warm_up()
+    
+    # Every worker serves requests; one of them also runs the background jobs
+    leader_elector.start(on_elected=start_background_jobs)
     
     print("✅ Empire Builder initialized successfully!")
 
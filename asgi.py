@@ -0,0 +1,434 @@
+"""
+ASGI entry point for Empire Builder
+Async serving mode: the core game API and Socket.IO run on an asyncio event loop, so a slow
+Supabase call waits on a coroutine instead of holding a thread. Every other route is the
+regular Flask app, run on a thread pool.
+
+    uvicorn asgi:application --host 0.0.0.0 --port $PORT
+
+Settings:
+    ASGI_WSGI_THREADS   - threads serving the Flask routes (default 32)
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from functools import wraps
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs
+
+import socketio
+from flask import jsonify, redirect, request, session, url_for
+from werkzeug.exceptions import HTTPException
+
+import app as game
+import metrics
+from async_db import AsyncGameDatabase
+from auth_supabase import get_current_user
+from http_cache import empire_etag, etag_matches, json_response, not_modified
+from models import apply_build_building, apply_build_city, apply_buy_land, apply_unit_training
+from socket_queue import async_client_manager
+from wire_format import MSGPACK_AVAILABLE, packb
+
+flask_app = game.app
+adb = AsyncGameDatabase(game.db)
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*',
+                           client_manager=async_client_manager())
+wsgi_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ASGI_WSGI_THREADS', 32)),
+                                   thread_name_prefix='wsgi')
+
+# Flask endpoint -> coroutine that serves it in async mode
+async_views: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+
+def async_view(endpoint: str):
+    """Serve the Flask route named ``endpoint`` with this coroutine"""
+    def decorator(view):
+        async_views[endpoint] = view
+        return view
+    return decorator
+
+
+def async_login_required(view):
+    """login_required for coroutines"""
+    @wraps(view)
+    async def decorated(*args, **kwargs):
+        if 'user_id' not in session:
+            if request.is_json:
+                return jsonify({'error': 'Authentication required'}), 401
+            return redirect(url_for('login'))
+        return await view(*args, **kwargs)
+    return decorated
+
+
+async def _current_empire():
+    """(empire, None) for the logged-in user, or (None, error response)"""
+    current_user = await asyncio.to_thread(get_current_user)
+    if not current_user or not current_user.empire_id:
+        return None, (jsonify({'error': 'No empire found'}), 400)
+    return await adb.get_empire(current_user.empire_id), None
+
+
+# Core game API; same URLs, checks and responses as the Flask views in app.py
+@async_view('get_empire_api')
+async def get_empire_api(empire_id):
+    empire = await adb.get_empire(empire_id)
+    if not empire:
+        return jsonify({'error': 'Empire not found'}), 404
+
+    etag = empire_etag(empire)
+    if etag_matches(etag):
+        return not_modified(etag)
+    return json_response(asdict(empire), etag=etag)
+
+
+@async_view('train_units')
+@async_login_required
+async def train_units():
+    empire, error = await _current_empire()
+    if error:
+        return error
+
+    before = game.empire_state(empire)
+    if not apply_unit_training(empire, request.json):
+        return jsonify({'error': 'Insufficient resources'}), 400
+
+    # Same as the sync route: empire models that store their power recompute it here
+    if hasattr(empire, 'update_military_power'):
+        empire.update_military_power()
+
+    await adb.update_empire(empire)
+    game.push_empire_delta(empire, before)
+    return jsonify({'success': True, 'empire': asdict(empire)})
+
+
+@async_view('attack')
+@async_login_required
+async def attack():
+    attacker, error = await _current_empire()
+    if error:
+        return error
+
+    data = request.json
+    defender_id = data.get('defender_id')
+    attacking_units = data.get('units', {})
+    if not defender_id:
+        return jsonify({'error': 'Defender ID required'}), 400
+
+    defender = await adb.get_empire(defender_id)
+    if not defender:
+        return jsonify({'error': 'Defender not found'}), 404
+
+    error = await asyncio.to_thread(game.attack_error, attacker, defender, attacking_units)
+    if error:
+        return jsonify({'error': error}), 400
+
+    attacker_before = game.empire_state(attacker)
+    defender_before = game.empire_state(defender)
+
+    def fight():
+        # The battle system records the battle and its events through the sync database
+        with metrics.BATTLE_DURATION.time(source='player'):
+            return game.battle_system.execute_battle(attacker, defender, attacking_units)
+
+    result = await asyncio.to_thread(fight)
+    await asyncio.gather(adb.update_empire(attacker), adb.update_empire(defender))
+    game.push_empire_delta(attacker, attacker_before)
+    game.push_empire_delta(defender, defender_before)
+    return jsonify(result)
+
+
+@async_view('build_city')
+@async_login_required
+async def build_city():
+    empire, error = await _current_empire()
+    if error:
+        return error
+
+    data = request.json
+    city_type = data.get('city_type')
+    city_name = data.get('city_name', '').strip()
+    if not city_type or not city_name:
+        return jsonify({'error': 'City type and name are required'}), 400
+
+    before = game.empire_state(empire)
+    if apply_build_city(empire, city_name, city_type) and await adb.update_empire(empire):
+        game.push_empire_delta(empire, before)
+        return jsonify({'success': True, 'empire': asdict(empire)})
+    return jsonify({'error': 'Failed to build city (insufficient resources or land)'}), 400
+
+
+@async_view('build_building')
+@async_login_required
+async def build_building():
+    empire, error = await _current_empire()
+    if error:
+        return error
+
+    data = request.json
+    city_id = data.get('city_id')
+    building_type = data.get('building_type')
+    if not city_id or not building_type:
+        return jsonify({'error': 'City ID and building type are required'}), 400
+
+    before = game.empire_state(empire)
+    if apply_build_building(empire, city_id, building_type) and await adb.update_empire(empire):
+        game.push_empire_delta(empire, before)
+        return jsonify({'success': True, 'empire': asdict(empire)})
+    return jsonify({'error': 'Failed to build building (insufficient resources or space)'}), 400
+
+
+@async_view('buy_land')
+@async_login_required
+async def buy_land():
+    empire, error = await _current_empire()
+    if error:
+        return error
+
+    acres = request.json.get('acres', 0)
+    if acres <= 0:
+        return jsonify({'error': 'Invalid land amount'}), 400
+
+    before = game.empire_state(empire)
+    if apply_buy_land(empire, acres) and await adb.update_empire(empire):
+        game.push_empire_delta(empire, before)
+        return jsonify({'success': True, 'empire': asdict(empire)})
+    return jsonify({'error': 'Insufficient gold'}), 400
+
+
+# HTTP plumbing
+def wsgi_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """WSGI environ for an ASGI HTTP request"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client')
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0] if client else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _run_wsgi(environ: Dict[str, Any]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    started: List[Any] = []
+    chunks: List[bytes] = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+        return chunks.append
+
+    result = flask_app.wsgi_app(environ, start_response)
+    try:
+        chunks.extend(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    status, headers = started
+    return int(status.split(' ', 1)[0]), headers, b''.join(chunks)
+
+
+async def _run_async_view(view, environ: Dict[str, Any], view_args: Dict[str, Any]):
+    # Flask keeps the request context in context variables, so it is private to this task
+    # (and is copied into asyncio.to_thread calls); before/after_request hooks run as usual
+    ctx = flask_app.request_context(environ)
+    ctx.push()
+    error = None
+    try:
+        try:
+            rv = flask_app.preprocess_request()
+            if rv is None:
+                rv = await view(**view_args)
+        except Exception as e:
+            rv = flask_app.handle_user_exception(e)
+        response = flask_app.finalize_request(rv)
+    except Exception as e:
+        error = e
+        response = flask_app.handle_exception(e)
+    finally:
+        ctx.pop(error)
+    return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+
+
+async def _read_body(receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    return bytes(body)
+
+
+async def http_app(scope, receive, send):
+    """Async views for the core routes, the threaded Flask app for the rest"""
+    if scope['type'] != 'http':
+        if scope['type'] == 'websocket':
+            await send({'type': 'websocket.close'})
+        return
+
+    environ = wsgi_environ(scope, await _read_body(receive))
+    try:
+        endpoint, view_args = flask_app.url_map.bind_to_environ(environ).match()
+    except HTTPException:  # 404, 405 and redirects are Flask's to answer
+        endpoint, view_args = None, {}
+
+    view = async_views.get(endpoint)
+    if view is not None:
+        status, headers, body = await _run_async_view(view, environ, view_args)
+    else:
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(wsgi_executor, _run_wsgi, environ)
+
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# Socket.IO events; same behaviour as the Flask-SocketIO handlers in app.py
+async def _client_room(sid: str, room: str) -> str:
+    socket_session = await sio.get_session(sid)
+    return room + game.MSGPACK_ROOM_SUFFIX if socket_session['msgpack'] else room
+
+
+async def _emit_to_client(sid: str, event: str, data):
+    socket_session = await sio.get_session(sid)
+    await sio.emit(event, packb(data) if socket_session['msgpack'] else data, to=sid)
+
+
+async def _alliance_id(sid: str):
+    empire_id = (await sio.get_session(sid))['empire_id']
+    if not empire_id:
+        return None
+    tags = await asyncio.to_thread(game.alliance_db.get_empire_alliance_tags, [empire_id])
+    membership = tags.get(empire_id)
+    return membership['alliance_id'] if membership else None
+
+
+@sio.event
+async def connect(sid, environ, auth=None):
+    metrics.SOCKET_CONNECTIONS.inc()
+    # The Flask login session rides along on the Socket.IO handshake's cookie
+    flask_session = flask_app.session_interface.open_session(flask_app, flask_app.request_class(environ))
+    wants_msgpack = (parse_qs(environ.get('QUERY_STRING', '')).get('format') == ['msgpack']
+                     and MSGPACK_AVAILABLE)
+    if wants_msgpack:
+        game._msgpack_clients.add(sid)  # app.emit_to_room packs room emits only while there are some
+    await sio.save_session(sid, {
+        'msgpack': wants_msgpack,
+        'empire_id': flask_session.get('empire_id') if flask_session else None
+    })
+    print(f'Client connected: {sid}')
+
+
+@sio.event
+async def disconnect(sid, *args):
+    metrics.SOCKET_CONNECTIONS.dec()
+    game._msgpack_clients.discard(sid)
+    print(f'Client disconnected: {sid}')
+
+
+@sio.event
+async def join_empire(sid, data):
+    empire_id = data.get('empire_id')
+    if empire_id:
+        await sio.enter_room(sid, await _client_room(sid, f'empire_{empire_id}'))
+        print(f'Client {sid} joined empire room: {empire_id}')
+
+        # Full state once; ticks and actions follow as deltas
+        empire = await adb.get_empire(empire_id)
+        if empire:
+            await _emit_to_client(sid, 'empire_snapshot', game.empire_state(empire))
+
+
+@sio.event
+async def leave_empire(sid, data):
+    empire_id = data.get('empire_id')
+    if empire_id:
+        await sio.leave_room(sid, await _client_room(sid, f'empire_{empire_id}'))
+        print(f'Client {sid} left empire room: {empire_id}')
+
+
+@sio.event
+async def join_alliance(sid, data):
+    alliance_id = await _alliance_id(sid)
+    if alliance_id and alliance_id == data.get('alliance_id'):
+        await sio.enter_room(sid, await _client_room(sid, f'alliance_{alliance_id}'))
+        print(f'Client {sid} joined alliance room: {alliance_id}')
+
+
+@sio.event
+async def leave_alliance_room(sid, data):
+    alliance_id = data.get('alliance_id')
+    if alliance_id:
+        await sio.leave_room(sid, await _client_room(sid, f'alliance_{alliance_id}'))
+
+
+@sio.event
+async def alliance_message(sid, data):
+    alliance_id = await _alliance_id(sid)
+    if not alliance_id:
+        await sio.emit('alliance_error', {'error': 'You are not in an alliance'}, to=sid)
+        return
+
+    empire_id = (await sio.get_session(sid))['empire_id']
+    entry = await asyncio.to_thread(game.alliance_db.post_message, alliance_id, empire_id,
+                                    data.get('message', ''), is_announcement=bool(data.get('is_announcement')))
+    if entry:
+        game.emit_to_room('alliance_message', entry, f'alliance_{alliance_id}')
+    else:
+        await sio.emit('alliance_error', {'error': 'Message could not be sent'}, to=sid)
+
+
+def _room_emitter(loop: asyncio.AbstractEventLoop):
+    # Views, the tick thread and the AI thread all emit through app.emit_to_room
+    def emit(event: str, data, room: str):
+        asyncio.run_coroutine_threadsafe(sio.emit(event, data, room=room), loop)
+    return emit
+
+
+async def on_startup():
+    game.room_emitter = _room_emitter(asyncio.get_running_loop())
+    # Each worker starts here; leader election keeps the game tick to one of them
+    await asyncio.to_thread(game.initialize_game)
+    print("⚡ Async mode: game API on asyncio")
+
+
+async def on_shutdown():
+    await adb.close()
+    wsgi_executor.shutdown(wait=False)
+
+
+# For uvicorn (or any ASGI server) to use
+application = socketio.ASGIApp(sio, other_asgi_app=http_app,
+                               on_startup=on_startup, on_shutdown=on_shutdown)
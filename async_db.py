@@ -0,0 +1,170 @@
+"""
+Empire Builder - Async Database Adapter
+Awaitable access to the game database for the ASGI entry point
+
+Empire reads and writes go to Supabase's REST API over httpx and to the SQLite fallback
+through aiosqlite, so a slow database call parks a coroutine instead of a thread. Without
+those packages, and for every other method, calls run the sync database in a worker thread.
+The sync database's circuit breaker, fallback and write journal stay in charge either way.
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+import metrics
+from models_supabase import Empire
+
+try:
+    import httpx
+except ImportError:  # Optional; Supabase calls run in threads without it
+    httpx = None
+
+try:
+    import aiosqlite
+except ImportError:  # Optional; SQLite calls run in threads without it
+    aiosqlite = None
+
+DATABASE_LABEL = 'game_async'
+HTTP_TIMEOUT = 10.0
+MAX_HTTP_CONNECTIONS = 50
+
+
+class AsyncGameDatabase:
+    """Async front for a SupabaseGameDatabase"""
+
+    def __init__(self, db, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None):
+        self.db = db
+        self.supabase_url = (supabase_url or os.getenv('SUPABASE_URL', '')).rstrip('/')
+        self.supabase_key = supabase_key or os.getenv('SUPABASE_ANON_KEY', '')
+        self._http = None
+
+    @property
+    def backend(self) -> str:
+        """Where empire calls currently go"""
+        if self.db._supabase_available():
+            return 'supabase-httpx' if httpx is not None else 'supabase-thread'
+        return 'sqlite-aiosqlite' if aiosqlite is not None else 'sqlite-thread'
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """Run any sync database method in a worker thread"""
+        return await asyncio.to_thread(getattr(self.db, method), *args, **kwargs)
+
+    async def _route(self, check, *args) -> bool:
+        """Run one of the sync database's routing checks; while journaled writes are pending
+        it reads the journal from SQLite, so keep that off the event loop"""
+        if self.db._journal_pending.is_set():
+            return await asyncio.to_thread(check, *args)
+        return check(*args)
+
+    async def get_empire(self, empire_id: str):
+        if httpx is None:
+            return await self.call('get_empire', empire_id)
+        if await self._route(self.db._supabase_read_allowed, empire_id):
+            try:
+                async with self._timed('get_empire'):
+                    await self._rest('POST', '/rpc/update_empire_resources', json={'empire_id': empire_id})
+                    rows = await self._rest('GET', '/empires', params={'id': f'eq.{empire_id}', 'select': '*'})
+                self.db.breaker.record_success()
+                return Empire.from_record(rows[0]) if rows else None
+            except Exception as e:
+                print(f"Supabase async get_empire failed: {e}")
+                self.db.breaker.record_failure()
+        return await self._get_empire_fallback(empire_id)
+
+    async def update_empire(self, empire) -> bool:
+        if httpx is None:
+            return await self.call('update_empire', empire)
+        if await self._route(self.db._supabase_write_allowed):
+            try:
+                async with self._timed('update_empire'):
+                    rows = await self._rest('PATCH', '/empires', params={'id': f'eq.{empire.id}'},
+                                            json=empire.update_fields(),
+                                            headers={'Prefer': 'return=representation'})
+                if not rows:
+                    raise Exception("Failed to update empire in Supabase")
+                self.db.breaker.record_success()
+                return True
+            except Exception as e:
+                print(f"Supabase async update_empire failed: {e}")
+                self.db.breaker.record_failure()
+        return await self._update_empire_fallback(empire)
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # Supabase REST (PostgREST)
+    async def _rest(self, method: str, path: str, **kwargs) -> Any:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=f"{self.supabase_url}/rest/v1",
+                headers={'apikey': self.supabase_key, 'Authorization': f'Bearer {self.supabase_key}'},
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=MAX_HTTP_CONNECTIONS)
+            )
+        response = await self._http.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    # SQLite fallback
+    async def _get_empire_fallback(self, empire_id: str):
+        if aiosqlite is None:
+            return await self.call('_get_empire_fallback', empire_id)
+
+        async with self._timed('get_empire_fallback'):
+            async with aiosqlite.connect(self.db.fallback_db) as conn:
+                conn.row_factory = aiosqlite.Row
+                async with conn.execute('SELECT * FROM empires WHERE id = ?', (empire_id,)) as cursor:
+                    row = await cursor.fetchone()
+        return Empire.from_record(dict(row)) if row else None
+
+    async def _update_empire_fallback(self, empire) -> bool:
+        if aiosqlite is None:
+            return await self.call('_update_empire_fallback', empire)
+
+        fields = empire.update_fields()
+        async with self._timed('update_empire_fallback'):
+            async with aiosqlite.connect(self.db.fallback_db) as conn:
+                cursor = await conn.execute('''
+                    UPDATE empires SET
+                        land = ?, resources = ?, military = ?, location = ?,
+                        last_update = ?, cities = ?, buildings = ?
+                    WHERE id = ?
+                ''', (
+                    fields['land'],
+                    json.dumps(fields['resources']),
+                    json.dumps(fields['military']),
+                    json.dumps(fields['location']),
+                    fields['last_update'],
+                    json.dumps(fields['cities']),
+                    json.dumps(fields['buildings']),
+                    empire.id
+                ))
+                success = cursor.rowcount > 0
+                await conn.commit()
+
+        if not success and self.db.use_supabase:
+            # Created in Supabase before the outage; the sync fallback inserts the row and journals
+            return await self.call('_update_empire_fallback', empire)
+        if self.db.use_supabase:
+            # Same contract as the sync fallback: journal for replay once Supabase recovers
+            await self.call('_journal_write', 'update_empire', empire.id, fields)
+            success = True
+        return success
+
+    @asynccontextmanager
+    async def _timed(self, method: str):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            metrics.DB_CALL_ERRORS.inc(database=DATABASE_LABEL, method=method)
+            raise
+        finally:
+            metrics.DB_CALL_DURATION.observe(time.perf_counter() - started,
+                                             database=DATABASE_LABEL, method=method)
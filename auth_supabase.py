@@ -5,6 +5,7 @@ Handles user registration, login, logout, and session management using Supabase
 
 import hashlib
 import secrets
+import threading
 import uuid
 from datetime import datetime, timedelta
 from dataclasses import dataclass
@@ -27,9 +28,33 @@ class User:
 
 class SupabaseAuthDatabase:
     def __init__(self):
-        self.client = get_supabase_client()
-        self.service_client = get_supabase_service_client()  # For admin operations
-        self.init_auth_tables()
+        # Clients connect on first use or in the post-bind warm-up, not at import
+        self._client = None
+        self._service_client = None
+        self._connected = False
+        self._connect_lock = threading.Lock()
+    
+    def connect(self):
+        """Create the Supabase clients and check the auth tables; runs once"""
+        if self._connected:
+            return
+        with self._connect_lock:
+            if self._connected:
+                return
+            self._client = get_supabase_client()
+            self._service_client = get_supabase_service_client()  # For admin operations
+            self._connected = True
+            self.init_auth_tables()
+    
+    @property
+    def client(self):
+        self.connect()
+        return self._client
+    
+    @property
+    def service_client(self):
+        self.connect()
+        return self._service_client
     
     def init_auth_tables(self):
         """Initialize authentication tables in Supabase"""
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - Serving Mode Load Test
+Concurrent-request throughput of the threaded server (python app.py) against the async one
+(uvicorn asgi:application)
+
+Each server is started on a scratch SQLite database seeded with empires and driven by
+keep-alive clients that poll /api/empire/<id>, the route every open dashboard hits.
+Against Supabase, set SUPABASE_URL/SUPABASE_ANON_KEY and pass --keep-env; the gap between
+the modes grows with database latency, since that is what holds threads.
+
+Usage:
+    python benchmark_async.py
+    python benchmark_async.py --concurrency 10 50 200 --requests 3000
+    python benchmark_async.py --url http://localhost:5000 --empire-id <id>   # a running server
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from benchmarks import SEED
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CONCURRENCY = [1, 10, 50, 200]
+SERVER_COMMANDS = {
+    'threaded': lambda port: [sys.executable, os.path.join(REPO_DIR, 'app.py')],
+    'asgi': lambda port: [sys.executable, '-m', 'uvicorn', 'asgi:application',
+                          '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(workdir: str, empires: int, seed: int = SEED) -> List[str]:
+    """Create the fallback SQLite database the servers will open in ``workdir``"""
+    from models_supabase import SupabaseGameDatabase
+
+    rng = random.Random(seed)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        db = SupabaseGameDatabase()
+        ids = []
+        for i in range(empires):
+            empire_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            db._create_empire_fallback(empire_id, f"Load Test Empire {i}", f"Ruler {i}",
+                                       rng.uniform(-60, 60), rng.uniform(-180, 180))
+            ids.append(empire_id)
+        return ids
+    finally:
+        os.chdir(cwd)
+
+
+def start_server(mode: str, workdir: str, keep_env: bool) -> (subprocess.Popen, str):
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+    if not keep_env:
+        # Keep both servers on the seeded SQLite database
+        env.update(SUPABASE_URL='', SUPABASE_ANON_KEY='', SOCKETIO_MESSAGE_QUEUE='')
+    env.pop('FLASK_ENV', None)
+    log_path = os.path.join(workdir, f"{mode}.log")
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(SERVER_COMMANDS[mode](port), cwd=workdir, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            with open(log_path, errors='replace') as log:
+                raise RuntimeError(f"{mode} server exited:\n{log.read()[-2000:]}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/catalog')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not come up on {url}")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_load(url: str, paths: List[str], concurrency: int, requests: int) -> Dict[str, Any]:
+    """``requests`` GETs spread over ``concurrency`` keep-alive clients"""
+    target = urlparse(url)
+    remaining = [requests]
+    lock = threading.Lock()
+    latencies: List[float] = []
+    errors = [0]
+
+    def client(worker: int):
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        rng = random.Random(SEED + worker)
+        local, failed = [], 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', rng.choice(paths))
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+            local.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2)
+    }
+
+
+def run_benchmark(modes: List[str], concurrency: List[int], requests: int, empires: int,
+                  keep_env: bool = False, url: Optional[str] = None,
+                  empire_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    results = {}
+    if url:
+        paths = [f"/api/empire/{empire_id}" for empire_id in empire_ids]
+        results['external'] = {str(c): run_load(url, paths, c, requests) for c in concurrency}
+        return results
+
+    workdir = tempfile.mkdtemp(prefix='empire-load-')
+    try:
+        paths = [f"/api/empire/{empire_id}" for empire_id in seed_database(workdir, empires)]
+        for mode in modes:
+            process, server_url = start_server(mode, workdir, keep_env)
+            try:
+                run_load(server_url, paths, min(concurrency), min(requests, 200))  # Warm up
+                results[mode] = {str(c): run_load(server_url, paths, c, requests) for c in concurrency}
+            finally:
+                stop_server(process)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded vs ASGI serving load test")
+    parser.add_argument('--modes', nargs='+', choices=sorted(SERVER_COMMANDS), default=['threaded', 'asgi'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=CONCURRENCY, help="concurrent clients")
+    parser.add_argument('--requests', type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument('--empires', type=int, default=50, help="empires to seed and poll")
+    parser.add_argument('--keep-env', action='store_true', help="let the servers use the configured Supabase")
+    parser.add_argument('--url', help="load an already running server instead of starting one")
+    parser.add_argument('--empire-id', nargs='+', help="empires to poll with --url")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.url and not args.empire_id:
+        parser.error("--url needs --empire-id")
+
+    report = run_benchmark(args.modes, args.concurrency, args.requests, args.empires,
+                           keep_env=args.keep_env, url=args.url, empire_ids=args.empire_id)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"⚡ GET /api/empire/<id>, {args.requests} requests per level")
+    for mode, levels in report.items():
+        print(f"  {mode}")
+        for clients, row in levels.items():
+            print(f"    {clients:>4} clients  {row['requests_per_sec']:>8,.1f} req/s  "
+                  f"p50 {row['p50_ms']:>7.2f} ms  p99 {row['p99_ms']:>8.2f} ms  errors {row['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - Socket.IO Fan-out Benchmark
+Measures publish-to-delivery latency through the shared message queue with many workers and clients
+
+Each worker process listens on the queue the way a SocketIO client manager does and delivers
+every message to the simulated clients it holds in the target empire room.
+
+Usage:
+    python benchmark_fanout.py
+    python benchmark_fanout.py --workers 8 --clients 5000 --messages 2000 --rate 500
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from socket_queue import SQLiteMessageQueue
+
+
+def _worker(queue_path: str, worker_id: int, rooms: Dict[str, int], expected: int,
+            ready, results):
+    """One web worker: route queue messages to its local empire rooms and record latency"""
+    queue = SQLiteMessageQueue(queue_path, channel='flask-socketio')
+    latencies = []
+    delivered = 0
+    received = 0
+    listener = queue.listen()
+    ready.set()
+
+    for message in listener:
+        if message.get('method') == 'stop':
+            break
+        received += 1
+        clients = rooms.get(message['room'], 0)
+        if clients:
+            latencies.append(time.time() - message['data']['sent_at'])
+            delivered += clients
+        if received >= expected:
+            break
+
+    results.put({'worker': worker_id, 'received': received, 'delivered': delivered, 'latencies': latencies})
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_fanout(workers: int, clients: int, empires: int, messages: int, rate: float, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    temp_dir = tempfile.mkdtemp(prefix='empire_fanout_')
+    queue_path = os.path.join(temp_dir, 'socketio_queue.db')
+    queue = SQLiteMessageQueue(queue_path, channel='flask-socketio')
+
+    # Spread clients over workers the way a load balancer would; each joins its empire room
+    worker_rooms = [dict() for _ in range(workers)]
+    for _ in range(clients):
+        room = f"empire_{rng.randrange(empires)}"
+        rooms = worker_rooms[rng.randrange(workers)]
+        rooms[room] = rooms.get(room, 0) + 1
+
+    ctx = multiprocessing.get_context('spawn' if os.name == 'nt' else 'fork')
+    results = ctx.Queue()
+    processes = []
+    ready_events = []
+    for worker_id in range(workers):
+        ready = ctx.Event()
+        process = ctx.Process(target=_worker, args=(queue_path, worker_id, worker_rooms[worker_id],
+                                                    messages, ready, results))
+        process.start()
+        processes.append(process)
+        ready_events.append(ready)
+
+    try:
+        for ready in ready_events:
+            ready.wait(30)
+        time.sleep(0.2)  # Let every listener read its starting position
+
+        interval = 1.0 / rate if rate else 0
+        started = time.perf_counter()
+        for i in range(messages):
+            room = f"empire_{rng.randrange(empires)}"
+            queue.publish({'method': 'emit', 'event': 'empire_delta', 'namespace': '/', 'room': room,
+                           'data': {'resources': {'gold': i}, 'sent_at': time.time()}})
+            if interval:
+                # Pace publishes like a tick spread over time, not one burst
+                target = started + (i + 1) * interval
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        publish_seconds = time.perf_counter() - started
+
+        reports = [results.get(timeout=120) for _ in processes]
+        total_seconds = time.perf_counter() - started
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    latencies = [latency for report in reports for latency in report['latencies']]
+    delivered = sum(report['delivered'] for report in reports)
+    return {
+        'workers': workers,
+        'clients': clients,
+        'empire_rooms': empires,
+        'messages': messages,
+        'publish_rate': round(messages / publish_seconds, 1) if publish_seconds else None,
+        'client_deliveries': delivered,
+        'deliveries_per_sec': round(delivered / total_seconds, 1) if total_seconds else None,
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 50) * 1000, 2),
+            'p95': round(_percentile(latencies, 95) * 1000, 2),
+            'p99': round(_percentile(latencies, 99) * 1000, 2),
+            'max': round(max(latencies) * 1000, 2) if latencies else 0.0,
+            'mean': round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0
+        },
+        'all_workers_received_all': all(report['received'] == messages for report in reports)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO message queue fan-out benchmark")
+    parser.add_argument('--workers', type=int, default=4, help="web worker processes")
+    parser.add_argument('--clients', type=int, default=2000, help="connected clients across all workers")
+    parser.add_argument('--empires', type=int, default=1000, help="distinct empire rooms")
+    parser.add_argument('--messages', type=int, default=1000, help="emits to publish")
+    parser.add_argument('--rate', type=float, default=500, help="emits per second (0 = as fast as possible)")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    print(f"📡 Fan-out: {args.workers} workers, {args.clients} clients, {args.messages} emits...")
+    report = run_fanout(args.workers, args.clients, args.empires, args.messages, args.rate, args.seed)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - Startup Benchmark
+Import time of the app measured with python -X importtime, in a fresh interpreter per run
+
+Importing app.py should only import: no database connections, schema creation or Supabase
+SDK until the server is up (see readiness.py). Each run happens in a scratch directory, so
+any database file the import creates shows up in the report. With --max-ms or --forbid the
+report becomes a check that exits 1 on a slow import or a module that should load lazily.
+
+Usage:
+    python benchmark_startup.py
+    python benchmark_startup.py --module asgi --runs 10 --top 20
+    python benchmark_startup.py --max-ms 600 --forbid supabase gotrue
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RUNS = 5
+LAZY_MODULES = ['supabase']  # Imported on first connect, never by `import app`
+
+
+def import_command(module: str) -> List[str]:
+    return [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+
+
+def import_env() -> Dict[str, str]:
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+
+
+def parse_importtime(output: str) -> Dict[str, Dict[str, int]]:
+    """Per-module self and cumulative microseconds from -X importtime's stderr"""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if name not in modules:
+            modules[name] = {'self_us': int(self_us), 'cumulative_us': int(cumulative_us)}
+    return modules
+
+
+def measure_import(module: str, workdir: str) -> Dict[str, Any]:
+    """Import ``module`` once in a fresh interpreter running in ``workdir``"""
+    started = time.perf_counter()
+    result = subprocess.run(import_command(module), cwd=workdir, env=import_env(),
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = parse_importtime(result.stderr)
+    return {
+        'wall_ms': wall * 1000,
+        'import_ms': modules[module]['cumulative_us'] / 1000,
+        'modules': modules
+    }
+
+
+def run_startup_benchmark(module: str = 'app', runs: int = DEFAULT_RUNS, top: int = 10,
+                          forbid: Optional[List[str]] = None) -> Dict[str, Any]:
+    forbid = LAZY_MODULES if forbid is None else forbid
+    workdir = tempfile.mkdtemp(prefix='empire-startup-')
+    try:
+        samples = [measure_import(module, workdir) for _ in range(runs)]
+        files_created = sorted(os.listdir(workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Break down the median run rather than mixing modules from different runs
+    median = sorted(samples, key=lambda sample: sample['import_ms'])[len(samples) // 2]
+    slowest = sorted(median['modules'].items(), key=lambda item: item[1]['self_us'], reverse=True)[:top]
+    return {
+        'module': module,
+        'runs': runs,
+        'import_ms': round(statistics.median(sample['import_ms'] for sample in samples), 1),
+        'wall_ms': round(statistics.median(sample['wall_ms'] for sample in samples), 1),
+        'modules_imported': len(median['modules']),
+        'slowest_self': [{'module': name, 'self_ms': round(row['self_us'] / 1000, 1),
+                          'cumulative_ms': round(row['cumulative_us'] / 1000, 1)}
+                         for name, row in slowest],
+        'forbidden_imported': [name for name in forbid if name in median['modules']],
+        'files_created': files_created
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the app entry points")
+    parser.add_argument('--module', default='app', help="module to import (app, asgi, wsgi)")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="fresh interpreters to time")
+    parser.add_argument('--top', type=int, default=10, help="slowest modules to list")
+    parser.add_argument('--forbid', nargs='*', default=None,
+                        help=f"modules the import must not load (default: {' '.join(LAZY_MODULES)})")
+    parser.add_argument('--max-ms', type=float, default=None, help="fail when the median import takes longer")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_startup_benchmark(args.module, args.runs, args.top, args.forbid)
+    failures = []
+    if args.max_ms is not None and report['import_ms'] > args.max_ms:
+        failures.append(f"import {args.module} took {report['import_ms']:.1f} ms (limit {args.max_ms:.0f} ms)")
+    if report['forbidden_imported']:
+        failures.append(f"import {args.module} loaded {', '.join(report['forbidden_imported'])}")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"🚀 import {report['module']}: {report['import_ms']:.1f} ms "
+              f"({report['wall_ms']:.1f} ms wall, median of {report['runs']}, "
+              f"{report['modules_imported']} modules)")
+        for row in report['slowest_self']:
+            print(f"  {row['module']:<40} self {row['self_ms']:>7.1f} ms  cumulative {row['cumulative_ms']:>7.1f} ms")
+        if report['files_created']:
+            print(f"  ⚠️  Import created files: {', '.join(report['files_created'])}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - Wire Format Benchmark
+Compares JSON and MessagePack payload size and encode time for empires of growing size
+
+Usage:
+    python benchmark_wire.py
+    python benchmark_wire.py --cities 1 50 500 --json
+"""
+
+import argparse
+import gzip
+import json
+import random
+import uuid
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List
+
+from benchmarks import SEED, time_callable
+from models import BUILDING_TYPES, CITY_STATS, Empire, STARTING_RESOURCES
+import wire_format
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CITY_COUNTS = [1, 50, 500]
+
+
+def build_empire(cities: int, seed: int = SEED) -> Empire:
+    """Empire with ``cities`` cities, each holding a randomly filled building dict"""
+    rng = random.Random(seed + cities)
+    empire = Empire(
+        id=str(uuid.UUID(int=rng.getrandbits(128))),
+        name=f"Benchmark Empire {cities}",
+        ruler="Benchmark Ruler",
+        land=2000 + cities * 100,
+        resources={resource: rng.randint(0, 500_000) for resource in STARTING_RESOURCES},
+        military={'infantry': rng.randint(0, 5000), 'tanks': rng.randint(0, 500),
+                  'aircraft': rng.randint(0, 200), 'ships': rng.randint(0, 200)},
+        location={'lat': rng.uniform(-60, 60), 'lng': rng.uniform(-180, 180)},
+        last_update="2024-01-01T00:00:00",
+        version=rng.randint(0, 10_000)
+    )
+    for i in range(cities):
+        city_type = rng.choice(list(CITY_STATS))
+        empire.cities[str(uuid.UUID(int=rng.getrandbits(128)))] = {
+            'name': f"City {i}",
+            'type': city_type,
+            'buildings': {building_type: rng.randint(0, config['max_per_city'])
+                          for building_type, config in BUILDING_TYPES.items()}
+        }
+    return empire
+
+
+def _encoders() -> Dict[str, Callable[[Any], bytes]]:
+    encoders = {
+        'json': lambda payload: json.dumps(payload, separators=(',', ':')).encode('utf-8'),
+    }
+    if orjson is not None:
+        encoders['orjson'] = orjson.dumps
+    if wire_format.MSGPACK_AVAILABLE:
+        encoders['msgpack'] = wire_format.packb
+    return encoders
+
+
+def run_wire_benchmark(city_counts: List[int], min_time: float = 0.2) -> Dict[str, Any]:
+    results = {}
+    for cities in city_counts:
+        payload = asdict(build_empire(cities))
+        rows = {}
+        for name, encode in _encoders().items():
+            body = encode(payload)
+            timing = time_callable(lambda: encode(payload), min_time=min_time)
+            rows[name] = {
+                'bytes': len(body),
+                'gzip_bytes': len(gzip.compress(body, compresslevel=6, mtime=0)),
+                'encode_us': round(timing['median'] * 1e6, 1)
+            }
+        if 'msgpack' in rows:
+            rows['msgpack']['size_vs_json'] = round(rows['msgpack']['bytes'] / rows['json']['bytes'], 3)
+        results[f"empire[{cities} cities]"] = rows
+    return {
+        'msgpack_available': wire_format.MSGPACK_AVAILABLE,
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs MessagePack payload benchmark")
+    parser.add_argument('--cities', type=int, nargs='+', default=CITY_COUNTS, help="city counts to encode")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds to spend timing each encoder")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_wire_benchmark(args.cities, args.min_time)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("📦 Empire payloads")
+    if not report['msgpack_available']:
+        print("  ⚠️  msgpack is not installed; timing JSON encoders only")
+    for case, rows in report['results'].items():
+        print(f"  {case}")
+        for name, row in rows.items():
+            ratio = f"  ({row['size_vs_json']:.0%} of JSON)" if 'size_vs_json' in row else ''
+            print(f"    {name:<8} {row['bytes']:>9,} B  gzip {row['gzip_bytes']:>8,} B  "
+                  f"{row['encode_us']:>10,.1f} µs{ratio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - World Store Benchmark
+Commands/sec of the snapshot + write-ahead log store against SQLite, and its recovery time
+
+Throughput: concurrent players issue a mix of train / buy_land / build_city /
+build_building / attack commands against a seeded world, each reading the empire first as
+the routes do. The durable store acknowledges a command only after its fsync, like SQLite's
+commit, so the comparison is like for like; the gap grows with concurrency because the
+log shares one fsync across every command waiting on it.
+
+Recovery: time to reopen the store from a snapshot alone, from the log alone, and from a
+snapshot plus a log tail.
+
+Usage:
+    python benchmark_world_store.py
+    python benchmark_world_store.py --empires 5000 --commands 20000 --concurrency 1 16 64
+    python benchmark_world_store.py --skip-sqlite --json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+from benchmarks import SEED
+from models import BattleSystem, GameDatabase, apply_unit_training
+from world_store import DurableGameDatabase
+
+CONCURRENCY = [1, 8, 32]
+COMMAND_MIX = ['train'] * 4 + ['buy_land'] * 2 + ['build_city', 'build_building', 'attack']
+RICH = {'gold': 10 ** 12, 'food': 10 ** 12, 'iron': 10 ** 12, 'oil': 10 ** 12, 'population': 10 ** 12}
+
+
+def seed_world(db, empires: int, seed: int = SEED) -> List[str]:
+    """Empires rich enough that the command mix rarely gets rejected"""
+    rng = random.Random(seed)
+    ids = []
+    for i in range(empires):
+        empire_id = db.create_empire(f"Store Empire {i}", f"Ruler {i}", rng.uniform(-60, 60), rng.uniform(-180, 180))
+        empire = db.get_empire(empire_id)
+        empire.resources.update(RICH)
+        empire.military = {unit_type: 10_000 for unit_type in empire.military}
+        db.update_empire(empire)
+        ids.append(empire_id)
+    return ids
+
+
+def run_command(db, op: str, ids: List[str], rng: random.Random) -> bool:
+    """One player action through the storage interface, the way the routes issue it"""
+    empire = db.get_empire(rng.choice(ids))
+    if op == 'train':
+        if hasattr(db, 'train_units'):
+            return db.train_units(empire, {'infantry': 5})
+        return apply_unit_training(empire, {'infantry': 5}) and db.update_empire(empire)
+    if op == 'buy_land':
+        return db.buy_land(empire, 10)
+    if op == 'build_city':
+        return db.build_city(empire, 'small', f"City {rng.randrange(10 ** 6)}")
+    if op == 'build_building':
+        if not empire.cities:
+            return db.build_city(empire, 'small', "Capital")
+        return db.build_building(empire, rng.choice(list(empire.cities)), rng.choice(['farm', 'housing']))
+
+    defender = db.get_empire(rng.choice(ids))
+    if defender.id == empire.id:
+        return False
+    units = {'infantry': 10}
+    if hasattr(db, 'attack'):
+        return db.attack(empire, defender, units) is not None
+    BattleSystem.calculate_battle(empire, defender, units)
+    return db.update_empire(empire) and db.update_empire(defender)
+
+
+def run_load(db, ids: List[str], concurrency: int, commands: int) -> Dict[str, Any]:
+    remaining = [commands]
+    lock = threading.Lock()
+    latencies: List[float] = []
+    accepted = [0]
+    errors = [0]
+
+    def player(worker: int):
+        rng = random.Random(SEED + worker)
+        local, ok, failed = [], 0, 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                ok += bool(run_command(db, rng.choice(COMMAND_MIX), ids, rng))
+            except Exception:
+                failed += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            accepted[0] += ok
+            errors[0] += failed
+
+    flushes_before = getattr(getattr(db, 'wal', None), 'flushes', 0)
+    threads = [threading.Thread(target=player, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    row = {
+        'commands': len(latencies),
+        'accepted': accepted[0],
+        'errors': errors[0],
+        'commands_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3)
+    }
+    if hasattr(db, 'wal'):
+        flushes = db.wal.flushes - flushes_before
+        row['records_per_fsync'] = round(accepted[0] / flushes, 1) if flushes else None
+    return row
+
+
+def open_backend(backend: str, workdir: str):
+    if backend == 'sqlite':
+        return GameDatabase(os.path.join(workdir, 'world.db'))
+    return DurableGameDatabase(os.path.join(workdir, 'world'), fsync=backend != 'durable-nofsync',
+                               snapshot_every=0, snapshot_interval=None)
+
+
+def run_throughput(backends: List[str], empires: int, concurrency: List[int], commands: int) -> Dict[str, Any]:
+    results = {}
+    for backend in backends:
+        workdir = tempfile.mkdtemp(prefix='empire-store-')
+        try:
+            db = open_backend(backend, workdir)
+            ids = seed_world(db, empires)
+            results[backend] = {str(c): run_load(db, ids, c, commands) for c in concurrency}
+            if hasattr(db, 'close'):
+                db.close(checkpoint=False)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def run_recovery(empires: int, log_records: int) -> Dict[str, Any]:
+    """Reopen times after a crash (the store is abandoned, never closed)"""
+    results = {}
+    cases = {
+        'snapshot_only': (True, 0),
+        'log_only': (False, log_records),
+        'snapshot_plus_log': (True, log_records),
+    }
+    for name, (checkpoint, records) in cases.items():
+        workdir = tempfile.mkdtemp(prefix='empire-recover-')
+        try:
+            data_dir = os.path.join(workdir, 'world')
+            db = DurableGameDatabase(data_dir, fsync=False, snapshot_every=0, snapshot_interval=None)
+            ids = seed_world(db, empires)
+            if checkpoint:
+                db.checkpoint()
+            rng = random.Random(SEED)
+            for _ in range(records):
+                run_command(db, rng.choice(COMMAND_MIX), ids, rng)
+            db.wal.rotate()  # Everything on disk; then "crash" by walking away
+            expected = {empire.id: empire for empire in db.get_all_empires()}
+
+            started = time.perf_counter()
+            recovered = DurableGameDatabase(data_dir, fsync=False, snapshot_every=0, snapshot_interval=None)
+            seconds = time.perf_counter() - started
+
+            stats = recovered.recovery
+            results[name] = {
+                'empires': stats['empires'],
+                'replayed': stats['replayed'],
+                'seconds': round(seconds, 3),
+                'snapshot_seconds': stats['snapshot_seconds'],
+                'replay_records_per_sec': round(stats['replayed'] / (seconds - stats['snapshot_seconds']), 1)
+                if stats['replayed'] else None,
+                'matches': {empire.id: empire for empire in recovered.get_all_empires()} == expected
+            }
+            recovered.close(checkpoint=False)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot + WAL world store benchmark")
+    parser.add_argument('--empires', type=int, default=1000, help="empires in the seeded world")
+    parser.add_argument('--commands', type=int, default=5000, help="commands per concurrency level")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=CONCURRENCY, help="concurrent players")
+    parser.add_argument('--log-records', type=int, default=50_000, help="log records to replay in recovery")
+    parser.add_argument('--skip-sqlite', action='store_true', help="only benchmark the durable store")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    backends = ['durable', 'durable-nofsync'] + ([] if args.skip_sqlite else ['sqlite'])
+    report = {
+        'throughput': run_throughput(backends, args.empires, args.concurrency, args.commands),
+        'recovery': run_recovery(args.empires, args.log_records)
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"🏰 Commands on a {args.empires}-empire world, {args.commands} per level")
+    for backend, levels in report['throughput'].items():
+        print(f"  {backend}")
+        for players, row in levels.items():
+            group = f"  {row['records_per_fsync']:>6} rec/fsync" if row.get('records_per_fsync') else ''
+            print(f"    {players:>4} players  {row['commands_per_sec']:>10,.1f} cmd/s  "
+                  f"p50 {row['p50_ms']:>7.3f} ms  p99 {row['p99_ms']:>8.3f} ms  errors {row['errors']}{group}")
+    print(f"💾 Recovery ({args.empires} empires, {args.log_records} log records)")
+    for case, row in report['recovery'].items():
+        rate = f"  {row['replay_records_per_sec']:>10,.0f} rec/s replay" if row['replay_records_per_sec'] else ''
+        print(f"  {case:<18} {row['seconds']:>7.3f} s  replayed {row['replayed']:>7}  "
+              f"{'✅' if row['matches'] else '❌ state differs'}{rate}")
+
+
+if __name__ == "__main__":
+    main()
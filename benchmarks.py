@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - Performance Benchmarks
+Times the game's hot paths on seeded synthetic worlds and compares against a stored baseline
+
+Usage:
+    python benchmarks.py                      # run and print results
+    python benchmarks.py --save               # run and overwrite benchmark_baseline.json
+    python benchmarks.py --compare            # run and flag regressions against the baseline
+    python benchmarks.py --compare --threshold 0.25 --filter get_empire
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Any, Optional
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+WORLD_SIZES = [10, 100, 1000]
+STORAGE_BACKENDS = ['game_db', 'memory_db']  # models.GameDatabase, storage.MemoryGameDatabase
+DEFAULT_THRESHOLD = 0.20  # 20% slower than baseline counts as a regression
+SEED = 1234
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark setup when it cannot run in this environment"""
+
+
+def time_callable(func: Callable[[], Any], min_time: float = 0.2, rounds: int = 5) -> Dict[str, float]:
+    """Time ``func`` over several rounds, calibrating iterations per round"""
+    # Calibrate so each round takes roughly min_time / rounds
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / rounds or iterations >= 1_000_000:
+            break
+        iterations *= 2 if elapsed == 0 else max(2, int((min_time / rounds) / elapsed))
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - started) / iterations)
+
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.mean(samples),
+        'iterations': iterations,
+        'rounds': rounds
+    }
+
+
+# Synthetic worlds
+
+def build_world(db, size: int, seed: int = SEED) -> List[str]:
+    """Populate ``db`` with ``size`` empires that own a few built-up cities"""
+    from models import BUILDING_TYPES, CITY_STATS
+
+    rng = random.Random(seed)
+    empire_ids = []
+    for i in range(size):
+        empire_id = db.create_empire(f"Bench Empire {i}", f"Bench Ruler {i}",
+                                     rng.uniform(-60, 70), rng.uniform(-180, 180))
+        empire = db.get_empire(empire_id)
+
+        for c in range(rng.randint(0, 5)):
+            city_type = rng.choice(list(CITY_STATS.keys()))
+            empire.cities[f"{empire_id}-city-{c}"] = {
+                'name': f"City {c}",
+                'type': city_type,
+                'buildings': {bt: rng.randint(0, cfg['max_per_city']) for bt, cfg in BUILDING_TYPES.items()}
+            }
+        for unit_type in empire.military:
+            empire.military[unit_type] *= rng.randint(1, 5)
+
+        db.update_empire(empire)
+        empire_ids.append(empire_id)
+    return empire_ids
+
+
+class BenchmarkSuite:
+    """Collects benchmark cases; each case returns the callable to time"""
+
+    def __init__(self, work_dir: str):
+        self.work_dir = work_dir
+        self.cases: Dict[str, Callable[[], Callable[[], Any]]] = {}
+        self._worlds: Dict[Any, Any] = {}
+        self._register()
+
+    def world(self, size: int, backend: str = 'game_db'):
+        """Storage backend with a seeded world of ``size`` empires (built once per backend)"""
+        key = (backend, size)
+        if key not in self._worlds:
+            if backend == 'memory_db':
+                from storage import MemoryGameDatabase
+                db = MemoryGameDatabase()
+            else:
+                from models import GameDatabase
+                db = GameDatabase(os.path.join(self.work_dir, f"world_{size}.db"))
+            self._worlds[key] = (db, build_world(db, size))
+        return self._worlds[key]
+
+    def _register(self):
+        # Every GameStorage backend runs the same cases (see storage.py)
+        for backend in STORAGE_BACKENDS:
+            for size in WORLD_SIZES:
+                self.cases[f"{backend}.get_empire[{size}]"] = \
+                    lambda size=size, backend=backend: self._get_empire(size, backend)
+                self.cases[f"{backend}.get_all_empires[{size}]"] = \
+                    lambda size=size, backend=backend: self._get_all_empires(size, backend)
+            self.cases[f"{backend}.update_empire[100]"] = lambda backend=backend: self._update_empire(backend)
+        self.cases["game_db.calculate_building_production"] = self._building_production
+        self.cases["battle_system.calculate_battle"] = self._calculate_battle
+        self.cases["supabase_battle_system.calculate_army_power"] = self._army_power
+        self.cases["ai_player.make_decision[100]"] = self._make_decision
+        self.cases["alliance_db.get_alliance[100]"] = self._get_alliance
+        self.cases["alliance_db.get_all_alliances[100]"] = self._get_all_alliances
+        self.cases["alliance_db.get_empire_alliance[100]"] = self._get_empire_alliance
+        self.cases["alliance_db.get_empire_alliance_tags[100]"] = self._get_empire_alliance_tags
+        self.cases["auth.hash_password"] = self._hash_password
+        self.cases["startup.import_app"] = self._import_app
+
+    # Cases
+
+    def _get_empire(self, size: int, backend: str):
+        db, ids = self.world(size, backend)
+        rng = random.Random(SEED)
+        return lambda: db.get_empire(rng.choice(ids))
+
+    def _get_all_empires(self, size: int, backend: str):
+        db, _ = self.world(size, backend)
+        return db.get_all_empires
+
+    def _update_empire(self, backend: str):
+        db, ids = self.world(100, backend)
+        empires = itertools.cycle([db.get_empire(empire_id) for empire_id in ids])
+        return lambda: db.update_empire(next(empires))
+
+    def _building_production(self):
+        db, ids = self.world(100)
+        busiest = max((db.get_empire(empire_id) for empire_id in ids), key=lambda e: len(e.cities))
+        return lambda: db.calculate_building_production(busiest)
+
+    def _calculate_battle(self):
+        import copy
+        from models import BattleSystem
+        db, ids = self.world(10)
+        attacker, defender = db.get_empire(ids[0]), db.get_empire(ids[1])
+        units = {unit_type: count // 2 for unit_type, count in attacker.military.items()}
+        random.seed(SEED)
+
+        def run():
+            # Battles mutate both sides; fight fresh copies each time
+            BattleSystem.calculate_battle(copy.deepcopy(attacker), copy.deepcopy(defender), units)
+        return run
+
+    def _army_power(self):
+        try:
+            from models_supabase import SupabaseBattleSystem
+        except ImportError as e:
+            raise SkipBenchmark(f"models_supabase unavailable ({e})")
+        db, ids = self.world(10)
+        units = db.get_empire(ids[0]).military
+        battle_system = SupabaseBattleSystem(None)
+        return lambda: battle_system.calculate_army_power(units)
+
+    def _make_decision(self):
+        from ai_system import AIPlayer
+        db, ids = self.world(100)
+        all_empires = db.get_all_empires()
+        random.seed(SEED)
+        # Advance the clock far enough that the AI always acts
+        clock = itertools.count(start=0, step=10_000).__next__
+        player = AIPlayer(ids[0], "normal", clock=clock)
+        return lambda: player.make_decision(db, all_empires)
+
+    def _alliance_world(self):
+        if 'alliances' not in self._worlds:
+            from alliance_system import AllianceDatabase
+            from models import GameDatabase
+            # AllianceDatabase works on empire_game.db in the working directory;
+            # create empires first so its power triggers can attach to the table
+            local_ids = build_world(GameDatabase('empire_game.db'), 100)
+            alliance_db = AllianceDatabase()
+
+            alliance_ids = []
+            for a in range(10):
+                members = local_ids[a * 10:(a + 1) * 10]
+                alliance_id = alliance_db.create_alliance(f"Alliance {a}", f"A{a:02d}", "", members[0])
+                for empire_id in members[1:]:
+                    invite_id = alliance_db.invite_to_alliance(alliance_id, empire_id, members[0])
+                    alliance_db.respond_to_invite(invite_id, True)
+                alliance_ids.append(alliance_id)
+            self._worlds['alliances'] = (alliance_db, alliance_ids, local_ids)
+        return self._worlds['alliances']
+
+    def _get_alliance(self):
+        alliance_db, alliance_ids, _ = self._alliance_world()
+        alliance_db.get_alliance(alliance_ids[0])
+        return lambda: alliance_db.get_alliance(alliance_ids[0])
+
+    def _get_all_alliances(self):
+        alliance_db, _, _ = self._alliance_world()
+        alliance_db.get_all_alliances()
+        return alliance_db.get_all_alliances
+
+    def _get_empire_alliance(self):
+        alliance_db, _, empire_ids = self._alliance_world()
+        alliance_db.get_empire_alliance(empire_ids[5])
+        return lambda: alliance_db.get_empire_alliance(empire_ids[5])
+
+    def _get_empire_alliance_tags(self):
+        alliance_db, _, empire_ids = self._alliance_world()
+        alliance_db.get_empire_alliance_tags(empire_ids)
+        return lambda: alliance_db.get_empire_alliance_tags(empire_ids)
+
+    def _hash_password(self):
+        try:
+            from auth import AuthDatabase
+        except ImportError as e:
+            raise SkipBenchmark(f"auth unavailable ({e})")
+        auth_db = AuthDatabase()
+        return lambda: auth_db.hash_password("correct horse battery staple", "0" * 64)
+
+    def _import_app(self):
+        from benchmark_startup import measure_import
+        try:
+            measure_import('app', self.work_dir)
+        except RuntimeError as e:
+            raise SkipBenchmark(f"app does not import here ({str(e).splitlines()[-1]})")
+        # A fresh interpreter per round; see benchmark_startup.py for the per-module breakdown
+        return lambda: measure_import('app', self.work_dir)
+
+    # Running
+
+    def run(self, name_filter: Optional[str] = None, min_time: float = 0.2) -> Dict[str, Any]:
+        results = {}
+        for name, setup in self.cases.items():
+            if name_filter and name_filter not in name:
+                continue
+            try:
+                func = setup()
+                results[name] = time_callable(func, min_time=min_time)
+                print(f"  ✅ {name:<48} {results[name]['median'] * 1e6:>12.1f} µs")
+            except SkipBenchmark as e:
+                results[name] = {'skipped': str(e)}
+                print(f"  ⏭️  {name:<48} skipped: {e}")
+            except Exception as e:
+                results[name] = {'skipped': f"{type(e).__name__}: {e}"}
+                print(f"  ⚠️  {name:<48} failed: {type(e).__name__}: {e}")
+        return results
+
+
+def run_benchmarks(name_filter: Optional[str] = None, min_time: float = 0.2) -> Dict[str, Any]:
+    """Run the suite in a scratch directory so no game database is touched"""
+    original_cwd = os.getcwd()
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+
+    work_dir = tempfile.mkdtemp(prefix='empire_bench_')
+    os.chdir(work_dir)
+    try:
+        suite = BenchmarkSuite(work_dir)
+        benchmarks = suite.run(name_filter, min_time)
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()
+        },
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'benchmarks': benchmarks
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Return the benchmarks whose median got slower than baseline by more than ``threshold``"""
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base or 'median' not in base or 'median' not in result:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append({'name': name, 'baseline': base['median'],
+                                'current': result['median'], 'ratio': ratio})
+    return regressions
+
+
+def missing_from_baseline(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Benchmarks that ran now but have no baseline median to compare against"""
+    return [name for name, result in current['benchmarks'].items()
+            if 'median' in result and 'median' not in baseline.get('benchmarks', {}).get(name, {})]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Empire Builder performance benchmarks")
+    parser.add_argument('--save', action='store_true', help=f"write results to {os.path.basename(BASELINE_FILE)}")
+    parser.add_argument('--compare', action='store_true', help="compare against the stored baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before flagging a regression (0.2 = 20%%)")
+    parser.add_argument('--filter', default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds to spend timing each benchmark")
+    args = parser.parse_args()
+
+    print("⏱️  Running Empire Builder benchmarks...")
+    results = run_benchmarks(args.filter, args.min_time)
+
+    if args.compare:
+        if not os.path.exists(BASELINE_FILE):
+            print(f"❌ No baseline found at {BASELINE_FILE}; run with --save first")
+            sys.exit(2)
+        with open(BASELINE_FILE, 'r') as f:
+            baseline = json.load(f)
+
+        unchecked = missing_from_baseline(baseline, results)
+        if unchecked:
+            print(f"\n⚠️  {len(unchecked)} benchmark(s) have no baseline; re-run with --save to cover them:")
+            for name in unchecked:
+                print(f"  {name}")
+
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"  {r['name']}: {r['baseline'] * 1e6:.1f} µs -> {r['current'] * 1e6:.1f} µs "
+                      f"({r['ratio']:.2f}x)")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+    if args.save:
+        skipped = [name for name, result in results['benchmarks'].items() if 'skipped' in result]
+        if skipped:
+            print(f"\n⚠️  Saving a baseline without {', '.join(skipped)}; install requirements.txt to cover them")
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n💾 Baseline saved to {BASELINE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Empire Builder - Circuit Breaker
+Health-aware routing between the remote Supabase backend and the SQLite fallback
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Any
+
+
+class CircuitBreaker:
+    """Tracks backend health and short-circuits calls while the backend is down.
+
+    CLOSED lets every call through. After ``failure_threshold`` consecutive
+    failures the breaker OPENs and callers skip the backend immediately. Once
+    ``reset_timeout`` seconds have passed it goes HALF_OPEN and lets a single
+    probe call through; a successful probe closes the breaker again, a failed
+    one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.on_recovered: Callable[[], None] = None
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.total_failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current breaker state, moving OPEN -> HALF_OPEN once the timeout expires"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Return True if the caller may try the backend right now"""
+        with self._lock:
+            self._maybe_half_open()
+
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                # Let exactly one probe through; everyone else keeps degrading
+                self._probe_in_flight = True
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        """Record a successful backend call"""
+        recovered = False
+        with self._lock:
+            if self._state != self.CLOSED:
+                recovered = True
+                print(f"✅ Circuit '{self.name}' closed - backend recovered")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+        if recovered and self.on_recovered:
+            self.on_recovered()
+
+    def record_failure(self):
+        """Record a failed backend call"""
+        with self._lock:
+            self._failures += 1
+            self.total_failures += 1
+
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"⚠️  Circuit '{self.name}' opened after {self._failures} failure(s)")
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+                self._probe_in_flight = False
+
+    def reset(self):
+        """Force the breaker back to CLOSED"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker statistics"""
+        return {
+            'name': self.name,
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'total_failures': self.total_failures,
+            'short_circuited': self.short_circuited,
+            'times_opened': self.times_opened
+        }
@@ -12,6 +12,8 @@ from typing import Dict, List, Optional, Any
 import sqlite3
 import os
 from datetime import datetime
+from event_sink import EventSink
+from event_store import EventStore
 
 class ElectricSQLBridge:
     """Bridge between Python Flask app and Electric-SQL client"""
@@ -21,6 +23,9 @@ class ElectricSQLBridge:
         self.is_running = False
         self.local_db_path = 'empire_electric.db'
         self.fallback_db_path = 'empire_game.db'
+        self.event_sink = EventSink('electric', self._write_log_batch)
+        # Without the Electric client, event history goes to segment files instead of empire_game.db
+        self.event_store = EventStore()
         
     def start_electric_client(self):
         """Start the Electric-SQL client process"""
@@ -287,49 +292,59 @@ class ElectricSQLBridge:
         return message_id
     
     def log_game_event(self, empire_id: str, event_type: str, event_data: Dict) -> str:
-        """Log a game event"""
+        """Log a game event (buffered, written in batches by the event sink)"""
         event_id = f"event_{int(time.time())}_{uuid.uuid4().hex[:8]}"
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO game_events (
-                id, empire_id, event_type, event_data, created_at
-            ) VALUES (?, ?, ?, ?, ?)
-        ''', (
-            event_id, empire_id, event_type,
-            json.dumps(event_data), datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        conn.close()
+        self.event_sink.emit('game_events', {
+            'id': event_id,
+            'empire_id': empire_id,
+            'event_type': event_type,
+            'event_data': json.dumps(event_data),
+            'created_at': datetime.now().isoformat()
+        })
         
         return event_id
     
     def log_resource_transaction(self, empire_id: str, transaction_type: str, resources: Dict, reason: str) -> str:
-        """Log a resource transaction"""
+        """Log a resource transaction (buffered, written in batches by the event sink)"""
         transaction_id = f"tx_{int(time.time())}_{uuid.uuid4().hex[:8]}"
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self.event_sink.emit('resource_transactions', {
+            'id': transaction_id,
+            'empire_id': empire_id,
+            'transaction_type': transaction_type,
+            'resources': json.dumps(resources),
+            'reason': reason,
+            'created_at': datetime.now().isoformat()
+        })
         
-        cursor.execute('''
-            INSERT INTO resource_transactions (
-                id, empire_id, transaction_type, resources, reason, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            transaction_id, empire_id, transaction_type,
-            json.dumps(resources), reason, datetime.now().isoformat()
-        ))
+        return transaction_id
+    
+    def _write_log_batch(self, table: str, rows: List[Dict]):
+        """Event sink writer: one executemany per table"""
+        if table == 'game_events' and not self.is_running:
+            self.event_store.append_many(rows)
+            return
+        
+        columns = list(rows[0].keys())
         
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [tuple(row[c] for c in columns) for row in rows]
+        )
         conn.commit()
         conn.close()
-        
-        return transaction_id
     
     def get_recent_events(self, empire_id: str = None, limit: int = 50) -> List[Dict]:
         """Get recent game events"""
+        # Make buffered events visible to the reader
+        self.event_sink.flush()
+        
+        if not self.is_running:
+            return self.event_store.get_recent_events(empire_id, limit)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -404,4 +419,5 @@ def initialize_electric_sql():
 
 def cleanup_electric_sql():
     """Cleanup Electric-SQL system"""
+    electric_bridge.event_sink.shutdown()
     electric_bridge.stop_electric_client()
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+Empire Builder - Event Sink
+Write-behind buffering for audit logging (game events, resource transactions)
+"""
+
+import atexit
+import queue
+import threading
+from typing import Callable, Dict, List, Any, Tuple
+
+
+class EventSink:
+    """Buffers log rows in a bounded queue and writes them in batches.
+
+    Callers hand rows to ``emit`` and return immediately; a background thread
+    groups them by table and calls ``writer(table, rows)`` once ``batch_size``
+    rows are waiting or ``flush_interval`` seconds have passed. If the queue is
+    full, ``emit`` waits up to ``put_timeout`` seconds (backpressure) and then
+    drops the row rather than stalling gameplay.
+    """
+
+    def __init__(self, name: str, writer: Callable[[str, List[Dict]], None],
+                 max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 2.0, put_timeout: float = 0.05):
+        self.name = name
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue: "queue.Queue[Tuple[str, Dict]]" = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        # Rows taken off the queue but not yet written; flush() waits for them
+        self._in_flight = 0
+        self._in_flight_cond = threading.Condition()
+        self._batch_ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Counters for monitoring
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.failed_batches = 0
+        self.high_watermark = 0
+
+        atexit.register(self.shutdown)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._stop_event.is_set():
+                self._thread = threading.Thread(target=self._flush_loop, daemon=True,
+                                                name=f"event-sink-{self.name}")
+                self._thread.start()
+
+    def emit(self, table: str, row: Dict[str, Any]) -> bool:
+        """Queue a row for ``table``; returns False if it had to be dropped"""
+        if self._stop_event.is_set():
+            # Shutting down - write through so nothing is lost
+            self._write_batch([(table, row)])
+            return True
+
+        self._ensure_started()
+
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self.backpressure_waits += 1
+            try:
+                self._queue.put((table, row), timeout=self.put_timeout)
+            except queue.Full:
+                self.dropped += 1
+                return False
+
+        self.emitted += 1
+        queued = self._queue.qsize()
+        self.high_watermark = max(self.high_watermark, queued)
+        if queued >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def _take(self, limit: int) -> List[Tuple[str, Dict]]:
+        """Remove up to ``limit`` rows and count them as in flight until _done"""
+        items = []
+        with self._in_flight_cond:
+            while len(items) < limit:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._in_flight += len(items)
+        return items
+
+    def _done(self, count: int):
+        with self._in_flight_cond:
+            self._in_flight -= count
+            self._in_flight_cond.notify_all()
+
+    def _write_taken(self, batch: List[Tuple[str, Dict]]):
+        try:
+            self._write_batch(batch)
+        finally:
+            self._done(len(batch))
+
+    def _flush_loop(self):
+        """Background loop that writes batches by size or time"""
+        while not self._stop_event.is_set():
+            self._batch_ready.wait(self.flush_interval)
+            self._batch_ready.clear()
+            while True:
+                batch = self._take(self.batch_size)
+                if batch:
+                    self._write_taken(batch)
+                if len(batch) < self.batch_size:
+                    break
+
+    def _write_batch(self, batch: List[Tuple[str, Dict]]):
+        """Group a batch by table and hand each group to the writer"""
+        by_table: Dict[str, List[Dict]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        with self._write_lock:
+            for table, rows in by_table.items():
+                try:
+                    self.writer(table, rows)
+                    self.written += len(rows)
+                except Exception as e:
+                    self.failed_batches += 1
+                    print(f"Event sink '{self.name}' failed to write {len(rows)} {table} rows: {e}")
+
+    def flush(self):
+        """Synchronously write everything queued, and wait for batches the background
+        thread has already taken, so rows emitted before the call can be read back"""
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                break
+            self._write_taken(batch)
+        with self._in_flight_cond:
+            self._in_flight_cond.wait_for(lambda: self._in_flight == 0)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the background thread and flush the remaining rows"""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self._batch_ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sink statistics"""
+        return {
+            'name': self.name,
+            'queued': self._queue.qsize(),
+            'emitted': self.emitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'backpressure_waits': self.backpressure_waits,
+            'failed_batches': self.failed_batches,
+            'high_watermark': self.high_watermark
+        }
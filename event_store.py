@@ -0,0 +1,269 @@
+"""
+Empire Builder - Event Store
+Append-only, time-segmented event history kept apart from hot empire state
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Iterator, Any
+
+SEGMENT_PREFIX = 'events_'
+SEGMENT_SUFFIX = '.db'
+SEGMENT_TIME_FORMAT = '%Y%m%dT%H'
+
+
+class EventStore:
+    """Stores game events in one SQLite file per time window.
+
+    Each segment is append-only and indexed on (empire_id, created_at) and
+    created_at, so history growth never touches the empire database and
+    time-range queries only open the segments that overlap the range.
+    Segments older than ``retention_days`` are removed by ``compact``.
+    A closed segment is only vacuumed once ``late_write_grace_hours`` have
+    passed since its window ended; a later write re-opens it for the next
+    compaction, and events already past retention are refused.
+    """
+
+    def __init__(self, base_dir: str = 'event_log', segment_hours: int = 24,
+                 retention_days: int = 30, late_write_grace_hours: int = 1):
+        self.base_dir = base_dir
+        self.segment_hours = segment_hours
+        self.retention_days = retention_days
+        self.late_write_grace = timedelta(hours=late_write_grace_hours)
+        self._lock = threading.Lock()
+        self._initialized_segments = set()  # The directory is created with the first segment
+        self._compacted_window = None  # Window start whose post-grace compaction has run
+
+    # Segment helpers
+
+    def _segment_start(self, timestamp: datetime) -> datetime:
+        """Start of the window that contains ``timestamp``"""
+        day_start = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.segment_hours >= 24:
+            days = self.segment_hours // 24
+            return day_start - timedelta(days=day_start.toordinal() % days)
+        return day_start + timedelta(hours=timestamp.hour - timestamp.hour % self.segment_hours)
+
+    def _segment_path(self, segment_start: datetime) -> str:
+        name = f"{SEGMENT_PREFIX}{segment_start.strftime(SEGMENT_TIME_FORMAT)}{SEGMENT_SUFFIX}"
+        return os.path.join(self.base_dir, name)
+
+    def _connect_segment(self, path: str) -> sqlite3.Connection:
+        if path not in self._initialized_segments:
+            os.makedirs(self.base_dir, exist_ok=True)
+        conn = sqlite3.connect(path)
+        if path not in self._initialized_segments:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL,
+                    empire_id TEXT,
+                    event_type TEXT NOT NULL,
+                    event_data TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_empire_time ON events(empire_id, created_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_time ON events(created_at)')
+            conn.commit()
+            self._initialized_segments.add(path)
+        return conn
+
+    def list_segments(self) -> List[Dict[str, Any]]:
+        """List segments in chronological order"""
+        segments = []
+        if not os.path.isdir(self.base_dir):
+            return segments
+        for filename in os.listdir(self.base_dir):
+            if not (filename.startswith(SEGMENT_PREFIX) and filename.endswith(SEGMENT_SUFFIX)):
+                continue
+            stamp = filename[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            try:
+                start = datetime.strptime(stamp, SEGMENT_TIME_FORMAT)
+            except ValueError:
+                continue
+            path = os.path.join(self.base_dir, filename)
+            segments.append({
+                'start': start,
+                'end': start + timedelta(hours=self.segment_hours),
+                'path': path,
+                'size_bytes': os.path.getsize(path)
+            })
+        segments.sort(key=lambda s: s['start'])
+        return segments
+
+    # Writes
+
+    def append(self, empire_id: Optional[str], event_type: str, event_data: Dict,
+               event_id: str = None, created_at: str = None) -> str:
+        """Append a single event and return its id"""
+        event_id = event_id or str(uuid.uuid4())
+        self.append_many([{
+            'id': event_id,
+            'empire_id': empire_id,
+            'event_type': event_type,
+            'event_data': event_data,
+            'created_at': created_at or datetime.now().isoformat()
+        }])
+        return event_id
+
+    def append_many(self, events: List[Dict]) -> int:
+        """Append a batch of events, routing each to its time segment.
+
+        Returns the number written; events older than retention are dropped,
+        since compaction has removed (or is about to remove) their segment.
+        """
+        now = datetime.now()
+        cutoff = now - timedelta(days=self.retention_days)
+        by_segment: Dict[str, List[tuple]] = {}
+        for event in events:
+            created_at = event.get('created_at') or now.isoformat()
+            segment_start = self._segment_start(datetime.fromisoformat(created_at))
+            if segment_start + timedelta(hours=self.segment_hours) <= cutoff:
+                continue
+            path = self._segment_path(segment_start)
+            event_data = event.get('event_data', {})
+            if not isinstance(event_data, str):
+                event_data = json.dumps(event_data)
+            by_segment.setdefault(path, []).append((
+                event.get('id') or str(uuid.uuid4()),
+                event.get('empire_id'),
+                event['event_type'],
+                event_data,
+                created_at
+            ))
+
+        with self._lock:
+            for path, rows in by_segment.items():
+                conn = self._connect_segment(path)
+                conn.executemany('''
+                    INSERT INTO events (id, empire_id, event_type, event_data, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
+                if conn.execute('PRAGMA user_version').fetchone()[0] != 0:
+                    # Late write into a compacted segment: vacuum it again next time
+                    conn.execute('PRAGMA user_version = 0')
+                conn.commit()
+                conn.close()
+
+        current_start = self._segment_start(now)
+        if now - current_start >= self.late_write_grace and self._compacted_window != current_start:
+            # The previous window has been closed for the whole grace period
+            self._compacted_window = current_start
+            self.compact(now)
+
+        return sum(len(rows) for rows in by_segment.values())
+
+    # Reads
+
+    def iter_events(self, start: datetime = None, end: datetime = None,
+                    empire_id: str = None, event_type: str = None,
+                    newest_first: bool = False, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream events in [start, end), optionally for one empire or event type.
+
+        Only segments overlapping the range are opened, and rows are fetched
+        in batches so large ranges never have to fit in memory.
+        """
+        segments = self.list_segments()
+        if newest_first:
+            segments.reverse()
+
+        clauses = []
+        params: List[Any] = []
+        if empire_id is not None:
+            clauses.append('empire_id = ?')
+            params.append(empire_id)
+        if event_type is not None:
+            clauses.append('event_type = ?')
+            params.append(event_type)
+        if start is not None:
+            clauses.append('created_at >= ?')
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append('created_at < ?')
+            params.append(end.isoformat())
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        order = 'DESC' if newest_first else 'ASC'
+        query = f'''
+            SELECT id, empire_id, event_type, event_data, created_at FROM events
+            {where} ORDER BY created_at {order}, seq {order}
+        '''
+
+        for segment in segments:
+            if start is not None and segment['end'] <= start:
+                continue
+            if end is not None and segment['start'] >= end:
+                continue
+
+            conn = sqlite3.connect(segment['path'])
+            try:
+                cursor = conn.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield {
+                            'id': row[0],
+                            'empire_id': row[1],
+                            'event_type': row[2],
+                            'event_data': json.loads(row[3]),
+                            'created_at': row[4]
+                        }
+            except sqlite3.OperationalError:
+                continue  # Segment removed or not yet initialized
+            finally:
+                conn.close()
+
+    def get_recent_events(self, empire_id: str = None, limit: int = 50) -> List[Dict]:
+        """Get the newest events, reading only as many segments as needed"""
+        events = []
+        for event in self.iter_events(empire_id=empire_id, newest_first=True, batch_size=limit):
+            events.append(event)
+            if len(events) >= limit:
+                break
+        return events
+
+    # Maintenance
+
+    def compact(self, now: datetime = None) -> Dict[str, int]:
+        """Drop segments past retention and vacuum segments closed for the grace period"""
+        now = now or datetime.now()
+        cutoff = now - timedelta(days=self.retention_days)
+        removed = 0
+        vacuumed = 0
+
+        with self._lock:
+            for segment in self.list_segments():
+                if segment['end'] <= cutoff:
+                    os.remove(segment['path'])
+                    self._initialized_segments.discard(segment['path'])
+                    removed += 1
+                elif segment['end'] + self.late_write_grace <= now:
+                    # Compact once; a late write resets user_version so it is vacuumed again
+                    conn = sqlite3.connect(segment['path'])
+                    if conn.execute('PRAGMA user_version').fetchone()[0] == 0:
+                        conn.execute('VACUUM')
+                        conn.execute('PRAGMA user_version = 1')
+                        vacuumed += 1
+                    conn.close()
+
+        if removed or vacuumed:
+            print(f"🗜️  Event store compaction: removed {removed}, vacuumed {vacuumed} segments")
+        return {'removed': removed, 'vacuumed': vacuumed}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get event store statistics"""
+        segments = self.list_segments()
+        return {
+            'segments': len(segments),
+            'total_bytes': sum(s['size_bytes'] for s in segments),
+            'oldest': segments[0]['start'].isoformat() if segments else None,
+            'newest': segments[-1]['start'].isoformat() if segments else None
+        }
@@ -0,0 +1,190 @@
+"""
+Empire Builder - HTTP Caching
+Response compression, ETag revalidation, MessagePack negotiation and precomputed JSON for hot read endpoints
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Optional
+
+from flask import Response, request
+
+from wire_format import MSGPACK_AVAILABLE, MSGPACK_MIMETYPE, packb
+
+try:
+    import orjson
+except ImportError:  # Optional fast encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+COMPRESS_MIN_SIZE = 1024  # Bytes; smaller bodies cost more to compress than they save
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Dynamic responses; static JSON is precompressed at the maximum
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', MSGPACK_MIMETYPE, 'text/')
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+IMMUTABLE_MAX_AGE = 31536000  # One year, for URLs that change whenever their content does
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=level if level is not None else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=level if level is not None else GZIP_LEVEL, mtime=0)
+
+
+def _negotiate_encoding() -> Optional[str]:
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def wants_msgpack() -> bool:
+    """Client prefers MessagePack (Accept: application/msgpack) over JSON and we can encode it"""
+    if not MSGPACK_AVAILABLE:
+        return False
+    return request.accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+
+
+def _variant(etag: str) -> str:
+    # JSON and MessagePack bodies differ, so a strong ETag must too
+    return f"{etag}-msgpack" if wants_msgpack() else etag
+
+
+def empire_etag(empire) -> str:
+    """Strong ETag from the empire's version counter, or from its content if versions aren't stored"""
+    if getattr(empire, 'version', None) is not None:
+        return f"empire-{empire.id}-v{empire.version}"
+    data = asdict(empire) if is_dataclass(empire) else empire
+    return f"empire-{hashlib.sha1(dumps(data)).hexdigest()[:20]}"
+
+
+def etag_matches(etag: str) -> bool:
+    """If-None-Match check that also accepts the compressed variants of the tag"""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    if if_none_match.star_tag:
+        return True
+    etag = _variant(etag)
+    for tag in if_none_match.as_set(include_weak=True):
+        for encoding in ('br', 'gzip'):
+            if tag.endswith(f"-{encoding}"):
+                tag = tag[:-len(encoding) - 1]
+                break
+        if tag == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(_variant(etag))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept')
+    return response
+
+
+def json_response(payload: Any, status: int = 200, etag: Optional[str] = None) -> Response:
+    """JSON (or negotiated MessagePack) response through the fast encoder.
+    With an ETag, clients revalidate instead of refetching."""
+    if wants_msgpack():
+        response = Response(packb(payload), status=status, mimetype=MSGPACK_MIMETYPE)
+    else:
+        response = Response(dumps(payload), status=status, mimetype='application/json')
+    response.vary.add('Accept')
+    if etag:
+        response.set_etag(_variant(etag))
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+class StaticJSON:
+    """Payload that never changes while the process runs, serialized and compressed once"""
+
+    def __init__(self, payload: Any, max_age: int = 3600):
+        self.body = dumps(payload)
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.max_age = max_age
+        # mimetype -> (identity body, {encoding: compressed body})
+        self.representations: Dict[str, Any] = {}
+        bodies = [('application/json', self.body)]
+        if MSGPACK_AVAILABLE:
+            bodies.append((MSGPACK_MIMETYPE, packb(payload)))
+        for mimetype, body in bodies:
+            compressed = {encoding: _compress(body, encoding, 11 if encoding == 'br' else 9) for encoding in ENCODINGS}
+            self.representations[mimetype] = (body, compressed)
+
+    def response(self, immutable: bool = False) -> Response:
+        """Serve the payload; ``immutable`` for URLs that embed the content hash"""
+        if etag_matches(self.etag):
+            response = not_modified(self.etag)
+        else:
+            mimetype = MSGPACK_MIMETYPE if wants_msgpack() else 'application/json'
+            body, compressed = self.representations[mimetype]
+            encoding = _negotiate_encoding()
+            etag = _variant(self.etag)
+            response = Response(compressed[encoding] if encoding else body, mimetype=mimetype)
+            response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        if immutable:
+            response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        response.vary.add('Accept')
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def compress_response(response: Response) -> Response:
+    """Compress large text responses for clients that accept it"""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    encoding = _negotiate_encoding()
+    if not encoding:
+        return response
+
+    response.set_data(_compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # A strong ETag names exact bytes, so each encoding gets its own
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+def negotiate_wire_format(response: Response) -> Response:
+    """Re-encode jsonify() responses as MessagePack for clients that asked for it"""
+    if response.mimetype != 'application/json' or response.direct_passthrough or response.is_streamed:
+        return response
+
+    response.vary.add('Accept')
+    if wants_msgpack():
+        response.set_data(packb(json.loads(response.get_data())))
+        response.mimetype = MSGPACK_MIMETYPE
+    return response
+
+
+def init_app(app):
+    # after_request hooks run last-registered first: negotiate the format, then compress it
+    app.after_request(compress_response)
+    app.after_request(negotiate_wire_format)
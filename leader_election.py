@@ -0,0 +1,252 @@
+"""
+Empire Builder - Leader Election
+Makes sure exactly one worker process runs the game tick, AI and maintenance jobs
+
+Locks (LEADER_LOCK):
+    sqlite   - row lease in the game database, shared by workers on one host (default)
+    postgres - session advisory lock on DATABASE_URL, shared by instances on any host
+    file     - exclusive file lock, released by the OS when the holder dies
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+LEASE_TTL = 30.0  # Seconds a leader may go without renewing before another worker takes over
+
+
+class FileLeaderLock:
+    """Exclusive lock on a file; the OS releases it when the holding process dies"""
+
+    ttl = None  # Held until release or process exit
+
+    def __init__(self, path: str = 'empire_leader.lock'):
+        self.path = path
+        self._handle = None
+
+    def try_acquire(self) -> bool:
+        if self._handle is not None:
+            return True
+        if fcntl is None:
+            return True  # No cross-process locking available; assume a single process
+
+        handle = open(self.path, 'a+')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()}\n")
+        handle.flush()
+        self._handle = handle
+        return True
+
+    def release(self):
+        if self._handle is not None:
+            if fcntl is not None:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+
+
+class SQLiteLeaseLock:
+    """Time-bounded lease row; a hung leader loses it once it stops renewing"""
+
+    def __init__(self, db_path: str = 'empire_game.db', name: str = 'background_jobs', ttl: float = LEASE_TTL):
+        self.db_path = db_path
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._table_ready = False  # Created by the first campaign round, not at import
+
+    def _create_table(self, conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS leader_leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        self._table_ready = True
+
+    def try_acquire(self) -> bool:
+        """Take the lease if it is free or expired, or extend it if we already hold it"""
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            if not self._table_ready:
+                self._create_table(conn)
+            conn.execute('''
+                INSERT INTO leader_leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leader_leases.holder = excluded.holder OR leader_leases.expires_at < ?
+            ''', (self.name, self.holder, now + self.ttl, now))
+            conn.commit()
+            row = conn.execute('SELECT holder FROM leader_leases WHERE name = ?', (self.name,)).fetchone()
+            return bool(row) and row[0] == self.holder
+        except sqlite3.Error as e:
+            print(f"⚠️ Leader lease check failed: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def release(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            conn.execute('DELETE FROM leader_leases WHERE name = ? AND holder = ?', (self.name, self.holder))
+            conn.commit()
+        except sqlite3.Error:
+            pass  # The lease simply expires
+        finally:
+            conn.close()
+
+
+class PostgresAdvisoryLock:
+    """Session advisory lock; Postgres drops it when the holder's connection dies"""
+
+    def __init__(self, dsn: str, name: str = 'background_jobs', ttl: float = LEASE_TTL):
+        if psycopg2 is None:
+            raise RuntimeError("Postgres leader lock needs psycopg2")
+        self.dsn = dsn
+        self.ttl = ttl  # Bounds how long a leader keeps working without reaching the database
+        # Advisory locks take a signed 64-bit key
+        self.key = int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], 'big', signed=True)
+        self._conn = None
+        self._held = False
+
+    def try_acquire(self) -> bool:
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = psycopg2.connect(self.dsn, connect_timeout=5)
+                self._conn.autocommit = True
+            with self._conn.cursor() as cursor:
+                if self._held:
+                    # The lock lives as long as the session, so a live session still holds it
+                    cursor.execute('SELECT 1')
+                    return True
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', (self.key,))
+                self._held = bool(cursor.fetchone()[0])
+                return self._held
+        except psycopg2.Error as e:
+            print(f"⚠️ Leader advisory lock check failed: {e}")
+            self._drop_connection()
+            return False
+
+    def release(self):
+        if self._conn is not None and not self._conn.closed:
+            try:
+                with self._conn.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock_all()')
+            except psycopg2.Error:
+                pass
+        self._drop_connection()
+
+    def _drop_connection(self):
+        self._held = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+        self._conn = None
+
+
+def leader_lock_from_env():
+    """Build the lock selected by LEADER_LOCK (sqlite, postgres or file)"""
+    kind = os.environ.get('LEADER_LOCK', 'sqlite').lower()
+    ttl = float(os.environ.get('LEADER_LEASE_TTL', LEASE_TTL))
+
+    if kind == 'postgres':
+        dsn = os.environ.get('DATABASE_URL')
+        if dsn and psycopg2 is not None:
+            return PostgresAdvisoryLock(dsn, ttl=ttl)
+        print("⚠️ LEADER_LOCK=postgres needs DATABASE_URL and psycopg2, using the SQLite lease")
+    elif kind == 'file':
+        return FileLeaderLock(os.environ.get('LEADER_LOCK_FILE', 'empire_leader.lock'))
+
+    return SQLiteLeaseLock(os.environ.get('LEADER_LEASE_DB', 'empire_game.db'), ttl=ttl)
+
+
+class LeaderElector:
+    """Campaigns for the leader lock in the background, renews it, and steps down when it is lost.
+
+    A leader that cannot renew stops counting as leader after 80% of the lease TTL, before any
+    other worker can take the lease over, so two workers never run jobs at once. Failover takes
+    at most the TTL plus one renew interval.
+    """
+
+    def __init__(self, lock, renew_interval: Optional[float] = None):
+        self.lock = lock
+        ttl = getattr(lock, 'ttl', None)
+        self.renew_interval = renew_interval or (ttl / 3 if ttl else 10.0)
+        self._valid_until = 0.0
+        self._leader = False
+        self.on_elected: Optional[Callable[[], None]] = None
+        self.on_demoted: Optional[Callable[[], None]] = None
+        self.thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def is_leader(self) -> bool:
+        """True while this worker holds a lease that has not run out locally"""
+        return self._leader and time.monotonic() < self._valid_until
+
+    def start(self, on_elected: Callable[[], None], on_demoted: Optional[Callable[[], None]] = None):
+        if self.thread is not None:
+            return
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.thread = threading.Thread(target=self._campaign, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Step down and release the lock (e.g. on shutdown)"""
+        self._stop.set()
+        if self._leader:
+            self._leader = False
+            self.lock.release()
+
+    def _campaign(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            held = self.lock.try_acquire()
+            ttl = getattr(self.lock, 'ttl', None)
+
+            if held:
+                # Measure validity from before the check so a slow round trip can't extend it
+                self._valid_until = started + ttl * 0.8 if ttl else float('inf')
+                if not self._leader:
+                    self._leader = True
+                    print(f"👑 Worker {os.getpid()} elected to run background jobs")
+                    self._run_callback(self.on_elected, 'leader-elected')
+            elif self._leader:
+                self._leader = False
+                print(f"⚠️ Worker {os.getpid()} lost leadership, pausing background jobs")
+                self._run_callback(self.on_demoted, 'leader-demoted')
+
+            self._stop.wait(self.renew_interval)
+
+    @staticmethod
+    def _run_callback(callback: Optional[Callable[[], None]], name: str):
+        # Off the campaign thread: a slow start must not hold up renewing the lease
+        if callback:
+            threading.Thread(target=callback, daemon=True, name=name).start()
@@ -0,0 +1,290 @@
+"""
+Empire Builder - Metrics
+Counters, gauges and histograms for the game loops, rendered in Prometheus text format
+"""
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds; covers fast SQLite reads through slow Supabase round trips and long ticks
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(label_names: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    if set(labels) != set(label_names):
+        raise ValueError(f"Expected labels {label_names}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in label_names)
+
+
+def _format_labels(label_names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Base for a named metric family with optional labels"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(_label_key(self.label_names, labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Metric):
+    """Value that goes up and down; may be computed at scrape time with set_function"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Read the value from ``function`` on every scrape"""
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def get(self, **labels) -> float:
+        key = _label_key(self.label_names, labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = float(function())
+            except Exception:
+                continue  # A broken callback must not break the scrape
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts with a final +Inf slot, sum, count)
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.label_names, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get_count(self, **labels) -> int:
+        state = self._values.get(_label_key(self.label_names, labels))
+        return state[2] if state else 0
+
+    def get_sum(self, **labels) -> float:
+        state = self._values.get(_label_key(self.label_names, labels))
+        return state[1] if state else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float('inf')), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them for a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+                return existing  # Re-importing a module must not duplicate families
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Shared metric families
+TICK_DURATION = registry.histogram('empire_tick_duration_seconds', 'Wall time of one resource tick')
+TICK_PHASE = registry.histogram('empire_tick_phase_seconds', 'Time spent per resource tick phase', ('phase',))
+TICK_LAG = registry.gauge('empire_tick_lag_seconds', 'How late the last resource tick started versus its schedule')
+TICK_EMPIRES = registry.gauge('empire_tick_empires', 'Empires processed by the last resource tick')
+AI_CYCLE_DURATION = registry.histogram('empire_ai_cycle_duration_seconds', 'Wall time of one AI cycle')
+AI_DECISIONS = registry.counter('empire_ai_decisions_total', 'AI decisions executed', ('action',))
+AI_DECISIONS_PER_CYCLE = registry.histogram('empire_ai_decisions_per_cycle', 'AI decisions executed per cycle',
+                                            buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 1000))
+BATTLE_DURATION = registry.histogram('empire_battle_resolution_seconds', 'Time to resolve a battle', ('source',))
+DB_CALL_DURATION = registry.histogram('empire_db_call_duration_seconds', 'Database method latency',
+                                      ('database', 'method'))
+DB_CALL_ERRORS = registry.counter('empire_db_call_errors_total', 'Database methods that raised', ('database', 'method'))
+CACHE_REQUESTS = registry.counter('empire_cache_requests_total', 'In-memory cache lookups', ('cache', 'result'))
+SOCKET_CONNECTIONS = registry.gauge('empire_socket_connections', 'Socket.IO clients connected to this worker')
+BACKGROUND_ERRORS = registry.counter('empire_background_errors_total', 'Errors caught in background loops', ('job',))
+
+# Extra hooks called with (database, method, seconds, error) after every instrumented call
+db_call_observers: List[Callable[[str, str, float, Optional[BaseException]], None]] = []
+_call_state = threading.local()
+
+
+def call_depth() -> int:
+    """Instrumented calls currently running on this thread, excluding the one being reported"""
+    return getattr(_call_state, 'depth', 0)
+
+
+def _timed_call(method: Callable, database: str, name: str) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        _call_state.depth = call_depth() + 1
+        started = time.perf_counter()
+        error = None
+        try:
+            return method(*args, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            _call_state.depth -= 1
+            DB_CALL_DURATION.observe(elapsed, database=database, method=name)
+            if error is not None:
+                DB_CALL_ERRORS.inc(database=database, method=name)
+            for observer in db_call_observers:
+                observer(database, name, elapsed, error)
+    return wrapper
+
+
+def instrument_database(db, database: str, methods: Optional[List[str]] = None):
+    """Wrap the public methods of a database instance so each call is timed.
+
+    Wraps in place on the instance, so every module sharing the object is measured.
+    """
+    if getattr(db, '_metrics_instrumented', False):
+        return db
+
+    names = methods or [name for name in dir(type(db))
+                        if not name.startswith('_') and callable(getattr(type(db), name, None))]
+    for name in names:
+        setattr(db, name, _timed_call(getattr(db, name), database, name))
+
+    db._metrics_instrumented = True
+    return db
@@ -116,6 +116,7 @@ class Empire:
     is_ai: bool = False
     cities: Dict[str, Dict] = None  # city_id -> {name, type, buildings}
     buildings: Dict[str, int] = None  # building_type -> count
+    version: Optional[int] = None  # Bumped by the database on every update; None if not loaded
     
     def __post_init__(self):
         if self.cities is None:
@@ -123,12 +124,185 @@ class Empire:
         if self.buildings is None:
             self.buildings = {building_type: 0 for building_type in BUILDING_TYPES.keys()}
 
+def ensure_empire_version(cursor):
+    """Add the empires.version counter and the trigger that bumps it on every update"""
+    try:
+        cursor.execute('ALTER TABLE empires ADD COLUMN version INTEGER DEFAULT 0')
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+    
+    # Writers never set version themselves, so any UPDATE (tick, action, fallback sync) moves it on
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_empires_version
+        AFTER UPDATE ON empires
+        WHEN NEW.version IS OLD.version
+        BEGIN
+            UPDATE empires SET version = COALESCE(OLD.version, 0) + 1 WHERE id = NEW.id;
+        END
+    ''')
+
+def _column_index(cursor, name: str) -> Optional[int]:
+    columns = [desc[0] for desc in cursor.description or ()]
+    return columns.index(name) if name in columns else None
+
+def building_production(empire: Empire) -> Dict[str, int]:
+    """Per-tick production of all the empire's buildings, with each city's production bonus"""
+    total_production = {'gold': 0, 'food': 0, 'iron': 0, 'oil': 0, 'population': 0}
+    
+    # Safety check for cities
+    if not empire.cities:
+        return total_production
+    
+    for city_id, city in empire.cities.items():
+        city_type = city['type']
+        production_bonus = CITY_STATS[city_type]['production_bonus']
+        
+        for building_type, count in city['buildings'].items():
+            if count > 0 and building_type in BUILDING_TYPES:
+                production = BUILDING_TYPES[building_type]['production']
+                for resource, amount in production.items():
+                    total_production[resource] += int(amount * count * production_bonus)
+    
+    return total_production
+
+def apply_resource_tick(empire: Empire, building_production: Dict[str, int]):
+    """Apply one resource generation tick (land, buildings, population growth)"""
+    # Base resource generation based on land and population
+    generation_rate = empire.land / 1000
+    empire.resources['gold'] += int(10 * generation_rate)
+    empire.resources['food'] += int(15 * generation_rate)
+    empire.resources['iron'] += int(5 * generation_rate)
+    empire.resources['oil'] += int(3 * generation_rate)
+    
+    # Building production bonus
+    for resource, amount in building_production.items():
+        empire.resources[resource] = empire.resources.get(resource, 0) + amount
+    
+    # Population growth
+    growth_rate = 0.01
+    empire.resources['population'] += int(empire.resources['population'] * growth_rate)
+
+# Player actions: each checks the rules and mutates the empire in place, returning False
+# (and leaving it untouched) when the action isn't allowed. Callers persist the result.
+
+def apply_unit_training(empire: Empire, units: Dict[str, int]) -> bool:
+    """Pay for and add ``units`` ({unit type: count})"""
+    total_cost = {'gold': 0, 'iron': 0, 'oil': 0, 'food': 0}
+    for unit_type, count in units.items():
+        if unit_type in UNIT_COSTS and count > 0:
+            for resource, cost in UNIT_COSTS[unit_type].items():
+                total_cost[resource] += cost * count
+    
+    if any(empire.resources.get(resource, 0) < cost for resource, cost in total_cost.items()):
+        return False
+    
+    for resource, cost in total_cost.items():
+        empire.resources[resource] = empire.resources.get(resource, 0) - cost
+    for unit_type, count in units.items():
+        if unit_type in UNIT_COSTS and count > 0:
+            empire.military[unit_type] = empire.military.get(unit_type, 0) + count
+    return True
+
+def apply_build_city(empire: Empire, city_name: str, city_type: str, city_id: Optional[str] = None) -> bool:
+    """Found a city, paying its gold/population/land cost; ``city_id`` is generated unless given"""
+    if city_type not in CITY_COSTS:
+        return False
+    
+    costs = CITY_COSTS[city_type]
+    
+    # Check if empire can afford it
+    for resource, cost in costs.items():
+        if resource == 'land':
+            if empire.land < cost:
+                return False
+        else:
+            if empire.resources.get(resource, 0) < cost:
+                return False
+    
+    # Deduct costs
+    for resource, cost in costs.items():
+        if resource == 'land':
+            empire.land -= cost
+        else:
+            empire.resources[resource] -= cost
+    
+    # Create city
+    city_id = city_id or str(uuid.uuid4())
+    empire.cities[city_id] = {
+        'name': city_name,
+        'type': city_type,
+        'buildings': {building_type: 0 for building_type in BUILDING_TYPES.keys()}
+    }
+    return True
+
+def apply_build_building(empire: Empire, city_id: str, building_type: str) -> bool:
+    """Add a building to one of the empire's cities"""
+    if city_id not in empire.cities or building_type not in BUILDING_TYPES:
+        return False
+    
+    # Ensure empire buildings dictionary is properly initialized
+    if empire.buildings is None:
+        empire.buildings = {bt: 0 for bt in BUILDING_TYPES.keys()}
+    
+    # Ensure all building types exist in the dictionary
+    for bt in BUILDING_TYPES.keys():
+        if bt not in empire.buildings:
+            empire.buildings[bt] = 0
+    
+    city = empire.cities[city_id]
+    building_config = BUILDING_TYPES[building_type]
+    
+    # Check building limits
+    current_count = city['buildings'].get(building_type, 0)
+    if current_count >= building_config['max_per_city']:
+        return False
+    
+    # Check city capacity
+    total_buildings = sum(city['buildings'].values())
+    max_buildings = CITY_STATS[city['type']]['max_buildings']
+    if total_buildings >= max_buildings:
+        return False
+    
+    # Check land requirements
+    land_needed = building_config['land_required']
+    if empire.land < land_needed:
+        return False
+    
+    # Check costs
+    for resource, cost in building_config['cost'].items():
+        if empire.resources.get(resource, 0) < cost:
+            return False
+    
+    # Deduct costs
+    for resource, cost in building_config['cost'].items():
+        empire.resources[resource] -= cost
+    
+    # Use land
+    empire.land -= land_needed
+    
+    # Add building
+    city['buildings'][building_type] = current_count + 1
+    empire.buildings[building_type] += 1
+    return True
+
+def apply_buy_land(empire: Empire, acres: int) -> bool:
+    """Buy ``acres`` of land for gold"""
+    total_cost = acres * LAND_COST_PER_ACRE
+    
+    if empire.resources.get('gold', 0) < total_cost:
+        return False
+    
+    empire.resources['gold'] -= total_cost
+    empire.land += acres
+    return True
+
 class GameDatabase:
-    def __init__(self):
+    def __init__(self, db_path: str = 'empire_game.db'):
+        self.db_path = db_path
         self.init_db()
     
     def init_db(self):
-        conn = sqlite3.connect('empire_game.db')
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         # Empires table
@@ -159,6 +333,8 @@ class GameDatabase:
         except sqlite3.OperationalError:
             pass  # Column already exists
         
+        ensure_empire_version(cursor)
+        
         # Battles table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS battles (
@@ -190,7 +366,7 @@ class GameDatabase:
     
     def create_empire(self, name: str, ruler: str, lat: float, lng: float) -> str:
         empire_id = str(uuid.uuid4())
-        conn = sqlite3.connect('empire_game.db')
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -211,11 +387,12 @@ class GameDatabase:
         return empire_id
     
     def get_empire(self, empire_id: str) -> Optional[Empire]:
-        conn = sqlite3.connect('empire_game.db')
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM empires WHERE id = ?', (empire_id,))
         row = cursor.fetchone()
+        version_index = _column_index(cursor, 'version')
         conn.close()
         
         if row:
@@ -238,16 +415,18 @@ class GameDatabase:
                 last_update=row[7],
                 is_ai=bool(row[8]),
                 cities=cities,
-                buildings=buildings
+                buildings=buildings,
+                version=row[version_index] if version_index is not None else None
             )
         return None
     
     def get_all_empires(self) -> List[Empire]:
-        conn = sqlite3.connect('empire_game.db')
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM empires')
         rows = cursor.fetchall()
+        version_index = _column_index(cursor, 'version')
         conn.close()
         
         empires = []
@@ -271,12 +450,13 @@ class GameDatabase:
                 last_update=row[7],
                 is_ai=bool(row[8]),
                 cities=cities,
-                buildings=buildings
+                buildings=buildings,
+                version=row[version_index] if version_index is not None else None
             ))
         return empires
     
-    def update_empire(self, empire: Empire):
-        conn = sqlite3.connect('empire_game.db')
+    def update_empire(self, empire: Empire) -> bool:
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -292,133 +472,42 @@ class GameDatabase:
             json.dumps(empire.buildings),
             empire.id
         ))
+        updated = cursor.rowcount > 0
         
         conn.commit()
         conn.close()
+        return updated
     
-    def build_city(self, empire: Empire, city_name: str, city_type: str) -> bool:
+    def build_city(self, empire: Empire, city_type: str, city_name: str) -> bool:
         """Build a new city"""
-        if city_type not in CITY_COSTS:
+        if not apply_build_city(empire, city_name, city_type):
             return False
-        
-        costs = CITY_COSTS[city_type]
-        
-        # Check if empire can afford it
-        for resource, cost in costs.items():
-            if resource == 'land':
-                if empire.land < cost:
-                    return False
-            else:
-                if empire.resources.get(resource, 0) < cost:
-                    return False
-        
-        # Deduct costs
-        for resource, cost in costs.items():
-            if resource == 'land':
-                empire.land -= cost
-            else:
-                empire.resources[resource] -= cost
-        
-        # Create city
-        city_id = str(uuid.uuid4())
-        empire.cities[city_id] = {
-            'name': city_name,
-            'type': city_type,
-            'buildings': {building_type: 0 for building_type in BUILDING_TYPES.keys()}
-        }
-        
         self.update_empire(empire)
         return True
     
     def build_building(self, empire: Empire, city_id: str, building_type: str) -> bool:
         """Build a building in a city"""
-        if city_id not in empire.cities or building_type not in BUILDING_TYPES:
-            return False
-        
-        # Ensure empire buildings dictionary is properly initialized
-        if empire.buildings is None:
-            empire.buildings = {bt: 0 for bt in BUILDING_TYPES.keys()}
-        
-        # Ensure all building types exist in the dictionary
-        for bt in BUILDING_TYPES.keys():
-            if bt not in empire.buildings:
-                empire.buildings[bt] = 0
-        
-        city = empire.cities[city_id]
-        building_config = BUILDING_TYPES[building_type]
-        
-        # Check building limits
-        current_count = city['buildings'].get(building_type, 0)
-        if current_count >= building_config['max_per_city']:
-            return False
-        
-        # Check city capacity
-        total_buildings = sum(city['buildings'].values())
-        max_buildings = CITY_STATS[city['type']]['max_buildings']
-        if total_buildings >= max_buildings:
+        if not apply_build_building(empire, city_id, building_type):
             return False
-        
-        # Check land requirements
-        land_needed = building_config['land_required']
-        if empire.land < land_needed:
-            return False
-        
-        # Check costs
-        for resource, cost in building_config['cost'].items():
-            if empire.resources.get(resource, 0) < cost:
-                return False
-        
-        # Deduct costs
-        for resource, cost in building_config['cost'].items():
-            empire.resources[resource] -= cost
-        
-        # Use land
-        empire.land -= land_needed
-        
-        # Add building
-        city['buildings'][building_type] += 1
-        empire.buildings[building_type] += 1
-        
         self.update_empire(empire)
         return True
     
     def buy_land(self, empire: Empire, acres: int) -> bool:
         """Buy additional land"""
-        total_cost = acres * LAND_COST_PER_ACRE
-        
-        if empire.resources.get('gold', 0) < total_cost:
+        if not apply_buy_land(empire, acres):
             return False
-        
-        empire.resources['gold'] -= total_cost
-        empire.land += acres
-        
         self.update_empire(empire)
         return True
     
     def calculate_building_production(self, empire: Empire) -> Dict[str, int]:
         """Calculate total production from all buildings"""
-        total_production = {'gold': 0, 'food': 0, 'iron': 0, 'oil': 0, 'population': 0}
-        
-        # Safety check for cities
-        if not empire.cities:
-            return total_production
-        
-        for city_id, city in empire.cities.items():
-            city_type = city['type']
-            production_bonus = CITY_STATS[city_type]['production_bonus']
-            
-            for building_type, count in city['buildings'].items():
-                if count > 0 and building_type in BUILDING_TYPES:
-                    building_production = BUILDING_TYPES[building_type]['production']
-                    for resource, amount in building_production.items():
-                        total_production[resource] += int(amount * count * production_bonus)
-        
-        return total_production
+        return building_production(empire)
 
 class BattleSystem:
     @staticmethod
-    def calculate_battle(attacker: Empire, defender: Empire, attacking_units: Dict[str, int]) -> Dict:
-        """Calculate battle results using real-time combat simulation"""
+    def calculate_battle(attacker: Empire, defender: Empire, attacking_units: Dict[str, int],
+                         rng: random.Random = random) -> Dict:
+        """Calculate battle results using real-time combat simulation; pass a seeded ``rng`` to replay one"""
         
         # Calculate total attack and defense power
         attacker_power = 0
@@ -432,8 +521,8 @@ class BattleSystem:
                 defender_power += count * UNIT_STATS[unit_type]['defense']
         
         # Add randomness and terrain bonuses
-        attacker_power *= random.uniform(0.8, 1.2)
-        defender_power *= random.uniform(0.9, 1.3)  # Defender advantage
+        attacker_power *= rng.uniform(0.8, 1.2)
+        defender_power *= rng.uniform(0.9, 1.3)  # Defender advantage
         
         # Determine winner
         if attacker_power > defender_power:
@@ -452,13 +541,13 @@ class BattleSystem:
             defender_losses = {}
             
             for unit_type, count in attacking_units.items():
-                loss_rate = random.uniform(0.1, 0.3)
+                loss_rate = rng.uniform(0.1, 0.3)
                 losses = int(count * loss_rate)
                 attacker_losses[unit_type] = losses
                 attacker.military[unit_type] -= losses
             
             for unit_type, count in defender.military.items():
-                loss_rate = random.uniform(0.2, 0.5)
+                loss_rate = rng.uniform(0.2, 0.5)
                 losses = int(count * loss_rate)
                 defender_losses[unit_type] = losses
                 defender.military[unit_type] = max(0, count - losses)
@@ -484,7 +573,7 @@ class BattleSystem:
             # Heavy attacker losses
             attacker_losses = {}
             for unit_type, count in attacking_units.items():
-                loss_rate = random.uniform(0.4, 0.7)
+                loss_rate = rng.uniform(0.4, 0.7)
                 losses = int(count * loss_rate)
                 attacker_losses[unit_type] = losses
                 attacker.military[unit_type] -= losses
@@ -492,7 +581,7 @@ class BattleSystem:
             # Light defender losses
             defender_losses = {}
             for unit_type, count in defender.military.items():
-                loss_rate = random.uniform(0.05, 0.15)
+                loss_rate = rng.uniform(0.05, 0.15)
                 losses = int(count * loss_rate)
                 defender_losses[unit_type] = losses
                 defender.military[unit_type] = max(0, count - losses)
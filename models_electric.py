@@ -10,6 +10,7 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from electric_bridge import electric_bridge
+from models import apply_buy_land, building_production
 
 # Game Configuration (unchanged)
 STARTING_LAND = 2000
@@ -378,6 +379,16 @@ class ElectricGameDatabase:
         
         return False
     
+    def buy_land(self, empire: Empire, acres: int) -> bool:
+        """Buy land with Electric-SQL sync"""
+        if not apply_buy_land(empire, acres):
+            return False
+        return self.update_empire(empire)
+    
+    def calculate_building_production(self, empire: Empire) -> Dict[str, int]:
+        """Per-tick production of the empire's buildings"""
+        return building_production(empire)
+    
     def create_battle(self, attacker: Empire, defender: Empire, attacking_units: Dict) -> str:
         """Create a battle with Electric-SQL sync"""
         return self.electric_bridge.create_battle(attacker.id, defender.id, attacking_units)
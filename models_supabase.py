@@ -7,9 +7,14 @@ import json
 import uuid
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from supabase_config import get_supabase_client, initialize_supabase
+from circuit_breaker import CircuitBreaker
+from event_sink import EventSink
+from event_store import EventStore
+from models import ensure_empire_version, apply_build_city, apply_build_building, apply_buy_land, building_production
 import sqlite3
+import threading
 
 # Game Configuration (unchanged)
 STARTING_LAND = 2000
@@ -135,6 +140,7 @@ class Empire:
     buildings: Dict[str, int] = None
     created_at: str = None
     updated_at: str = None
+    version: Optional[int] = None  # Bumped by the database on every update; None if not loaded
     
     def __post_init__(self):
         if self.cities is None:
@@ -154,6 +160,43 @@ class Empire:
                 unit_power = (UNIT_STATS[unit_type]['attack'] + UNIT_STATS[unit_type]['defense']) / 2
                 total_power += unit_power * count
         return int(total_power)
+    
+    @classmethod
+    def from_record(cls, empire_data: Dict[str, Any]) -> 'Empire':
+        """Empire from a Supabase row, or a SQLite row whose JSON columns are still text"""
+        def decoded(column):
+            value = empire_data.get(column)
+            return json.loads(value) if isinstance(value, str) else value
+        
+        return cls(
+            id=empire_data['id'],
+            name=empire_data['name'],
+            ruler=empire_data['ruler'],
+            land=empire_data['land'],
+            resources=decoded('resources'),
+            military=decoded('military'),
+            location=decoded('location'),
+            last_update=empire_data['last_update'],
+            is_ai=empire_data.get('is_ai', False),
+            cities=decoded('cities'),
+            buildings=decoded('buildings'),
+            created_at=empire_data.get('created_at'),
+            updated_at=empire_data.get('updated_at'),
+            version=empire_data.get('version')
+        )
+    
+    def update_fields(self) -> Dict[str, Any]:
+        """Columns written by update_empire"""
+        return {
+            'land': self.land,
+            'resources': self.resources,
+            'military': self.military,
+            'location': self.location,
+            'last_update': self.last_update,
+            'cities': self.cities,
+            'buildings': self.buildings,
+            'updated_at': datetime.now().isoformat()
+        }
 
 class SupabaseGameDatabase:
     """Game database with Supabase real-time integration"""
@@ -162,21 +205,103 @@ class SupabaseGameDatabase:
         self.supabase = None
         self.use_supabase = False
         self.fallback_db = 'empire_game.db'
-        self._init_fallback_db()
+        self.breaker = CircuitBreaker('supabase')
+        self.breaker.on_recovered = self._on_supabase_recovered
+        self._replay_lock = threading.Lock()
+        # Set while journaled writes wait for Supabase; writes queue behind them until replayed
+        self._journal_pending = threading.Event()
+        self._journal_lock = threading.Lock()
+        self._replay_thread = None
+        self.event_sink = EventSink('supabase', self._write_log_batch)
+        self.event_store = EventStore()
+        # Schema and connection are set up on first use or in the post-bind warm-up, not at import
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
         
     def initialize(self):
-        """Initialize Supabase connection"""
-        try:
-            if initialize_supabase():
-                self.supabase = get_supabase_client()
-                self.use_supabase = True
-                print("Using Supabase for real-time features")
-            else:
-                print("Using SQLite fallback mode")
+        """Create the fallback schema and connect to Supabase; runs once"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            self._ensure_fallback_schema()
+            try:
+                if initialize_supabase():
+                    self.supabase = get_supabase_client()
+                    self.use_supabase = True
+                    print("Using Supabase for real-time features")
+                else:
+                    print("Using SQLite fallback mode")
+                    self.use_supabase = False
+            except Exception as e:
+                print(f"Supabase initialization failed: {e}")
                 self.use_supabase = False
-        except Exception as e:
-            print(f"Supabase initialization failed: {e}")
-            self.use_supabase = False
+            self._initialized = True
+        
+        if self.use_supabase and self.get_journal_size():
+            # Writes journaled before the last shutdown
+            self._journal_pending.set()
+            self._start_replay()
+    
+    def _supabase_available(self) -> bool:
+        """Check whether a call should go to Supabase or straight to SQLite"""
+        if not self._initialized:
+            # Wait for the connection rather than write to SQLite without journaling
+            self.initialize()
+        return bool(self.use_supabase and self.supabase and self.breaker.allow_request())
+    
+    def _supabase_write_allowed(self) -> bool:
+        """Whether an empire write may go to Supabase: not while journaled writes wait for
+        replay, which would overwrite it with older state. Shared with async_db."""
+        return not self._journal_pending.is_set() and self._supabase_available()
+    
+    def _supabase_read_allowed(self, empire_id: str) -> bool:
+        """Whether an empire read may come from Supabase: not while SQLite holds newer,
+        unreplayed writes for it. Shared with async_db."""
+        return empire_id not in self._journal_empire_ids() and self._supabase_available()
+    
+    def _on_supabase_recovered(self):
+        """Replay journaled SQLite writes once Supabase is reachable again"""
+        self._start_replay()
+    
+    def _start_replay(self):
+        """Start the replay thread unless one is already draining the journal"""
+        with self._journal_lock:
+            self._start_replay_locked()
+    
+    def _start_replay_locked(self):
+        if self._replay_thread is None:
+            self._replay_thread = threading.Thread(target=self._drain_journal, daemon=True)
+            self._replay_thread.start()
+    
+    def _drain_journal(self):
+        """Replay until the journal is empty, then let writes go to Supabase again.
+        
+        The emptiness check and the end of the thread happen under the journal lock, so a
+        write journaled meanwhile is either replayed by this thread or starts the next one.
+        """
+        while True:
+            replayed = self.replay_write_journal()
+            with self._journal_lock:
+                if not self.get_journal_size():
+                    self._journal_pending.clear()
+                elif replayed:
+                    continue  # Writes queued while replaying
+                # Empty, or stuck on a failure: a later write or recovery starts over
+                self._replay_thread = None
+                return
+    
+    def _journal_empire_ids(self) -> Set[str]:
+        """Empires with writes in SQLite that Supabase has not seen yet"""
+        if not self._journal_pending.is_set():
+            return set()
+        conn = self._get_fallback_connection()
+        rows = conn.execute('SELECT DISTINCT empire_id FROM write_journal').fetchall()
+        conn.close()
+        return {row[0] for row in rows}
     
     def _init_fallback_db(self):
         """Initialize SQLite fallback database with all required tables"""
@@ -202,6 +327,7 @@ class SupabaseGameDatabase:
                     updated_at TEXT
                 )
             ''')
+            ensure_empire_version(cursor)
             
             # Create battles table
             cursor.execute('''
@@ -259,6 +385,17 @@ class SupabaseGameDatabase:
                 )
             ''')
             
+            # Journal of writes that landed in SQLite while Supabase was down
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS write_journal (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    operation TEXT NOT NULL,
+                    empire_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            
             conn.commit()
             conn.close()
             print("✅ SQLite fallback database initialized")
@@ -266,15 +403,101 @@ class SupabaseGameDatabase:
         except Exception as e:
             print(f"⚠️  SQLite fallback database initialization failed: {e}")
     
+    def _ensure_fallback_schema(self):
+        """Create the SQLite fallback tables once"""
+        with self._schema_lock:
+            if not self._schema_ready:
+                self._init_fallback_db()
+                self._schema_ready = True
+    
     def _get_fallback_connection(self):
         """Get SQLite fallback connection"""
+        if not self._schema_ready:
+            self._ensure_fallback_schema()
         return sqlite3.connect(self.fallback_db)
     
+    def _journal_write(self, operation: str, empire_id: str, payload: Dict):
+        """Record a fallback write so it can be replayed to Supabase later"""
+        with self._journal_lock:
+            conn = self._get_fallback_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO write_journal (operation, empire_id, payload, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (operation, empire_id, json.dumps(payload), datetime.now().isoformat()))
+            
+            conn.commit()
+            conn.close()
+            
+            self._journal_pending.set()
+            if self.breaker.state == CircuitBreaker.CLOSED:
+                self._start_replay_locked()  # Queued behind a replay that may just have finished
+    
+    def get_journal_size(self) -> int:
+        """Number of fallback writes still waiting to be replayed"""
+        conn = self._get_fallback_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM write_journal')
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    def replay_write_journal(self) -> int:
+        """Replay journaled SQLite writes to Supabase in order.
+        
+        Only the newest update per empire is sent, since every update carries
+        the full empire state. Replay stops at the first failure and leaves the
+        remaining entries for the next recovery.
+        """
+        if not (self.use_supabase and self.supabase):
+            return 0
+        
+        if not self._replay_lock.acquire(blocking=False):
+            return 0  # Another thread is already replaying
+        
+        replayed = 0
+        try:
+            conn = self._get_fallback_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT seq, operation, empire_id, payload FROM write_journal ORDER BY seq')
+            entries = cursor.fetchall()
+            
+            # Later full-state updates supersede earlier ones for the same empire
+            latest_update = {}
+            for seq, operation, empire_id, _ in entries:
+                if operation == 'update_empire':
+                    latest_update[empire_id] = seq
+            
+            for seq, operation, empire_id, payload in entries:
+                data = json.loads(payload)
+                try:
+                    if operation == 'create_empire':
+                        self.supabase.table('empires').upsert(data).execute()
+                    elif operation == 'update_empire' and latest_update[empire_id] == seq:
+                        self.supabase.table('empires').update(data).eq('id', empire_id).execute()
+                except Exception as e:
+                    print(f"Supabase journal replay failed at #{seq}: {e}")
+                    self.breaker.record_failure()
+                    break
+                
+                cursor.execute('DELETE FROM write_journal WHERE seq = ?', (seq,))
+                conn.commit()
+                replayed += 1
+            
+            conn.close()
+        finally:
+            self._replay_lock.release()
+        
+        if replayed:
+            print(f"🔁 Replayed {replayed} journaled writes to Supabase")
+        return replayed
+    
     def create_empire(self, name: str, ruler: str, lat: float, lng: float) -> str:
         """Create a new empire with Supabase real-time sync"""
         empire_id = str(uuid.uuid4())
         
-        if self.use_supabase and self.supabase:
+        if self._supabase_write_allowed():
             try:
                 # Create empire in Supabase
                 response = self.supabase.table('empires').insert({
@@ -289,6 +512,7 @@ class SupabaseGameDatabase:
                     'cities': {},
                     'buildings': {building_type: 0 for building_type in BUILDING_TYPES.keys()}
                 }).execute()
+                self.breaker.record_success()
                 
                 if response.data:
                     # Log empire creation event
@@ -305,6 +529,7 @@ class SupabaseGameDatabase:
                     
             except Exception as e:
                 print(f"Supabase empire creation failed: {e}")
+                self.breaker.record_failure()
                 # Fall back to SQLite
                 return self._create_empire_fallback(empire_id, name, ruler, lat, lng)
         else:
@@ -331,38 +556,41 @@ class SupabaseGameDatabase:
         conn.commit()
         conn.close()
         
+        if self.use_supabase:
+            # Supabase is configured but unreachable - keep the write for replay
+            self._journal_write('create_empire', empire_id, {
+                'id': empire_id,
+                'name': name,
+                'ruler': ruler,
+                'land': STARTING_LAND,
+                'resources': STARTING_RESOURCES,
+                'military': {'infantry': 100, 'tanks': 10, 'aircraft': 5, 'ships': 8},
+                'location': {'lat': lat, 'lng': lng},
+                'is_ai': False,
+                'cities': {},
+                'buildings': {building_type: 0 for building_type in BUILDING_TYPES.keys()}
+            })
+        
         print(f"Empire created in SQLite: {name}")
         return empire_id
     
     def get_empire(self, empire_id: str) -> Optional[Empire]:
         """Get empire with real-time data"""
-        if self.use_supabase and self.supabase:
+        if self._supabase_read_allowed(empire_id):
             try:
                 # Update resources first
                 self.supabase.rpc('update_empire_resources', {'empire_id': empire_id}).execute()
                 
                 # Get empire data
                 response = self.supabase.table('empires').select('*').eq('id', empire_id).execute()
+                self.breaker.record_success()
                 
                 if response.data:
                     empire_data = response.data[0]
-                    return Empire(
-                        id=empire_data['id'],
-                        name=empire_data['name'],
-                        ruler=empire_data['ruler'],
-                        land=empire_data['land'],
-                        resources=empire_data['resources'],
-                        military=empire_data['military'],
-                        location=empire_data['location'],
-                        last_update=empire_data['last_update'],
-                        is_ai=empire_data['is_ai'],
-                        cities=empire_data['cities'],
-                        buildings=empire_data['buildings'],
-                        created_at=empire_data['created_at'],
-                        updated_at=empire_data['updated_at']
-                    )
+                    return Empire.from_record(empire_data)
             except Exception as e:
                 print(f"Supabase get_empire failed: {e}")
+                self.breaker.record_failure()
                 # Fall back to SQLite
                 return self._get_empire_fallback(empire_id)
         else:
@@ -383,36 +611,20 @@ class SupabaseGameDatabase:
             columns = [desc[0] for desc in cursor.description]
             empire_data = dict(zip(columns, row))
             
-            return Empire(
-                id=empire_data['id'],
-                name=empire_data['name'],
-                ruler=empire_data['ruler'],
-                land=empire_data['land'],
-                resources=json.loads(empire_data['resources']),
-                military=json.loads(empire_data['military']),
-                location=json.loads(empire_data['location']),
-                last_update=empire_data['last_update'],
-                is_ai=empire_data.get('is_ai', False),
-                cities=json.loads(empire_data.get('cities', '{}')),
-                buildings=json.loads(empire_data.get('buildings', '{}'))
-            )
+            return Empire.from_record(empire_data)
         
         return None
     
     def update_empire(self, empire: Empire) -> bool:
-        """Update empire with Supabase real-time sync"""
-        if self.use_supabase and self.supabase:
+        """Update empire with Supabase real-time sync.
+        
+        While journaled writes are waiting to be replayed, new writes join the journal
+        instead, so the replay cannot overwrite them with older state.
+        """
+        if self._supabase_write_allowed():
             try:
-                response = self.supabase.table('empires').update({
-                    'land': empire.land,
-                    'resources': empire.resources,
-                    'military': empire.military,
-                    'location': empire.location,
-                    'last_update': empire.last_update,
-                    'cities': empire.cities,
-                    'buildings': empire.buildings,
-                    'updated_at': datetime.now().isoformat()
-                }).eq('id', empire.id).execute()
+                response = self.supabase.table('empires').update(empire.update_fields()).eq('id', empire.id).execute()
+                self.breaker.record_success()
                 
                 if response.data:
                     print(f"Empire updated in Supabase: {empire.id}")
@@ -422,6 +634,7 @@ class SupabaseGameDatabase:
                     
             except Exception as e:
                 print(f"Supabase update_empire failed: {e}")
+                self.breaker.record_failure()
                 # Fall back to SQLite
                 return self._update_empire_fallback(empire)
         else:
@@ -449,9 +662,30 @@ class SupabaseGameDatabase:
         ))
         
         success = cursor.rowcount > 0
+        if not success and self.use_supabase:
+            # Created in Supabase before the outage; keep a copy so fallback reads find it
+            cursor.execute('''
+                INSERT INTO empires (id, name, ruler, land, resources, military, location,
+                                     last_update, is_ai, cities, buildings)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                empire.id, empire.name, empire.ruler, empire.land,
+                json.dumps(empire.resources),
+                json.dumps(empire.military),
+                json.dumps(empire.location),
+                empire.last_update,
+                empire.is_ai,
+                json.dumps(empire.cities),
+                json.dumps(empire.buildings)
+            ))
+            success = True
         conn.commit()
         conn.close()
         
+        if self.use_supabase:
+            # Supabase is configured but unreachable or still replaying - keep the write for replay
+            self._journal_write('update_empire', empire.id, empire.update_fields())
+        
         if success:
             print(f"Empire updated in SQLite: {empire.id}")
         
@@ -459,33 +693,28 @@ class SupabaseGameDatabase:
     
     def get_all_empires(self) -> List[Empire]:
         """Get all empires with real-time data"""
-        if self.use_supabase and self.supabase:
+        if self._supabase_available():
             try:
                 response = self.supabase.table('empires').select('*').order('created_at', desc=True).execute()
+                self.breaker.record_success()
                 
                 empires = []
                 for empire_data in response.data:
-                    empire = Empire(
-                        id=empire_data['id'],
-                        name=empire_data['name'],
-                        ruler=empire_data['ruler'],
-                        land=empire_data['land'],
-                        resources=empire_data['resources'],
-                        military=empire_data['military'],
-                        location=empire_data['location'],
-                        last_update=empire_data['last_update'],
-                        is_ai=empire_data['is_ai'],
-                        cities=empire_data['cities'],
-                        buildings=empire_data['buildings'],
-                        created_at=empire_data['created_at'],
-                        updated_at=empire_data['updated_at']
-                    )
+                    empire = Empire.from_record(empire_data)
                     empires.append(empire)
                 
+                if self._journal_pending.is_set():
+                    # Empires with unreplayed writes are newer in SQLite
+                    pending_ids = self._journal_empire_ids()
+                    pending = {empire.id: empire for empire in self._get_all_empires_fallback()
+                               if empire.id in pending_ids}
+                    empires = [pending.pop(empire.id, empire) for empire in empires] + list(pending.values())
+                
                 return empires
                 
             except Exception as e:
                 print(f"Supabase get_all_empires failed: {e}")
+                self.breaker.record_failure()
                 # Fall back to SQLite
                 return self._get_all_empires_fallback()
         else:
@@ -504,23 +733,33 @@ class SupabaseGameDatabase:
         empires = []
         for row in rows:
             empire_data = dict(zip(columns, row))
-            empire = Empire(
-                id=empire_data['id'],
-                name=empire_data['name'],
-                ruler=empire_data['ruler'],
-                land=empire_data['land'],
-                resources=json.loads(empire_data['resources']),
-                military=json.loads(empire_data['military']),
-                location=json.loads(empire_data['location']),
-                last_update=empire_data['last_update'],
-                is_ai=empire_data.get('is_ai', False),
-                cities=json.loads(empire_data.get('cities', '{}')),
-                buildings=json.loads(empire_data.get('buildings', '{}'))
-            )
+            empire = Empire.from_record(empire_data)
             empires.append(empire)
         
         return empires
     
+    def build_city(self, empire: Empire, city_type: str, city_name: str) -> bool:
+        """Found a city and save the empire"""
+        if not apply_build_city(empire, city_name, city_type):
+            return False
+        return self.update_empire(empire)
+    
+    def build_building(self, empire: Empire, city_id: str, building_type: str) -> bool:
+        """Add a building to a city and save the empire"""
+        if not apply_build_building(empire, city_id, building_type):
+            return False
+        return self.update_empire(empire)
+    
+    def buy_land(self, empire: Empire, acres: int) -> bool:
+        """Buy land and save the empire"""
+        if not apply_buy_land(empire, acres):
+            return False
+        return self.update_empire(empire)
+    
+    def calculate_building_production(self, empire: Empire) -> Dict[str, int]:
+        """Per-tick production of the empire's buildings"""
+        return building_production(empire)
+    
     def create_battle(self, attacker_id: str, defender_id: str, attacking_units: Dict) -> str:
         """Create a battle with Supabase real-time sync"""
         battle_id = str(uuid.uuid4())
@@ -529,7 +768,7 @@ class SupabaseGameDatabase:
         defender = self.get_empire(defender_id)
         defending_units = defender.military if defender else {}
         
-        if self.use_supabase and self.supabase:
+        if self._supabase_available():
             try:
                 response = self.supabase.table('battles').insert({
                     'id': battle_id,
@@ -539,6 +778,7 @@ class SupabaseGameDatabase:
                     'defending_units': defending_units,
                     'status': 'active'
                 }).execute()
+                self.breaker.record_success()
                 
                 if response.data:
                     # Log battle event
@@ -555,13 +795,14 @@ class SupabaseGameDatabase:
                     
             except Exception as e:
                 print(f"Supabase create_battle failed: {e}")
+                self.breaker.record_failure()
                 # Could implement SQLite fallback here if needed
                 
         return battle_id
     
     def complete_battle(self, battle_id: str, result: Dict) -> bool:
         """Complete a battle with results"""
-        if self.use_supabase and self.supabase:
+        if self._supabase_available():
             try:
                 response = self.supabase.table('battles').update({
                     'result': result.get('outcome', {}),
@@ -571,6 +812,7 @@ class SupabaseGameDatabase:
                     'status': 'completed',
                     'completed_at': datetime.now().isoformat()
                 }).eq('id', battle_id).execute()
+                self.breaker.record_success()
                 
                 if response.data:
                     print(f"Battle completed in Supabase: {battle_id}")
@@ -578,6 +820,7 @@ class SupabaseGameDatabase:
                     
             except Exception as e:
                 print(f"Supabase complete_battle failed: {e}")
+                self.breaker.record_failure()
         
         return False
     
@@ -585,7 +828,7 @@ class SupabaseGameDatabase:
         """Send a message with Supabase real-time sync"""
         message_id = str(uuid.uuid4())
         
-        if self.use_supabase and self.supabase:
+        if self._supabase_available():
             try:
                 response = self.supabase.table('messages').insert({
                     'id': message_id,
@@ -595,6 +838,7 @@ class SupabaseGameDatabase:
                     'message_type': message_type,
                     'read': False
                 }).execute()
+                self.breaker.record_success()
                 
                 if response.data:
                     print(f"Message sent via Supabase: {from_empire_id} -> {to_empire_id}")
@@ -602,55 +846,80 @@ class SupabaseGameDatabase:
                     
             except Exception as e:
                 print(f"Supabase send_message failed: {e}")
+                self.breaker.record_failure()
         
         return message_id
     
     def log_game_event(self, empire_id: str, event_type: str, event_data: Dict) -> str:
-        """Log a game event with Supabase real-time sync"""
+        """Log a game event (buffered, written in batches by the event sink)"""
         event_id = str(uuid.uuid4())
         
-        if self.use_supabase and self.supabase:
-            try:
-                response = self.supabase.table('game_events').insert({
-                    'id': event_id,
-                    'empire_id': empire_id,
-                    'event_type': event_type,
-                    'event_data': event_data
-                }).execute()
-                
-                if response.data:
-                    return event_id
-                    
-            except Exception as e:
-                print(f"Supabase log_game_event failed: {e}")
+        self.event_sink.emit('game_events', {
+            'id': event_id,
+            'empire_id': empire_id,
+            'event_type': event_type,
+            'event_data': event_data,
+            'created_at': datetime.now().isoformat()
+        })
         
         return event_id
     
     def log_resource_transaction(self, empire_id: str, transaction_type: str, resources: Dict, reason: str) -> str:
-        """Log a resource transaction with Supabase real-time sync"""
+        """Log a resource transaction (buffered, written in batches by the event sink)"""
         transaction_id = str(uuid.uuid4())
         
-        if self.use_supabase and self.supabase:
+        self.event_sink.emit('resource_transactions', {
+            'id': transaction_id,
+            'empire_id': empire_id,
+            'transaction_type': transaction_type,
+            'resources': resources,
+            'reason': reason,
+            'created_at': datetime.now().isoformat()
+        })
+        
+        return transaction_id
+    
+    def _write_log_batch(self, table: str, rows: List[Dict]):
+        """Event sink writer: one bulk insert per table, SQLite if Supabase is down"""
+        if self._supabase_available():
             try:
-                response = self.supabase.table('resource_transactions').insert({
-                    'id': transaction_id,
-                    'empire_id': empire_id,
-                    'transaction_type': transaction_type,
-                    'resources': resources,
-                    'reason': reason
-                }).execute()
-                
-                if response.data:
-                    return transaction_id
-                    
+                self.supabase.table(table).insert(rows).execute()
+                self.breaker.record_success()
+                return
             except Exception as e:
-                print(f"Supabase log_resource_transaction failed: {e}")
+                print(f"Supabase {table} batch insert failed: {e}")
+                self.breaker.record_failure()
         
-        return transaction_id
+        self._write_log_batch_fallback(table, rows)
+    
+    def _write_log_batch_fallback(self, table: str, rows: List[Dict]):
+        """Bulk insert log rows into the SQLite fallback"""
+        if table == 'game_events':
+            # Event history lives in the segmented event store, not empire_game.db
+            self.event_store.append_many(rows)
+            return
+        
+        columns = list(rows[0].keys())
+        values = [
+            tuple(json.dumps(row[c]) if isinstance(row[c], (dict, list)) else row[c] for c in columns)
+            for row in rows
+        ]
+        
+        conn = self._get_fallback_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            values
+        )
+        conn.commit()
+        conn.close()
     
     def get_recent_events(self, empire_id: str = None, limit: int = 50) -> List[Dict]:
         """Get recent game events"""
-        if self.use_supabase and self.supabase:
+        # Make buffered events visible to the reader
+        self.event_sink.flush()
+        
+        if self._supabase_available():
             try:
                 query = self.supabase.table('game_events').select('*')
                 
@@ -658,27 +927,31 @@ class SupabaseGameDatabase:
                     query = query.eq('empire_id', empire_id)
                 
                 response = query.order('created_at', desc=True).limit(limit).execute()
+                self.breaker.record_success()
                 
                 return response.data if response.data else []
                 
             except Exception as e:
                 print(f"Supabase get_recent_events failed: {e}")
+                self.breaker.record_failure()
         
-        return []
+        return self.event_store.get_recent_events(empire_id, limit)
     
     def link_user_to_empire(self, user_id: str, empire_id: str) -> bool:
         """Link a user to an empire"""
-        if self.use_supabase and self.supabase:
+        if self._supabase_available():
             try:
                 response = self.supabase.table('user_empires').insert({
                     'user_id': user_id,
                     'empire_id': empire_id
                 }).execute()
+                self.breaker.record_success()
                 
                 return bool(response.data)
                 
             except Exception as e:
                 print(f"Supabase link_user_to_empire failed: {e}")
+                self.breaker.record_failure()
         
         return False
 
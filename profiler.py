@@ -0,0 +1,195 @@
+"""
+Empire Builder - Sampling Profiler
+Samples the stacks of the game tick thread, the AI thread and slow requests, and writes
+collapsed-stack files that flamegraph.pl, speedscope or inferno render as flame graphs
+
+Settings:
+    PROFILER_AUTOSTART=1   - sample from startup until stopped
+    PROFILER_INTERVAL      - seconds between samples (default 0.01)
+    PROFILER_OUTPUT_DIR    - where .folded files are written (default profiles)
+    SLOW_REQUEST_SECONDS   - requests at least this slow keep their samples (default 1.0)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_STACK_DEPTH = 64
+
+# Thread name -> capture label; background threads are started with these names
+PROFILED_THREADS = {
+    'resource-tick': 'tick',
+    'ai-manager': 'ai',
+}
+
+
+def _collapse(frame, max_depth: int = MAX_STACK_DEPTH) -> List[str]:
+    """Frames of a stack, outermost first, as 'function (file.py:line)'"""
+    frames = []
+    while frame is not None and len(frames) < max_depth:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler; idle (no thread, no overhead) unless a capture is running"""
+
+    def __init__(self, interval: float = 0.01, output_dir: str = 'profiles',
+                 slow_request_seconds: float = 1.0):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.slow_request_seconds = slow_request_seconds
+        self._lock = threading.Lock()
+        self._stacks: Dict[str, Counter] = {}  # label -> collapsed stack -> samples
+        self._requests: Dict[int, Tuple[str, Counter]] = {}  # thread ident -> (route, samples)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started_at: Optional[float] = None
+        self._capture_until: Optional[float] = None
+        self.samples = 0
+        self.slow_requests = 0
+        self.last_capture: List[str] = []
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: Optional[float] = None, interval: Optional[float] = None) -> Dict[str, Any]:
+        """Begin a capture; with ``duration`` it stops and writes its files by itself"""
+        with self._lock:
+            if self.running:
+                return self.get_status()
+            if interval:
+                self.interval = interval
+            self._stacks = {}
+            self._requests = {}
+            self.samples = 0
+            self.slow_requests = 0
+            self._started_at = time.time()
+            self._capture_until = time.monotonic() + duration if duration else None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, daemon=True, name='profiler')
+            self._thread.start()
+        print(f"🔬 Profiler capture started (every {self.interval * 1000:.0f}ms"
+              f"{f', {duration:g}s' if duration else ''})")
+        return self.get_status()
+
+    def stop(self) -> Dict[str, Any]:
+        """End the capture and write one collapsed-stack file per label"""
+        thread = self._thread
+        if thread is None:
+            return self.get_status()
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join(timeout=5)
+        if self._thread is thread:  # Not already written by a timed capture finishing
+            self._write_capture()
+        return self.get_status()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'started_at': datetime.fromtimestamp(self._started_at).isoformat() if self._started_at else None,
+            'samples': self.samples,
+            'slow_requests': self.slow_requests,
+            'slow_request_seconds': self.slow_request_seconds,
+            'labels': {label: sum(stacks.values()) for label, stacks in self._stacks.items()},
+            'last_capture': self.last_capture
+        }
+
+    # Slow-request hooks, called on the request's own thread
+    def begin_request(self, route: str):
+        if self.running:
+            with self._lock:
+                self._requests[threading.get_ident()] = (route, Counter())
+
+    def end_request(self, elapsed: float):
+        with self._lock:
+            entry = self._requests.pop(threading.get_ident(), None)
+            if entry is None or elapsed < self.slow_request_seconds:
+                return
+            route, stacks = entry
+            merged = self._stacks.setdefault('requests', Counter())
+            for stack, count in stacks.items():
+                merged[f"{route};{stack}"] += count
+            self.slow_requests += 1
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self._capture_until is not None and time.monotonic() >= self._capture_until:
+                self._stop.set()
+                self._write_capture()
+                return
+            self._sample(own)
+
+    def _sample(self, own: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                request_entry = self._requests.get(ident)
+                label = PROFILED_THREADS.get(names.get(ident))
+                if request_entry is None and label is None:
+                    continue
+                stack = ';'.join(_collapse(frame))
+                if request_entry is not None:
+                    request_entry[1][stack] += 1
+                else:
+                    self._stacks.setdefault(label, Counter())[stack] += 1
+            self.samples += 1
+
+    def _write_capture(self):
+        with self._lock:
+            stacks, self._stacks = self._stacks, {}
+            self._requests = {}
+            self._thread = None
+        if not stacks:
+            self.last_capture = []
+            print("🔬 Profiler capture stopped, nothing sampled")
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        paths = []
+        for label, counter in sorted(stacks.items()):
+            path = os.path.join(self.output_dir, f"{stamp}-{label}.folded")
+            with open(path, 'w') as f:
+                for stack, count in counter.most_common():
+                    f.write(f"{label};{stack} {count}\n")
+            paths.append(path)
+        self.last_capture = paths
+        print(f"🔬 Profiler capture written: {', '.join(paths)}")
+
+    def init_app(self, app):
+        """Sample requests while a capture runs; keep only the slow ones"""
+        from flask import g, request
+
+        @app.before_request
+        def _profile_request_start():
+            g.profile_started = time.perf_counter()
+            rule = request.url_rule.rule if request.url_rule else request.path
+            self.begin_request(f"{request.method} {rule}")
+
+        @app.teardown_request
+        def _profile_request_end(error=None):
+            started = g.pop('profile_started', None)
+            if started is not None:
+                self.end_request(time.perf_counter() - started)
+
+
+profiler = SamplingProfiler(
+    interval=float(os.environ.get('PROFILER_INTERVAL', 0.01)),
+    output_dir=os.environ.get('PROFILER_OUTPUT_DIR', 'profiles'),
+    slow_request_seconds=float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+)
@@ -0,0 +1,144 @@
+"""
+Empire Builder - Query Tracing
+Records every database call a request makes, warns about routes over their query budget
+and repeated calls that look like N+1 loops
+
+Settings:
+    QUERY_BUDGET         - calls a route may make before it is reported (default 10)
+    QUERY_REPEAT_LIMIT   - times one method may run per request before it is reported as N+1 (default 5)
+    QUERY_TRACE_HEADER=1 - add X-Query-Trace and Server-Timing headers to responses (always on in debug)
+"""
+
+import os
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, g, has_request_context, request
+
+import metrics
+
+DEFAULT_QUERY_BUDGET = 10
+DEFAULT_REPEAT_LIMIT = 5
+WARNING_INTERVAL = 60.0  # Seconds between repeated warnings for the same route
+MAX_HEADER_CALLS = 20  # Distinct methods listed in X-Query-Trace
+
+
+def query_budget(limit: int):
+    """Override the query budget for one route"""
+    def decorator(f: Callable) -> Callable:
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+class QueryTrace:
+    """Database calls made while serving one request"""
+
+    def __init__(self):
+        # (database, method, seconds, failed, nested); nested calls ran inside another traced call
+        self.calls: List[Tuple[str, str, float, bool, bool]] = []
+        self.started = time.perf_counter()
+
+    def record(self, database: str, method: str, seconds: float, error: Optional[BaseException],
+               nested: bool = False):
+        self.calls.append((database, method, seconds, error is not None, nested))
+
+    @property
+    def count(self) -> int:
+        return len(self.calls)
+
+    @property
+    def nested_count(self) -> int:
+        return sum(1 for call in self.calls if call[4])
+
+    @property
+    def total_seconds(self) -> float:
+        # A nested call's time is already inside its caller's
+        return sum(call[2] for call in self.calls if not call[4])
+
+    def by_method(self) -> List[Tuple[str, int, float]]:
+        """(database.method, calls, seconds), most called first"""
+        counts: Counter = Counter()
+        seconds: Dict[str, float] = {}
+        for database, method, elapsed, _, _ in self.calls:
+            key = f"{database}.{method}"
+            counts[key] += 1
+            seconds[key] = seconds.get(key, 0.0) + elapsed
+        return [(key, count, seconds[key]) for key, count in counts.most_common()]
+
+    def summary(self, limit: int = MAX_HEADER_CALLS) -> str:
+        nested = f" ({self.nested_count} nested)" if self.nested_count else ''
+        parts = [f"{self.count} calls{nested} {self.total_seconds * 1000:.1f}ms"]
+        parts.extend(f"{key} x{count} {elapsed * 1000:.1f}ms" for key, count, elapsed in self.by_method()[:limit])
+        return '; '.join(parts)
+
+
+class QueryTracer:
+    """Flask hooks that attach a QueryTrace to each request and report it afterwards"""
+
+    def __init__(self, budget: Optional[int] = None, repeat_limit: Optional[int] = None,
+                 header: Optional[bool] = None):
+        self.budget = budget if budget is not None else int(os.environ.get('QUERY_BUDGET', DEFAULT_QUERY_BUDGET))
+        self.repeat_limit = (repeat_limit if repeat_limit is not None
+                             else int(os.environ.get('QUERY_REPEAT_LIMIT', DEFAULT_REPEAT_LIMIT)))
+        self.header = header if header is not None else os.environ.get('QUERY_TRACE_HEADER') == '1'
+        self._last_warning: Dict[str, float] = {}
+
+    def init_app(self, app: Flask):
+        app.before_request(self._start_trace)
+        app.after_request(self._finish_trace)
+        metrics.db_call_observers.append(self._observe)
+
+    def _start_trace(self):
+        g.query_trace = QueryTrace()
+
+    def _observe(self, database: str, method: str, seconds: float, error: Optional[BaseException]):
+        if not has_request_context():
+            return
+        trace = g.get('query_trace')
+        if trace is not None:
+            # Calls made inside another traced call still count (create_battle -> get_empire is
+            # a query storm too); depth only keeps their time from being added twice
+            trace.record(database, method, seconds, error, nested=metrics.call_depth() > 0)
+
+    def _route_budget(self) -> int:
+        view = current_app.view_functions.get(request.endpoint)
+        return getattr(view, 'query_budget', self.budget)
+
+    def _finish_trace(self, response):
+        trace = g.pop('query_trace', None)
+        if trace is None or request.endpoint in (None, 'static'):
+            return response
+
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        problems = []
+        budget = self._route_budget()
+        if trace.count > budget:
+            problems.append(f"{trace.count} database calls (budget {budget})")
+        repeated = [f"{key} x{count}" for key, count, _ in trace.by_method() if count > self.repeat_limit]
+        if repeated:
+            problems.append(f"possible N+1: {', '.join(repeated)}")
+
+        if problems and self._should_warn(route):
+            print(f"⚠️ Query budget: {route}: {'; '.join(problems)}")
+            print(f"   {trace.summary()}")
+
+        if self.header or current_app.debug:
+            response.headers['X-Query-Trace'] = trace.summary()
+            response.headers['Server-Timing'] = (
+                f'db;dur={trace.total_seconds * 1000:.1f};desc="{trace.count} calls", '
+                f'app;dur={(time.perf_counter() - trace.started) * 1000:.1f}'
+            )
+        return response
+
+    def _should_warn(self, route: str) -> bool:
+        now = time.monotonic()
+        last = self._last_warning.get(route)
+        if last is not None and now - last < WARNING_INTERVAL:
+            return False
+        self._last_warning[route] = now
+        return True
+
+
+query_tracer = QueryTracer()
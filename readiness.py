@@ -0,0 +1,78 @@
+"""
+Empire Builder - Readiness
+Post-bind warm-up of the storage backends, reported by the /readyz probe
+
+Importing app.py connects to nothing: the game, auth and alliance databases connect and
+create their schema on first use. initialize_game() starts warm_up() in a thread as the
+server comes up, so the first players do not pay for it, and /readyz answers 503 until
+every check has run. A request that arrives earlier still works; it waits on the same
+one-time initialization instead of racing it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+
+PENDING, WARMING, READY, FAILED = 'pending', 'warming', 'ready', 'failed'
+
+WARMUP_SECONDS = metrics.registry.gauge('empire_warmup_seconds', 'Time each post-bind warm-up check took', ('check',))
+READY_GAUGE = metrics.registry.gauge('empire_ready', 'Every post-bind warm-up check has completed')
+
+
+class Readiness:
+    """Named warm-up checks, run once in order on a background thread"""
+
+    def __init__(self):
+        self._checks: OrderedDict = OrderedDict()  # name -> warm-up callable
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, name: str, warm: Callable[[], Any]):
+        """Register a check; ``warm`` should be idempotent, since first use may have run it already"""
+        with self._lock:
+            self._checks[name] = warm
+            self._status[name] = {'state': PENDING}
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """Run every check once; later calls are no-ops"""
+        with self._lock:
+            if self._thread is not None:
+                return self._thread
+            self._thread = threading.Thread(target=self._run, daemon=True, name='warm-up')
+        if not background:
+            self._run()
+            return None
+        self._thread.start()
+        return self._thread
+
+    def _run(self):
+        started = time.perf_counter()
+        for name, warm in list(self._checks.items()):
+            self._status[name] = {'state': WARMING}
+            check_started = time.perf_counter()
+            try:
+                warm()
+                self._status[name] = {'state': READY}
+            except Exception as e:
+                self._status[name] = {'state': FAILED, 'error': f"{type(e).__name__}: {e}"}
+                print(f"❌ Warm-up check {name} failed: {e}")
+            seconds = time.perf_counter() - check_started
+            self._status[name]['seconds'] = round(seconds, 3)
+            WARMUP_SECONDS.set(seconds, check=name)
+        print(f"🔥 Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+    @property
+    def ready(self) -> bool:
+        return all(status['state'] == READY for status in self._status.values())
+
+    def status(self) -> Dict[str, Any]:
+        return {'ready': self.ready, 'checks': {name: dict(status) for name, status in self._status.items()}}
+
+
+# Global readiness tracker
+readiness = Readiness()
+READY_GAUGE.set_function(lambda: readiness.ready)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - Headless World Simulator
+Runs the economy, AI and battles on a virtual clock for load and balance testing
+
+Usage:
+    python simulator.py --empires 10000 --days 30
+    python simulator.py --empires 200 --ticks 500 --seed 7
+    python simulator.py --empires 10000 --days 30 --storage memory
+    python simulator.py --empires 1000 --days 7 --storage durable --db world.db
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, Optional
+
+from models import GameDatabase, apply_resource_tick
+from storage import GameStorage, MemoryGameDatabase
+from world_store import DurableGameDatabase
+from ai_system import AIManager
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+ECONOMY_INTERVAL = 60  # resource_generation_loop sleeps 60s
+AI_INTERVAL = 30       # AIManager._ai_loop sleeps 30s
+STORAGE_BACKENDS = ['sqlite', 'memory', 'durable']
+
+
+class VirtualClock:
+    """Clock the simulator advances by hand instead of sleeping"""
+
+    def __init__(self, start: float = None):
+        self.now = start if start is not None else time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class CountingDatabase:
+    """Wraps a game database and counts calls per public method"""
+
+    def __init__(self, db: GameStorage):
+        self._db = db
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if callable(attr) and not name.startswith('_'):
+            def counted(*args, **kwargs):
+                self.calls[name] += 1
+                return attr(*args, **kwargs)
+            return counted
+        return attr
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class WorldSimulator:
+    """Drives a game database, BattleSystem and AIPlayer without Flask or real sleeps"""
+
+    def __init__(self, empire_count: int, db_path: str, seed: int = None,
+                 economy_interval: int = ECONOMY_INTERVAL, ai_interval: int = AI_INTERVAL,
+                 storage: str = 'sqlite'):
+        self.empire_count = empire_count
+        self.economy_interval = economy_interval
+        self.ai_interval = ai_interval
+        self.random = random.Random(seed)
+        if seed is not None:
+            random.seed(seed)  # BattleSystem and AIPlayer draw from the global RNG
+
+        self.clock = VirtualClock(start=0.0)
+        self.storage = storage
+        self.db = CountingDatabase(open_storage(storage, db_path))
+        self.ai_manager = AIManager(clock=self.clock)
+
+        self.economy_ticks = 0
+        self.ai_cycles = 0
+        self.actions = Counter()
+
+    def populate(self):
+        """Create the AI world"""
+        for i in range(self.empire_count):
+            lat = self.random.uniform(-60, 70)
+            lng = self.random.uniform(-180, 180)
+            empire_id = self.db.create_empire(f"Sim Empire {i}", f"Sim Ruler {i}", lat, lng)
+            difficulty = self.random.choice(["easy", "normal", "hard"])
+            self.ai_manager.add_ai_player(empire_id, difficulty)
+
+        self.db.calls.clear()
+
+    def economy_tick(self):
+        """One pass of resource_generation_loop"""
+        for empire in self.db.get_all_empires():
+            apply_resource_tick(empire, self.db.calculate_building_production(empire))
+            self.db.update_empire(empire)
+        self.economy_ticks += 1
+
+    def ai_cycle(self):
+        """One pass of AIManager._ai_loop"""
+        for decision in self.ai_manager.run_cycle(self.db):
+            self.actions[decision['action']] += 1
+        self.ai_cycles += 1
+
+    def run(self, ticks: int) -> Dict[str, Any]:
+        """Run ``ticks`` economy ticks (and the AI cycles between them) as fast as possible"""
+        next_economy = self.economy_interval
+        next_ai = self.ai_interval
+
+        tracemalloc.start()
+        started = time.perf_counter()
+
+        # Game code prints on every update; keep the report readable
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            while self.economy_ticks < ticks:
+                self.clock.now = min(next_economy, next_ai)
+
+                if self.clock.now >= next_ai:
+                    self.ai_cycle()
+                    next_ai += self.ai_interval
+
+                if self.clock.now >= next_economy:
+                    self.economy_tick()
+                    next_economy += self.economy_interval
+
+        wall_seconds = time.perf_counter() - started
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return self._report(wall_seconds, peak_traced)
+
+    def _report(self, wall_seconds: float, peak_traced: int) -> Dict[str, Any]:
+        db_ops = self.db.total_calls
+        max_rss_mb = None
+        if resource is not None:
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+            max_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+
+        return {
+            'storage': self.storage,
+            'empires': self.empire_count,
+            'economy_ticks': self.economy_ticks,
+            'ai_cycles': self.ai_cycles,
+            'simulated_days': round(self.clock.now / 86400, 2),
+            'wall_seconds': round(wall_seconds, 3),
+            'ticks_per_sec': round(self.economy_ticks / wall_seconds, 2) if wall_seconds else None,
+            'speedup': round(self.clock.now / wall_seconds, 1) if wall_seconds else None,
+            'db_ops': db_ops,
+            'db_ops_per_tick': round(db_ops / self.economy_ticks, 1) if self.economy_ticks else 0,
+            'db_ops_by_method': dict(self.db.calls),
+            'ai_actions': dict(self.actions),
+            'peak_python_mb': round(peak_traced / (1024 * 1024), 1),
+            'max_rss_mb': max_rss_mb
+        }
+
+
+def open_storage(storage: str, db_path: str) -> GameStorage:
+    """Game database for a --storage choice"""
+    if storage == 'memory':
+        return MemoryGameDatabase()
+    if storage == 'durable':
+        # Write-ahead log and snapshots go in a directory beside the database path
+        return DurableGameDatabase(os.path.splitext(db_path)[0] + '_world')
+    return GameDatabase(db_path)
+
+
+def run_simulation(empires: int, ticks: int, seed: Optional[int] = None,
+                   db_path: str = None, storage: str = 'sqlite') -> Dict[str, Any]:
+    """Build a fresh world, run it and return the report"""
+    temp_dir = None
+    if db_path is None:
+        temp_dir = tempfile.mkdtemp(prefix='empire_sim_')
+        db_path = os.path.join(temp_dir, 'simulation.db')
+
+    try:
+        simulator = WorldSimulator(empires, db_path, seed=seed, storage=storage)
+        try:
+            simulator.populate()
+            return simulator.run(ticks)
+        finally:
+            if storage == 'durable':
+                simulator.db.close()
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Empire Builder world simulator")
+    parser.add_argument('--empires', type=int, default=100, help="number of AI empires")
+    parser.add_argument('--days', type=float, help="simulated days to run")
+    parser.add_argument('--ticks', type=int, help="economy ticks to run (overrides --days)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for a reproducible world")
+    parser.add_argument('--db', default=None, help="database file to keep (default: temporary)")
+    parser.add_argument('--storage', choices=STORAGE_BACKENDS, default='sqlite',
+                        help="game database backend (memory: storage.MemoryGameDatabase, "
+                             "durable: world_store.DurableGameDatabase beside --db)")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.ticks is not None:
+        ticks = args.ticks
+    else:
+        ticks = int((args.days or 1) * 86400 / ECONOMY_INTERVAL)
+
+    print(f"🌍 Simulating {args.empires} empires for {ticks} ticks...")
+    report = run_simulation(args.empires, ticks, seed=args.seed, db_path=args.db, storage=args.storage)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("📊 Simulation report")
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Empire Builder - Socket.IO Message Queue
+Shares Socket.IO emits between web workers through Redis or a local SQLite queue
+"""
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    from socketio import AsyncPubSubManager, AsyncRedisManager, PubSubManager
+except ImportError:  # python-socketio ships with Flask-SocketIO
+    AsyncPubSubManager = AsyncRedisManager = PubSubManager = None
+
+SQLITE_SCHEME = 'sqlite://'
+
+
+class SQLiteMessageQueue:
+    """Append-only table that every worker polls; stands in for Redis pub/sub on one host.
+
+    Messages are pickled like python-socketio's Redis manager does, so binary payloads
+    (MessagePack room emits) travel the same way as JSON ones.
+    """
+
+    def __init__(self, path: str = 'socketio_queue.db', channel: str = 'socketio',
+                 poll_interval: float = 0.02, retention_seconds: float = 60.0):
+        self.path = path
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')  # Readers never block the publisher
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS socketio_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_socketio_messages_created ON socketio_messages(created_at)')
+        conn.commit()
+        conn.close()
+
+    def publish(self, message: Dict[str, Any]) -> int:
+        """Append a message for every listener; returns its sequence number"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                'INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)',
+                (self.channel, pickle.dumps(message), time.time())
+            )
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def listen(self, from_start: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield messages published after this call (or everything retained with ``from_start``)"""
+        conn = self._connect()
+        last_id = 0
+        if not from_start:
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM socketio_messages').fetchone()[0]
+        last_prune = time.time()
+
+        try:
+            while True:
+                rows = conn.execute('''
+                    SELECT id, payload FROM socketio_messages
+                    WHERE id > ? AND channel = ?
+                    ORDER BY id
+                ''', (last_id, self.channel)).fetchall()
+
+                for message_id, payload in rows:
+                    last_id = message_id
+                    try:
+                        message = pickle.loads(payload)
+                    except Exception:
+                        continue  # JSON row from before the pickle format; expires with retention
+                    yield message
+
+                if time.time() - last_prune > self.retention_seconds:
+                    self.prune(conn)
+                    last_prune = time.time()
+
+                if not rows:
+                    time.sleep(self.poll_interval)
+        finally:
+            conn.close()
+
+    def prune(self, conn: Optional[sqlite3.Connection] = None):
+        """Drop messages older than the retention window; every live listener has read them"""
+        own = conn is None
+        conn = conn or self._connect()
+        try:
+            conn.execute('DELETE FROM socketio_messages WHERE created_at < ?',
+                         (time.time() - self.retention_seconds,))
+            conn.commit()
+        except sqlite3.OperationalError:
+            pass  # Another worker holds the write lock; it will prune
+        finally:
+            if own:
+                conn.close()
+
+
+def sqlite_queue_path(url: str) -> str:
+    """sqlite:///relative/queue.db or sqlite:////absolute/queue.db -> filesystem path"""
+    path = url[len(SQLITE_SCHEME):]
+    if path.startswith('/'):
+        path = path[1:]
+    return path or 'socketio_queue.db'
+
+
+if PubSubManager is not None:
+    class SQLitePubSubManager(PubSubManager):
+        """python-socketio client manager backed by SQLiteMessageQueue"""
+
+        name = 'sqlite'
+
+        def __init__(self, url: str = 'sqlite:///socketio_queue.db', channel: str = 'flask-socketio',
+                     write_only: bool = False, logger=None):
+            super().__init__(channel=channel, write_only=write_only, logger=logger)
+            self.queue = SQLiteMessageQueue(sqlite_queue_path(url), channel=channel)
+
+        def _publish(self, data):
+            return self.queue.publish(data)
+
+        def _listen(self):
+            yield from self.queue.listen()
+
+
+if AsyncPubSubManager is not None:
+    class AsyncSQLitePubSubManager(AsyncPubSubManager):
+        """AsyncServer client manager backed by SQLiteMessageQueue, for the ASGI entry point"""
+
+        name = 'sqlite'
+
+        def __init__(self, url: str = 'sqlite:///socketio_queue.db', channel: str = 'flask-socketio',
+                     write_only: bool = False, logger=None):
+            super().__init__(channel=channel, write_only=write_only, logger=logger)
+            self.queue = SQLiteMessageQueue(sqlite_queue_path(url), channel=channel)
+            # The listener holds one SQLite connection, which must stay on one thread
+            self._listen_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='socketio-queue')
+
+        async def _publish(self, data):
+            return await asyncio.to_thread(self.queue.publish, data)
+
+        async def _listen(self):
+            loop = asyncio.get_running_loop()
+            listener = self.queue.listen()
+            while True:
+                yield await loop.run_in_executor(self._listen_executor, next, listener)
+
+
+def socketio_queue_options(url: Optional[str] = None) -> Dict[str, Any]:
+    """SocketIO() keyword arguments for the configured message queue.
+
+    SOCKETIO_MESSAGE_QUEUE=redis://host:6379/0 uses Flask-SocketIO's Redis manager,
+    sqlite:///socketio_queue.db uses the local SQLite queue, unset keeps a single process.
+    """
+    url = url if url is not None else os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return {}
+
+    if url.startswith(SQLITE_SCHEME):
+        if PubSubManager is None:
+            raise RuntimeError("SQLite Socket.IO queue needs python-socketio")
+        print(f"📡 Socket.IO message queue: {url}")
+        return {'client_manager': SQLitePubSubManager(url)}
+
+    print(f"📡 Socket.IO message queue: {url.split('@')[-1]}")
+    return {'message_queue': url}
+
+
+def async_client_manager(url: Optional[str] = None):
+    """AsyncServer client manager for the configured message queue, or None for a single process.
+
+    Uses the same channel as Flask-SocketIO, so threaded and ASGI workers share one queue.
+    """
+    url = url if url is not None else os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return None
+    if AsyncPubSubManager is None:
+        raise RuntimeError("Socket.IO message queue needs python-socketio")
+
+    if url.startswith(SQLITE_SCHEME):
+        print(f"📡 Socket.IO message queue: {url}")
+        return AsyncSQLitePubSubManager(url)
+
+    print(f"📡 Socket.IO message queue: {url.split('@')[-1]}")
+    return AsyncRedisManager(url, channel='flask-socketio')
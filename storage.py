@@ -0,0 +1,185 @@
+"""
+Empire Builder - Game Storage
+The interface every game database implements, and an in-memory engine
+
+GameDatabase (SQLite), SupabaseGameDatabase and ElectricGameDatabase all provide
+GameStorage, so the app, the AI, the simulator and the benchmarks can run on any of them.
+Game rules live in the apply_* functions in models.py; a backend only loads and saves.
+
+MemoryGameDatabase keeps empires in a dict: tests, simulations and single-node servers run
+at memory speed, and save_snapshot()/load_snapshot() write the world to a JSON file.
+"""
+
+import json
+import os
+import threading
+import uuid
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Optional, Protocol, runtime_checkable
+
+from models import (
+    BUILDING_TYPES, STARTING_LAND, STARTING_RESOURCES, Empire,
+    apply_build_building, apply_build_city, apply_buy_land, building_production
+)
+
+SNAPSHOT_FORMAT = 1
+STARTING_MILITARY = {'infantry': 100, 'tanks': 10, 'aircraft': 5, 'ships': 8}
+
+
+@runtime_checkable
+class GameStorage(Protocol):
+    """Empire persistence shared by every backend.
+
+    Reads return detached Empire objects: changes reach the backend only through
+    update_empire or one of the actions, which apply the rule and save in one call.
+    """
+
+    def create_empire(self, name: str, ruler: str, lat: float, lng: float) -> str: ...
+
+    def get_empire(self, empire_id: str) -> Optional[Empire]: ...
+
+    def get_all_empires(self) -> List[Empire]: ...
+
+    def update_empire(self, empire: Empire) -> bool: ...
+
+    def build_city(self, empire: Empire, city_type: str, city_name: str) -> bool: ...
+
+    def build_building(self, empire: Empire, city_id: str, building_type: str) -> bool: ...
+
+    def buy_land(self, empire: Empire, acres: int) -> bool: ...
+
+    def calculate_building_production(self, empire: Empire) -> Dict[str, int]: ...
+
+
+def copy_empire(empire: Empire) -> Empire:
+    """Copy an empire deep enough that neither side sees the other's changes"""
+    return Empire(
+        id=empire.id,
+        name=empire.name,
+        ruler=empire.ruler,
+        land=empire.land,
+        resources=dict(empire.resources),
+        military=dict(empire.military),
+        location=dict(empire.location),
+        last_update=empire.last_update,
+        is_ai=empire.is_ai,
+        cities={city_id: dict(city, buildings=dict(city.get('buildings', {})))
+                for city_id, city in empire.cities.items()},
+        buildings=dict(empire.buildings),
+        version=empire.version
+    )
+
+
+class MemoryGameDatabase:
+    """GameStorage held in process memory, with optional snapshots to disk"""
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path
+        self._empires: Dict[str, Empire] = {}
+        self._lock = threading.RLock()
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+
+    def create_empire(self, name: str, ruler: str, lat: float, lng: float) -> str:
+        empire = self._new_empire(name, ruler, lat, lng)
+        with self._lock:
+            self._empires[empire.id] = empire
+        return empire.id
+
+    def _new_empire(self, name: str, ruler: str, lat: float, lng: float) -> Empire:
+        return Empire(
+            id=str(uuid.uuid4()),
+            name=name,
+            ruler=ruler,
+            land=STARTING_LAND,
+            resources=dict(STARTING_RESOURCES),
+            military=dict(STARTING_MILITARY),
+            location={'lat': lat, 'lng': lng},
+            last_update=datetime.now().isoformat(),
+            buildings={building_type: 0 for building_type in BUILDING_TYPES.keys()},
+            version=0
+        )
+
+    def get_empire(self, empire_id: str) -> Optional[Empire]:
+        with self._lock:
+            empire = self._empires.get(empire_id)
+            return copy_empire(empire) if empire else None
+
+    def get_all_empires(self) -> List[Empire]:
+        with self._lock:
+            return [copy_empire(empire) for empire in self._empires.values()]
+
+    def update_empire(self, empire: Empire) -> bool:
+        with self._lock:
+            stored = self._empires.get(empire.id)
+            if stored is None:
+                return False
+            updated = copy_empire(empire)
+            updated.last_update = datetime.now().isoformat()
+            updated.version = (stored.version or 0) + 1  # Same contract as the SQLite trigger
+            self._empires[empire.id] = updated
+        return True
+
+    def build_city(self, empire: Empire, city_type: str, city_name: str) -> bool:
+        """Found a city and save the empire"""
+        if not apply_build_city(empire, city_name, city_type):
+            return False
+        return self.update_empire(empire)
+
+    def build_building(self, empire: Empire, city_id: str, building_type: str) -> bool:
+        """Add a building to a city and save the empire"""
+        if not apply_build_building(empire, city_id, building_type):
+            return False
+        return self.update_empire(empire)
+
+    def buy_land(self, empire: Empire, acres: int) -> bool:
+        """Buy land and save the empire"""
+        if not apply_buy_land(empire, acres):
+            return False
+        return self.update_empire(empire)
+
+    def calculate_building_production(self, empire: Empire) -> Dict[str, int]:
+        """Per-tick production of the empire's buildings"""
+        return building_production(empire)
+
+    # Snapshots
+
+    def save_snapshot(self, path: Optional[str] = None) -> str:
+        """Write every empire to ``path`` (default: snapshot_path), replacing it atomically"""
+        path = path or self.snapshot_path
+        if not path:
+            raise ValueError("No snapshot path given")
+
+        with self._lock:
+            empires = [asdict(empire) for empire in self._empires.values()]
+        snapshot = {
+            'format': SNAPSHOT_FORMAT,
+            'saved_at': datetime.now().isoformat(),
+            'empires': empires
+        }
+
+        # Write beside the target and rename, so a crash never leaves half a snapshot
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return path
+
+    def load_snapshot(self, path: Optional[str] = None) -> int:
+        """Replace the world with the snapshot at ``path``; returns the number of empires"""
+        path = path or self.snapshot_path
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+        if snapshot.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {snapshot.get('format')}")
+
+        empires = {data['id']: Empire(**data) for data in snapshot['empires']}
+        with self._lock:
+            self._empires = empires
+        return len(empires)
+
+    def __len__(self) -> int:
+        return len(self._empires)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Empire Builder - Alliance Treasury Stress Check
+Hammers contribute_to_treasury / withdraw_from_treasury from many threads and checks the books balance
+
+Usage:
+    python stress_treasury.py
+    python stress_treasury.py --threads 32 --transfers 200 --checkpoint-every 50
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, List
+
+RESOURCES = ['gold', 'food', 'iron', 'oil']
+
+
+def _totals(db_path: str, alliance_id: str) -> Dict[str, int]:
+    """Resources held by all empires plus the alliance treasury"""
+    conn = sqlite3.connect(db_path)
+    totals = {}
+    for resource in RESOURCES:
+        empire_total = conn.execute(
+            f"SELECT COALESCE(SUM(json_extract(resources, '$.{resource}')), 0) FROM empires"
+        ).fetchone()[0]
+        treasury = conn.execute(
+            f"SELECT treasury_{resource} FROM alliances WHERE id = ?", (alliance_id,)
+        ).fetchone()[0]
+        totals[resource] = empire_total + treasury
+    conn.close()
+    return totals
+
+
+def run_stress(threads: int, transfers: int, empires: int, checkpoint_every: int, seed: int) -> Dict[str, Any]:
+    """Run concurrent transfers in a scratch directory and return the report"""
+    temp_dir = tempfile.mkdtemp(prefix='empire_treasury_')
+    previous_cwd = os.getcwd()
+    os.chdir(temp_dir)  # AllianceDatabase always opens empire_game.db in the working directory
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            from models import GameDatabase
+            import alliance_system
+            alliance_system.TREASURY_CHECKPOINT_EVERY = checkpoint_every
+
+            game_db = GameDatabase('empire_game.db')
+            alliance_db = alliance_system.AllianceDatabase()
+
+            empire_ids = [game_db.create_empire(f"Stress Empire {i}", f"Ruler {i}", 0, 0) for i in range(empires)]
+            leader_id = empire_ids[0]
+            alliance_id = alliance_db.create_alliance("Stress Alliance", "STRS", "", leader_id)
+            for empire_id in empire_ids[1:]:
+                invite_id = alliance_db.invite_to_alliance(alliance_id, empire_id, leader_id)
+                alliance_db.respond_to_invite(invite_id, True)
+
+        before = _totals('empire_game.db', alliance_id)
+        outcomes = Counter()
+        contributed = Counter()
+        lock = threading.Lock()
+        errors: List[str] = []
+
+        def worker(worker_id: int):
+            rng = random.Random(seed + worker_id)
+            for _ in range(transfers):
+                empire_id = rng.choice(empire_ids)
+                # Amounts large enough that some transfers must be refused
+                amounts = {resource: rng.randint(0, 400) for resource in RESOURCES}
+                try:
+                    if rng.random() < 0.8:
+                        ok = alliance_db.contribute_to_treasury(alliance_id, empire_id, **amounts)
+                        kind = 'contribution'
+                    else:
+                        ok = alliance_db.withdraw_from_treasury(alliance_id, empire_id, leader_id, **amounts)
+                        kind = 'withdrawal'
+                except Exception as e:  # Any exception is a failure of the check
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                with lock:
+                    outcomes[f"{kind}_{'ok' if ok else 'refused'}"] += 1
+                    if ok and kind == 'contribution':
+                        contributed.update(amounts)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+        elapsed = time.perf_counter() - started
+
+        after = _totals('empire_game.db', alliance_id)
+        conn = sqlite3.connect('empire_game.db')
+        unbalanced = conn.execute('''
+            SELECT COUNT(*) FROM (
+                SELECT transfer_id, resource FROM alliance_treasury_ledger
+                GROUP BY transfer_id, resource HAVING SUM(amount) != 0
+            )
+        ''').fetchone()[0]
+        negative = 0
+        for resource in RESOURCES:
+            negative += conn.execute(
+                f"SELECT COUNT(*) FROM empires WHERE json_extract(resources, '$.{resource}') < 0"
+            ).fetchone()[0]
+            negative += conn.execute(
+                f"SELECT COUNT(*) FROM alliances WHERE treasury_{resource} < 0"
+            ).fetchone()[0]
+        recorded_contributions = dict(zip(RESOURCES, conn.execute(
+            'SELECT SUM(contribution_gold), SUM(contribution_food), SUM(contribution_iron), '
+            'SUM(contribution_oil) FROM alliance_members WHERE alliance_id = ?', (alliance_id,)
+        ).fetchone()))
+        checkpoints = conn.execute(
+            'SELECT MAX(ledger_id) FROM alliance_treasury_checkpoints WHERE alliance_id = ?', (alliance_id,)
+        ).fetchone()[0]
+        conn.close()
+
+        checks = {
+            'no_errors': not errors,
+            'resources_conserved': before == after,
+            'ledger_balanced': unbalanced == 0,
+            'no_negative_balances': negative == 0,
+            'ledger_matches_treasury': alliance_db.verify_treasury(alliance_id),
+            'contributions_recorded': all(recorded_contributions[r] == contributed[r] for r in RESOURCES)
+        }
+
+        attempts = threads * transfers
+        return {
+            'threads': threads,
+            'attempts': attempts,
+            'outcomes': dict(outcomes),
+            'wall_seconds': round(elapsed, 3),
+            'transfers_per_sec': round(attempts / elapsed, 1) if elapsed else None,
+            'last_checkpoint_ledger_id': checkpoints,
+            'errors': errors[:5],
+            'checks': checks,
+            'passed': all(checks.values())
+        }
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent alliance treasury stress check")
+    parser.add_argument('--threads', type=int, default=16, help="concurrent worker threads")
+    parser.add_argument('--transfers', type=int, default=100, help="transfers attempted per thread")
+    parser.add_argument('--empires', type=int, default=8, help="alliance members to draw from")
+    parser.add_argument('--checkpoint-every', type=int, default=100,
+                        help="ledger entries between balance checkpoints")
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    print(f"🏦 Running {args.threads} threads x {args.transfers} treasury transfers...")
+    report = run_stress(args.threads, args.transfers, args.empires, args.checkpoint_every, args.seed)
+
+    for key, value in report.items():
+        if key != 'checks':
+            print(f"  {key}: {value}")
+    for name, ok in report['checks'].items():
+        print(f"  {'✅' if ok else '❌'} {name}")
+
+    sys.exit(0 if report['passed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
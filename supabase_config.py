@@ -5,11 +5,14 @@ Real-time database with PostgreSQL backend
 
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
 import json
 from datetime import datetime
 
+if TYPE_CHECKING:
+    # The SDK (gotrue, httpx, trio) takes ~300ms to import; it loads on first connect instead
+    from supabase import Client
+
 # Load environment variables from .env file (override system env vars)
 load_dotenv(override=True)
 
@@ -23,7 +26,7 @@ class SupabaseConfig:
         self.service_key = os.getenv('SUPABASE_SERVICE_KEY', 'your-service-key-here')
         
         # Initialize client
-        self.client: Client = None
+        self.client: 'Client' = None
         self.is_connected = False
         
     def initialize(self) -> bool:
@@ -41,7 +44,7 @@ class SupabaseConfig:
                 return False
             
             print(f"🔗 Connecting to Supabase: {self.url}")
-            self.client = create_client(self.url, self.key)
+            self.client = _create_client(self.url, self.key)
             
             # Test connection with a simple query
             print("🧪 Testing Supabase connection...")
@@ -56,25 +59,30 @@ class SupabaseConfig:
             self.is_connected = False
             return False
     
-    def get_client(self) -> Client:
+    def get_client(self) -> 'Client':
         """Get Supabase client"""
         if not self.is_connected:
             self.initialize()
         return self.client
 
+def _create_client(url: str, key: str) -> 'Client':
+    """Create a Supabase client, importing the SDK on first use"""
+    from supabase import create_client
+    return create_client(url, key)
+
 # Global Supabase configuration
 supabase_config = SupabaseConfig()
 
-def get_supabase_client() -> Client:
+def get_supabase_client() -> 'Client':
     """Get configured Supabase client"""
     return supabase_config.get_client()
 
-def get_supabase_service_client() -> Client:
+def get_supabase_service_client() -> 'Client':
     """Get Supabase client with service role key for admin operations"""
     try:
         url = os.getenv('SUPABASE_URL', 'https://your-project.supabase.co')
         service_key = os.getenv('SUPABASE_SERVICE_KEY', 'your-service-key-here')
-        return create_client(url, service_key)
+        return _create_client(url, service_key)
     except Exception as e:
         print(f"Failed to create service client: {e}")
         return None
@@ -18,9 +18,13 @@ CREATE TABLE IF NOT EXISTS empires (
     cities JSONB DEFAULT '{}',
     buildings JSONB DEFAULT '{"farm": 0, "mine": 0, "oil_well": 0, "bank": 0, "factory": 0, "barracks": 0, "research_lab": 0, "hospital": 0}',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    version BIGINT NOT NULL DEFAULT 0
 );
 
+-- Existing deployments: add the version counter used for HTTP ETags
+ALTER TABLE empires ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
 -- Battles table - real-time battle tracking
 CREATE TABLE IF NOT EXISTS battles (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -98,12 +102,27 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+-- Every update (app writes and update_empire_resources) moves the empire to a new version
+CREATE OR REPLACE FUNCTION bump_empire_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version = OLD.version + 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
 -- Triggers for automatic timestamp updates
 CREATE TRIGGER update_empires_updated_at 
     BEFORE UPDATE ON empires 
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
+DROP TRIGGER IF EXISTS bump_empires_version ON empires;
+CREATE TRIGGER bump_empires_version
+    BEFORE UPDATE ON empires
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_empire_version();
+
 -- Row Level Security (RLS) policies
 ALTER TABLE empires ENABLE ROW LEVEL SECURITY;
 ALTER TABLE battles ENABLE ROW LEVEL SECURITY;
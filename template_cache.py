@@ -0,0 +1,94 @@
+"""
+Empire Builder - Template Fragment Cache
+A {% cache %} tag for Jinja templates that renders a fragment once and reuses it
+
+    {% cache 'cities.building_catalog' %} ... {% endcache %}               once per config version
+    {% cache 'cities.city_list', empire.id, empire.version %} ... {% endcache %}   once per empire version
+
+Keys always include the config version set by init_app, so a deploy that changes game
+config starts from fresh fragments. A key part that is None (e.g. an empire loaded
+without a version) renders the fragment uncached rather than risk serving a stale one.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from metrics import CACHE_REQUESTS
+
+MAX_FRAGMENTS = 4096  # Per-empire fragments are bounded by evicting the least recently used
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments"""
+
+    def __init__(self, max_entries: int = MAX_FRAGMENTS):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Tuple, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FragmentCacheExtension(Extension):
+    """Adds {% cache key, ... %}...{% endcache %}"""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache(), fragment_cache_version='')
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key_parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_cached', [nodes.List(key_parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key_parts, caller):
+        if any(part is None for part in key_parts):
+            return caller()
+
+        key = (self.environment.fragment_cache_version, *(str(part) for part in key_parts))
+        cache = self.environment.fragment_cache
+        fragment = cache.get(key)
+        if fragment is not None:
+            CACHE_REQUESTS.inc(cache='template_fragment', result='hit')
+            return fragment
+
+        CACHE_REQUESTS.inc(cache='template_fragment', result='miss')
+        fragment = caller()
+        cache.set(key, fragment)
+        return fragment
+
+
+def init_app(app, config_version: str):
+    """Enable {% cache %} in the app's templates, keyed by ``config_version``"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache_version = config_version
@@ -0,0 +1,25 @@
+"""
+Empire Builder - Wire Format
+MessagePack encoding for clients that ask for binary payloads instead of JSON
+"""
+
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # Without it every client is answered in JSON
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+# HTTP and Socket.IO only offer MessagePack when the encoder is installed
+MSGPACK_AVAILABLE = msgpack is not None
+
+
+def packb(obj: Any) -> bytes:
+    """Encode JSON-compatible data as MessagePack"""
+    return msgpack.packb(obj, use_bin_type=True, default=str)
+
+
+def unpackb(data: bytes) -> Any:
+    """Decode MessagePack produced by ``packb``"""
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
@@ -0,0 +1,513 @@
+"""
+Empire Builder - World Store
+Durable single-node persistence for the in-memory world: a write-ahead log of game
+commands plus periodic snapshots
+
+Every action is applied in memory, appended to the log and acknowledged once the log is
+fsynced. Concurrent actions share one fsync (group commit), so throughput is not bound
+by one disk flush per action. Records are commands, not rows: a training order is a few
+dozen bytes whatever the empire's size. Random battle outcomes are logged as a seed, so
+replaying an attack lands the same result.
+
+A checkpoint writes a gzip'd snapshot of the world, tagged with the last log sequence it
+contains, and deletes the log segments it covers. Recovery loads the newest snapshot,
+replays later records in order, and truncates a torn record left at the tail by a crash.
+
+    data_dir/
+        snapshot-000000004200.json.gz   world as of record 4200
+        wal-000000004201.log            records 4201.. (one segment per checkpoint/restart)
+
+Used by ``simulator.py --storage durable`` and benchmark_world_store.py. The web app keeps
+its own database: its battles go through the Supabase battle system and its AI players
+run against the SQLite GameDatabase.
+"""
+
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import metrics
+from models import (
+    BattleSystem, Empire, apply_build_building, apply_build_city, apply_buy_land,
+    apply_resource_tick, apply_unit_training, building_production
+)
+from storage import MemoryGameDatabase, copy_empire
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_EVERY = 50_000       # Records between automatic checkpoints
+SNAPSHOT_INTERVAL = 300       # Seconds between automatic checkpoints (if anything changed)
+WAL_PREFIX, WAL_SUFFIX = 'wal-', '.log'
+SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX = 'snapshot-', '.json.gz'
+
+WAL_GROUP_SIZE = metrics.registry.histogram('empire_wal_group_records', 'Records made durable by one fsync',
+                                            buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000))
+WAL_FSYNC_DURATION = metrics.registry.histogram('empire_wal_fsync_seconds', 'Write-ahead log write + fsync time')
+CHECKPOINT_DURATION = metrics.registry.histogram('empire_checkpoint_seconds', 'Time to write a world snapshot')
+
+
+def _segment_name(prefix: str, seq: int, suffix: str) -> str:
+    return f"{prefix}{seq:012d}{suffix}"
+
+
+def _segment_seq(filename: str, prefix: str, suffix: str) -> Optional[int]:
+    if not (filename.startswith(prefix) and filename.endswith(suffix)):
+        return None
+    try:
+        return int(filename[len(prefix):-len(suffix)])
+    except ValueError:
+        return None
+
+
+def _list_files(directory: str, prefix: str, suffix: str) -> List[tuple]:
+    """(seq, path) of the matching files, oldest first"""
+    found = []
+    for filename in os.listdir(directory):
+        seq = _segment_seq(filename, prefix, suffix)
+        if seq is not None:
+            found.append((seq, os.path.join(directory, filename)))
+    return sorted(found)
+
+
+def _fsync_directory(directory: str):
+    """Make a rename or unlink durable (a no-op where directories can't be opened)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """One log line: CRC32 of the JSON, then the JSON"""
+    body = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return b'%08x ' % zlib.crc32(body) + body + b'\n'
+
+
+def decode_record(line: bytes) -> Optional[Dict[str, Any]]:
+    """The record on ``line``, or None if it is torn or corrupt"""
+    if not line.endswith(b'\n') or len(line) < 10:
+        return None
+    body = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(body):
+            return None
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+class WriteAheadLog:
+    """Append-only command log with group commit.
+
+    append() only buffers and assigns the sequence number, so callers can do it while
+    holding the world lock and log order matches apply order. wait() then blocks until
+    the record is on disk: the first waiter writes and fsyncs everything buffered so
+    far, and callers that arrive during that flush ride along on the next one.
+    """
+
+    def __init__(self, directory: str, next_seq: int = 1, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        self.next_seq = next_seq
+        self.durable_seq = next_seq - 1
+        self.segment_start = next_seq
+        self.flushes = 0
+        self._buffer: List[bytes] = []
+        self._flushing = False
+        self._failure: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._handle = self._open_segment(next_seq)
+
+    def _open_segment(self, start_seq: int):
+        path = os.path.join(self.directory, _segment_name(WAL_PREFIX, start_seq, WAL_SUFFIX))
+        # Unbuffered: a failed write must not leave bytes behind to be flushed later
+        handle = open(path, 'ab', buffering=0)
+        _fsync_directory(self.directory)
+        return handle
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Buffer ``record`` and return its sequence number"""
+        with self._cond:
+            seq = self.next_seq
+            record['seq'] = seq
+            self._buffer.append(encode_record(record))
+            self.next_seq += 1
+            return seq
+
+    def wait(self, seq: int):
+        """Block until record ``seq`` is durable"""
+        with self._cond:
+            while self.durable_seq < seq:
+                if self._failure is not None:
+                    raise RuntimeError("Write-ahead log is unusable; reopen the store to recover") from self._failure
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._flush_locked()
+
+    def _flush_locked(self):
+        """Write out the buffer; called holding the condition, which is released during I/O"""
+        if self._failure is not None:
+            raise RuntimeError("Write-ahead log is unusable; reopen the store to recover") from self._failure
+        batch, self._buffer = self._buffer, []
+        last_seq = self.next_seq - 1
+        handle = self._handle
+        self._flushing = True
+        self._cond.release()
+        started = time.perf_counter()
+        offset = handle.tell()
+        try:
+            data = memoryview(b''.join(batch))
+            while data:
+                data = data[handle.write(data):]
+        except BaseException as e:
+            # A partial write (ENOSPC, EIO) would sit in front of the retried batch, and
+            # recovery stops at the first torn record; cut it off before retrying
+            try:
+                handle.truncate(offset)
+                handle.seek(offset)
+            except OSError as truncate_error:
+                self._fail(batch, truncate_error)
+                raise
+            self._cond.acquire()
+            self._buffer[:0] = batch  # Retry with the next flush
+            self._flushing = False
+            self._cond.notify_all()
+            raise e
+        try:
+            if self.fsync:
+                os.fsync(handle.fileno())
+        except BaseException as e:
+            # After a failed fsync the kernel may have dropped the pages; retrying could
+            # report success for data that never reached the disk
+            self._fail(batch, e)
+            raise
+        self._cond.acquire()
+        WAL_FSYNC_DURATION.observe(time.perf_counter() - started)
+        self.flushes += 1
+        if batch:
+            WAL_GROUP_SIZE.observe(len(batch))
+        self._flushing = False
+        self.durable_seq = max(self.durable_seq, last_seq)
+        self._cond.notify_all()
+
+    def _fail(self, batch: List[bytes], error: BaseException):
+        """Stop acknowledging writes; recovery on the next open truncates whatever is torn"""
+        self._cond.acquire()
+        self._failure = error
+        self._flushing = False
+        self._cond.notify_all()
+        print(f"❌ Write-ahead log failed, {len(batch)} records not durable: {error}")
+
+    def rotate(self) -> int:
+        """Flush, start a new segment, and return the last sequence in the old ones"""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            self._flush_locked()
+            while self._flushing:
+                self._cond.wait()
+            last_seq = self.next_seq - 1
+            self._handle.close()
+            self.segment_start = self.next_seq
+            self._handle = self._open_segment(self.segment_start)
+            return last_seq
+
+    def remove_segments_before(self, seq: int):
+        """Delete whole segments that start before ``seq`` (the current one is kept)"""
+        for start, path in _list_files(self.directory, WAL_PREFIX, WAL_SUFFIX):
+            if start < seq and start != self.segment_start:
+                os.remove(path)
+        _fsync_directory(self.directory)
+
+    def close(self):
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            try:
+                if self._failure is None:
+                    self._flush_locked()
+            finally:
+                self._handle.close()
+
+
+class DurableGameDatabase(MemoryGameDatabase):
+    """MemoryGameDatabase whose every change survives a crash (see the module docstring).
+
+    Implements GameStorage. Actions run against the stored empire rather than the
+    caller's copy, so a stale read can't undo a concurrent change; the caller's object
+    is refreshed with the outcome. update_empire still logs the whole empire, for
+    writes that aren't one of the commands below.
+    """
+
+    def __init__(self, data_dir: str = 'world_data', fsync: bool = True,
+                 snapshot_every: int = SNAPSHOT_EVERY, snapshot_interval: Optional[float] = SNAPSHOT_INTERVAL):
+        super().__init__()
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        os.makedirs(data_dir, exist_ok=True)
+
+        self.recovery = self.recover()
+        self.checkpoint_seq = self.recovery['snapshot_seq']
+        self.wal = WriteAheadLog(data_dir, self.recovery['last_seq'] + 1, fsync=fsync)
+
+        self._checkpoint_lock = threading.Lock()
+        self._checkpoint_wanted = threading.Event()
+        self._stop = threading.Event()
+        self._checkpoint_thread = None
+        if snapshot_interval or snapshot_every:
+            self._checkpoint_thread = threading.Thread(target=self._checkpoint_loop, daemon=True,
+                                                       name='world-checkpoint')
+            self._checkpoint_thread.start()
+
+    # GameStorage
+
+    def create_empire(self, name: str, ruler: str, lat: float, lng: float) -> str:
+        empire = self._new_empire(name, ruler, lat, lng)
+        self._execute({'op': 'create', 'empire': asdict(empire)})
+        return empire.id
+
+    def update_empire(self, empire: Empire) -> bool:
+        return bool(self._execute({'op': 'put', 'empire': asdict(empire)}, refresh=[empire]))
+
+    def build_city(self, empire: Empire, city_type: str, city_name: str) -> bool:
+        """Found a city"""
+        return bool(self._execute({'op': 'build_city', 'empire_id': empire.id, 'city_type': city_type,
+                                   'city_name': city_name, 'city_id': str(uuid.uuid4())}, refresh=[empire]))
+
+    def build_building(self, empire: Empire, city_id: str, building_type: str) -> bool:
+        """Add a building to a city"""
+        return bool(self._execute({'op': 'build_building', 'empire_id': empire.id, 'city_id': city_id,
+                                   'building_type': building_type}, refresh=[empire]))
+
+    def buy_land(self, empire: Empire, acres: int) -> bool:
+        """Buy land"""
+        return bool(self._execute({'op': 'buy_land', 'empire_id': empire.id, 'acres': acres},
+                                  refresh=[empire]))
+
+    # Commands beyond GameStorage
+
+    def train_units(self, empire: Empire, units: Dict[str, int]) -> bool:
+        """Pay for and add ``units``"""
+        return bool(self._execute({'op': 'train', 'empire_id': empire.id, 'units': units}, refresh=[empire]))
+
+    def attack(self, attacker: Empire, defender: Empire, attacking_units: Dict[str, int]) -> Optional[Dict]:
+        """Fight a battle (models.BattleSystem) and save both sides; None if either is gone"""
+        return self._execute({'op': 'attack', 'attacker_id': attacker.id, 'defender_id': defender.id,
+                              'units': attacking_units, 'seed': random.getrandbits(64)},
+                             refresh=[attacker, defender])
+
+    def resource_tick(self) -> bool:
+        """One economy tick for every empire, logged as a single record"""
+        return bool(self._execute({'op': 'tick'}))
+
+    # Apply + log
+
+    def _execute(self, record: Dict[str, Any], refresh: List[Empire] = ()) -> Any:
+        record['at'] = datetime.now().isoformat()
+        with self._lock:
+            result = self._apply(record)
+            if not result:
+                return result
+            seq = self.wal.append(record)
+            for empire in refresh:
+                stored = self._empires.get(empire.id)
+                if stored is not None:
+                    vars(empire).update(vars(copy_empire(stored)))
+        self.wal.wait(seq)
+
+        if self.snapshot_every and seq - self.checkpoint_seq >= self.snapshot_every:
+            self._checkpoint_wanted.set()
+        return result
+
+    def _apply(self, record: Dict[str, Any]) -> Any:
+        """Apply one record to the world; the same code runs live and during recovery"""
+        op, at = record['op'], record['at']
+
+        if op == 'create':
+            empire = Empire(**record['empire'])
+            self._empires[empire.id] = empire
+            return True
+
+        if op == 'put':
+            if record['empire']['id'] not in self._empires:
+                return False
+            self._commit(Empire(**record['empire']), at)
+            return True
+
+        if op == 'tick':
+            for empire in self._empires.values():
+                apply_resource_tick(empire, building_production(empire))
+                empire.last_update = at
+                empire.version = (empire.version or 0) + 1
+            return True
+
+        if op == 'attack':
+            attacker = self._working_copy(record['attacker_id'])
+            defender = self._working_copy(record['defender_id'])
+            if attacker is None or defender is None:
+                return None
+            result = BattleSystem.calculate_battle(attacker, defender, record['units'],
+                                                   rng=random.Random(record['seed']))
+            self._commit(attacker, at)
+            self._commit(defender, at)
+            return result
+
+        empire = self._working_copy(record['empire_id'])
+        if empire is None or not COMMANDS[op](empire, record):
+            return False
+        self._commit(empire, at)
+        return True
+
+    def _working_copy(self, empire_id: str) -> Optional[Empire]:
+        stored = self._empires.get(empire_id)
+        return copy_empire(stored) if stored else None
+
+    def _commit(self, empire: Empire, at: str):
+        stored = self._empires.get(empire.id)
+        empire.last_update = at
+        empire.version = ((stored.version if stored else None) or 0) + 1
+        self._empires[empire.id] = empire
+
+    # Snapshots and recovery
+
+    def checkpoint(self) -> str:
+        """Snapshot the world and drop the log segments it covers"""
+        with self._checkpoint_lock:
+            started = time.perf_counter()
+            with self._lock:
+                seq = self.wal.rotate()
+                empires = [copy_empire(empire) for empire in self._empires.values()]
+
+            # Serialize outside the world lock; the copies can't change under us
+            snapshot = {
+                'format': SNAPSHOT_FORMAT,
+                'seq': seq,
+                'saved_at': datetime.now().isoformat(),
+                'empires': [asdict(empire) for empire in empires]
+            }
+            body = gzip.compress(json.dumps(snapshot, separators=(',', ':')).encode('utf-8'),
+                                 compresslevel=1, mtime=0)
+
+            path = os.path.join(self.data_dir, _segment_name(SNAPSHOT_PREFIX, seq, SNAPSHOT_SUFFIX))
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+            _fsync_directory(self.data_dir)
+
+            # The new snapshot is durable; older snapshots and covered segments can go
+            for old_seq, old_path in _list_files(self.data_dir, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX):
+                if old_seq < seq:
+                    os.remove(old_path)
+            self.wal.remove_segments_before(seq + 1)
+            self.checkpoint_seq = seq
+
+            CHECKPOINT_DURATION.observe(time.perf_counter() - started)
+            return path
+
+    def recover(self) -> Dict[str, Any]:
+        """Load the newest readable snapshot and replay the log after it"""
+        started = time.perf_counter()
+        snapshot_seq = 0
+        for seq, path in reversed(_list_files(self.data_dir, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)):
+            try:
+                with open(path, 'rb') as f:
+                    snapshot = json.loads(gzip.decompress(f.read()))
+                if snapshot.get('format') != SNAPSHOT_FORMAT:
+                    raise ValueError(f"unsupported format {snapshot.get('format')}")
+            except (OSError, EOFError, ValueError) as e:
+                print(f"⚠️ Skipping unreadable snapshot {path}: {e}")
+                continue
+            self._empires = {data['id']: Empire(**data) for data in snapshot['empires']}
+            snapshot_seq = snapshot['seq']
+            break
+        snapshot_seconds = time.perf_counter() - started
+
+        last_seq, replayed, truncated = snapshot_seq, 0, 0
+        for _, path in _list_files(self.data_dir, WAL_PREFIX, WAL_SUFFIX):
+            offset = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    record = decode_record(line)
+                    if record is None:
+                        break
+                    offset += len(line)
+                    if record['seq'] <= last_seq:
+                        continue
+                    if record['seq'] != last_seq + 1:
+                        raise RuntimeError(f"Write-ahead log gap in {path}: expected record "
+                                           f"{last_seq + 1}, found {record['seq']}")
+                    self._apply(record)
+                    last_seq = record['seq']
+                    replayed += 1
+                size = f.seek(0, os.SEEK_END)
+            if offset < size:
+                # A crash mid-append leaves a torn last record; it was never acknowledged
+                truncated += size - offset
+                print(f"⚠️ Truncating {size - offset} bytes of torn log at the end of {path}")
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+                    os.fsync(f.fileno())
+
+        stats = {
+            'snapshot_seq': snapshot_seq,
+            'last_seq': last_seq,
+            'empires': len(self._empires),
+            'replayed': replayed,
+            'truncated_bytes': truncated,
+            'snapshot_seconds': round(snapshot_seconds, 3),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        if snapshot_seq or replayed:
+            print(f"💾 Recovered {stats['empires']} empires from snapshot {snapshot_seq} "
+                  f"+ {replayed} log records in {stats['seconds']:.2f}s")
+        return stats
+
+    def _checkpoint_loop(self):
+        while not self._stop.is_set():
+            self._checkpoint_wanted.wait(self.snapshot_interval)
+            if self._stop.is_set():
+                break
+            self._checkpoint_wanted.clear()
+            if self.wal.next_seq - 1 > self.checkpoint_seq:
+                try:
+                    self.checkpoint()
+                except Exception as e:
+                    metrics.BACKGROUND_ERRORS.inc(job='world_checkpoint')
+                    print(f"❌ World checkpoint failed: {e}")
+
+    def close(self, checkpoint: bool = True):
+        """Stop the checkpoint thread, optionally snapshot, and close the log"""
+        self._stop.set()
+        self._checkpoint_wanted.set()
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+        if checkpoint and self.wal.next_seq - 1 > self.checkpoint_seq:
+            self.checkpoint()
+        self.wal.close()
+
+
+# op -> rule applied to a working copy of the record's empire
+COMMANDS: Dict[str, Callable[[Empire, Dict[str, Any]], bool]] = {
+    'train': lambda empire, r: apply_unit_training(empire, r['units']),
+    'build_city': lambda empire, r: apply_build_city(empire, r['city_name'], r['city_type'], city_id=r['city_id']),
+    'build_building': lambda empire, r: apply_build_building(empire, r['city_id'], r['building_type']),
+    'buy_land': lambda empire, r: apply_buy_land(empire, r['acres']),
+}
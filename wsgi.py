@@ -3,7 +3,10 @@ WSGI entry point for Empire Builder
 Used by production servers like Gunicorn
 """
 
-from app import app, socketio
+from app import app, socketio, initialize_game
+
+# Each Gunicorn worker starts here; leader election keeps the game tick to one of them
+initialize_game()
 
 # For Gunicorn to use
 application = socketio